@@ -18,8 +18,73 @@ from __future__ import annotations
 
 from typing import Any, Optional
 
+import numpy as np
 import numpy.typing as npt
-from sklearn.metrics import confusion_matrix
+
+# Outcome code of each sample, which is 2 * (truth is positive) + (prediction is positive), in the same order as a ravelled confusion matrix.
+OUTCOME_TRUE_NEGATIVE = 0
+OUTCOME_FALSE_POSITIVE = 1
+OUTCOME_FALSE_NEGATIVE = 2
+OUTCOME_TRUE_POSITIVE = 3
+OUTCOME_IGNORED = 4
+"""Code for samples with a truth or prediction outside the labels, which are not counted."""
+NUM_OUTCOMES = 4
+
+
+def calculate_outcomes(
+    expected_results: npt.ArrayLike,
+    predictions: npt.ArrayLike,
+    labels: list[Any],
+    positive_class: Any,
+) -> npt.NDArray[np.int8]:
+    """Returns the outcome code of each sample, as a true/false positive/negative."""
+    expected_results = np.asarray(expected_results)
+    predictions = np.asarray(predictions)
+    outcomes = 2 * (expected_results == positive_class).astype(np.int8) + (
+        predictions == positive_class
+    ).astype(np.int8)
+    outcomes[
+        ~(np.isin(expected_results, labels) & np.isin(predictions, labels))
+    ] = OUTCOME_IGNORED
+    return outcomes
+
+
+def count_outcomes_by_segment(
+    outcomes: npt.NDArray[np.int8], segment_sizes: npt.ArrayLike
+) -> npt.NDArray[np.int64]:
+    """
+    Counts the samples with each outcome in consecutive segments of the given sizes, in one pass. Returns a matrix with a row per
+    segment, and a column per outcome, in the order of the outcome codes.
+    """
+    segment_sizes = np.asarray(segment_sizes, dtype=np.int64)
+    if segment_sizes.sum() != outcomes.size:
+        raise Exception(
+            f"Segment sizes add up to {segment_sizes.sum()}, but there are {outcomes.size} samples."
+        )
+    counts = np.zeros((segment_sizes.size, NUM_OUTCOMES), dtype=np.int64)
+
+    # Empty segments are skipped, since reduceat would return the next sample for them instead of nothing.
+    non_empty = segment_sizes > 0
+    if np.any(non_empty):
+        segment_starts = np.cumsum(segment_sizes) - segment_sizes
+        counts[non_empty] = np.add.reduceat(
+            outcomes[:, np.newaxis] == np.arange(NUM_OUTCOMES),
+            segment_starts[non_empty],
+            axis=0,
+            dtype=np.int64,
+        )
+    return counts
+
+
+def calculate_accuracy_from_counts(
+    counts: npt.NDArray[np.int64],
+) -> npt.NDArray[np.float_]:
+    """Returns the accuracy for each row of outcome counts, or NaN for rows without samples."""
+    totals = counts.sum(axis=-1)
+    corrects = (
+        counts[..., OUTCOME_TRUE_NEGATIVE] + counts[..., OUTCOME_TRUE_POSITIVE]
+    )
+    return np.where(totals > 0, corrects / np.maximum(totals, 1), np.nan)
 
 
 class ClassificationAccuracy:
@@ -29,8 +94,15 @@ class ClassificationAccuracy:
     ACCURACY_TRUE_NEGATIVE = "tn"
     ACCURACY_FALSE_POSITIVE = "fp"
     ACCURACY_FALSE_NEGATIVE = "fn"
+    OUTCOME_NAMES = [
+        ACCURACY_TRUE_NEGATIVE,
+        ACCURACY_FALSE_POSITIVE,
+        ACCURACY_FALSE_NEGATIVE,
+        ACCURACY_TRUE_POSITIVE,
+    ]
+    """Name of each outcome code."""
 
-    tf_pn_by_sample: Optional[list[str]] = None
+    tf_pn_by_sample: Optional[npt.NDArray[np.int8]] = None
     total_true_positives = 0
     total_true_negatives = 0
     total_false_positives = 0
@@ -39,37 +111,22 @@ class ClassificationAccuracy:
     def _calculate_true_false_positives_negatives(
         self, expected_results, predictions, labels, positive_class
     ):
-        """Calculates confusion matrix, and for each sample if it was a true/false positive/negative."""
+        """Calculates confusion matrix, and for each sample if it was a true/false positive/negative, as an outcome code."""
         if expected_results is not None and predictions is not None:
-            conf_matrix: npt.NDArray[Any] = confusion_matrix(
-                expected_results, predictions, labels=labels
+            self.tf_pn_by_sample = calculate_outcomes(
+                expected_results, predictions, labels, positive_class
             )
             (
                 self.total_true_negatives,
                 self.total_false_positives,
                 self.total_false_negatives,
                 self.total_true_positives,
-            ) = conf_matrix.ravel()
+            ) = np.bincount(self.tf_pn_by_sample, minlength=NUM_OUTCOMES + 1)[
+                :NUM_OUTCOMES
+            ].tolist()
             # print(f"TN: {self.total_true_negatives}, TP: {self.total_true_positives}, "
             #      f"FN: {self.total_false_negatives}, FP: {self.total_false_positives}")
 
-            self.tf_pn_by_sample = []
-            for idx, truth in enumerate(expected_results):
-                if truth == predictions[idx]:
-                    if truth == positive_class:
-                        self.tf_pn_by_sample.append(self.ACCURACY_TRUE_POSITIVE)
-                    else:
-                        self.tf_pn_by_sample.append(self.ACCURACY_TRUE_NEGATIVE)
-                else:
-                    if truth == positive_class:
-                        self.tf_pn_by_sample.append(
-                            self.ACCURACY_FALSE_POSITIVE
-                        )
-                    else:
-                        self.tf_pn_by_sample.append(
-                            self.ACCURACY_FALSE_NEGATIVE
-                        )
-
     def calculate_accuracy(
         self, expected_results, predictions, labels, positive_class
     ) -> float:
@@ -28,26 +28,28 @@ def save_updated_dataset(
     updated_dataset: DataSet,
     predictions: Predictions,
     output_filename: Optional[str],
+    compact: bool = False,
 ):
     """Saves a dataset to a JSON file, adding the given predictions first."""
     if output_filename is None:
         raise Exception("No output dataset filename was provided")
 
     updated_dataset.set_model_output(predictions.get_predictions())
-    updated_dataset.save_to_file(output_filename)
+    updated_dataset.save_to_file(output_filename, compact)
 
 
 def save_predictions(
     full_dataset: DataSet,
     predictions: Predictions,
     output_filename: Optional[str],
+    compact: bool = False,
 ):
     """Saves the ids, predictions and expected results into a JSON file."""
     if output_filename is None:
         raise Exception("No predictions output filename was provided")
     print_and_log("Saving predictions to file")
     ids_df = full_dataset.as_dataframe(only_ids=True)
-    predictions.save_to_file(output_filename, ids_df)
+    predictions.save_to_file(output_filename, ids_df, compact)
 
 
 def save_metrics(metrics: dict[Any, Any], metrics_filename: str):
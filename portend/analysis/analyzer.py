@@ -18,6 +18,9 @@ from __future__ import annotations
 
 from typing import Any, Optional
 
+import numpy as np
+import numpy.typing as npt
+
 from portend.analysis.file_keys import PredictorConfigKeys
 from portend.analysis.predictions import Predictions, build_predictions_object
 from portend.analysis.time_series.ts_analyzer import analyze_ts
@@ -45,6 +48,57 @@ def predict(
     )
 
 
+def predict_in_batches(
+    model: MLModel,
+    dataset: DataSet,
+    batch_size: int,
+    class_params: Optional[dict[str, Any]],
+) -> Predictions:
+    """
+    Generates predictions running the model on consecutive batches of the dataset, so that only the inputs of one batch are
+    built at a time. Additional data returned for each batch is expected as sequences of column values, and is joined in order.
+    """
+    raw_predictions: list[npt.NDArray[Any]] = []
+    expected_output: list[npt.NDArray[Any]] = []
+    additional_data: dict[str, dict[str, list[npt.NDArray[Any]]]] = {}
+    for batch in dataset.iter_batches(batch_size):
+        if batch.inputs is None or batch.output is None:
+            raise Exception(
+                "Input or output key has not been set, can't predict in batches."
+            )
+        batch_predictions, batch_additional_data = model.predict(batch.inputs)
+        raw_predictions.append(np.asarray(batch_predictions))
+        expected_output.append(np.asarray(batch.output))
+        for data_name, columns in batch_additional_data.items():
+            for column_name, values in columns.items():
+                additional_data.setdefault(data_name, {}).setdefault(
+                    column_name, []
+                ).append(np.asarray(values))
+        print_and_log(
+            f"Predicted for samples {batch.start} to {batch.start + len(batch)}"
+        )
+
+    if len(raw_predictions) == 0:
+        return predict(
+            model,
+            dataset.get_model_inputs(),
+            dataset.get_model_output(copy=False),
+            class_params,
+        )
+    return build_predictions_object(
+        np.concatenate(raw_predictions),
+        expected_output=np.concatenate(expected_output),
+        additional_data={
+            data_name: {
+                column_name: np.concatenate(values)
+                for column_name, values in columns.items()
+            }
+            for data_name, columns in additional_data.items()
+        },
+        class_params=class_params,
+    )
+
+
 def analyze(
     datasets: list[DataSet], predictions: list[Predictions], config: Config
 ) -> dict[Any, Any]:
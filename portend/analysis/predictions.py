@@ -16,6 +16,8 @@
 
 from __future__ import annotations
 
+import copy
+import os
 import typing
 from typing import Any, Optional
 
@@ -23,16 +25,34 @@ import numpy as np
 import numpy.typing as npt
 import pandas as pd
 
+from portend.analysis import accuracy as accuracy_utils
 from portend.analysis.accuracy import ClassificationAccuracy
+from portend.datasets.dataset import read_only_view
 from portend.utils import dataframe_helper
 from portend.utils import files as file_utils
 from portend.utils.logging import print_and_log
 from portend.utils.typing import SequenceLike
 
 JSON_EXT = ".json"
+NPZ_EXT = ".npz"
 ADD_DATA_FILE_SUFFIX = "_add_data"
 
 
+def to_columnar_data(
+    additional_data: dict[str, dict[str, Any]]
+) -> dict[str, dict[str, npt.NDArray[Any]]]:
+    """Converts additional data, with columns as dicts keyed by row (e.g., from DataFrame.to_dict()) or as sequences, to typed arrays per column."""
+    columnar_data: dict[str, dict[str, npt.NDArray[Any]]] = {}
+    for data_key, columns in additional_data.items():
+        columnar_data[data_key] = {
+            column_name: np.asarray(
+                list(values.values()) if isinstance(values, dict) else values
+            )
+            for column_name, values in columns.items()
+        }
+    return columnar_data
+
+
 def build_predictions_object(
     raw_predictions: Optional[SequenceLike] = None,
     expected_output: Optional[SequenceLike] = None,
@@ -68,7 +88,7 @@ class Predictions:
 
     raw_predictions: npt.NDArray[Any] = np.empty(1)
     expected_results: npt.NDArray[Any] = np.empty(1)
-    additional_data: dict[str, dict[str, Any]] = {}
+    additional_data: dict[str, dict[str, npt.NDArray[Any]]] = {}
 
     def store_expected_results(self, expected_output: SequenceLike):
         """Stores expected results and confusion matrix."""
@@ -79,11 +99,11 @@ class Predictions:
         return self.expected_results
 
     def store_additional_data(self, additional_data: dict[str, dict[str, Any]]):
-        """Stores additional data about the predictions."""
-        self.additional_data = additional_data
+        """Stores additional data about the predictions, as typed arrays for each column."""
+        self.additional_data = to_columnar_data(additional_data)
 
     def get_additional_data(self, key: Optional[str] = None) -> dict[str, Any]:
-        """Return the additional data specified by the given key."""
+        """Return the additional data specified by the given key, as a dict of column arrays."""
         if key is None:
             return self.additional_data
         if key not in self.additional_data:
@@ -100,16 +120,18 @@ class Predictions:
         return self.raw_predictions
 
     def create_slice(self, starting_idx: int, size: int) -> Predictions:
-        """Creates a new object of this type with a slice of the results in this one."""
+        """
+        Creates a new object of this type with a slice of the results in this one. The slice shares the arrays and additional data of this
+        object, through read-only views, so nothing is copied.
+        """
         if size == 0:
             raise Exception("Can't create a slice of size 0.")
-        sliced_predictions = Predictions()
-        sliced_predictions.store_additional_data(self.get_additional_data())
-        sliced_predictions.store_expected_results(
-            self.get_expected_results()[starting_idx : starting_idx + size]
+        sliced_predictions = copy.copy(self)
+        sliced_predictions.expected_results = read_only_view(
+            self.expected_results[starting_idx : starting_idx + size]
         )
-        sliced_predictions.store_predictions(
-            self.get_predictions()[starting_idx : starting_idx + size]
+        sliced_predictions.raw_predictions = read_only_view(
+            self.raw_predictions[starting_idx : starting_idx + size]
         )
         return sliced_predictions
 
@@ -129,19 +151,24 @@ class Predictions:
         return dataframe
 
     def save_to_file(
-        self, output_filepath: str, ids_df: Optional[pd.DataFrame] = None
+        self,
+        output_filepath: str,
+        ids_df: Optional[pd.DataFrame] = None,
+        compact: bool = False,
     ):
         """Saves this prediction object to file"""
         # First save predictions.
         predictions_df = self.as_dataframe(ids_df)
-        dataframe_helper.save_dataframe_to_file(predictions_df, output_filepath)
+        dataframe_helper.save_dataframe_to_file(
+            predictions_df, output_filepath, compact
+        )
 
-        # Separately save additional data.
+        # Separately save additional data, in a columnar sidecar file.
         add_data_output_filename = self.get_add_data_filename(output_filepath)
         add_data = self.get_additional_data()
         if len(add_data) > 0:
-            file_utils.save_dict_to_json_file(
-                self.get_additional_data(),
+            file_utils.save_columns_to_npz_file(
+                add_data,
                 add_data_output_filename,
                 data_name=self.ADDITIONAL_DATA,
             )
@@ -149,6 +176,15 @@ class Predictions:
     @staticmethod
     def get_add_data_filename(predictions_filepath: str) -> str:
         """Returns the filename and path of the file used for additional data, based on the given main predictions file."""
+        return (
+            os.path.splitext(predictions_filepath)[0]
+            + ADD_DATA_FILE_SUFFIX
+            + NPZ_EXT
+        )
+
+    @staticmethod
+    def get_legacy_add_data_filename(predictions_filepath: str) -> str:
+        """Returns the filename and path of the JSON additional data file used by older versions."""
         return predictions_filepath.replace(
             JSON_EXT, ADD_DATA_FILE_SUFFIX + JSON_EXT
         )
@@ -163,15 +199,23 @@ class Predictions:
             predictions_filename
         )
 
-        # Load additional data, if any.
+        # Load additional data, if any, falling back to the legacy JSON file.
         add_data: Optional[dict[str, Any]] = None
+        add_data_filename = Predictions.get_add_data_filename(
+            predictions_filename
+        )
+        legacy_add_data_filename = Predictions.get_legacy_add_data_filename(
+            predictions_filename
+        )
         try:
-            add_data_filename = Predictions.get_add_data_filename(
-                predictions_filename
-            )
-            add_data = file_utils.load_json_file_to_dict(
-                add_data_filename, Predictions.ADDITIONAL_DATA
-            )
+            if os.path.exists(add_data_filename):
+                add_data = file_utils.load_npz_file_to_columns(
+                    add_data_filename, Predictions.ADDITIONAL_DATA
+                )
+            else:
+                add_data = file_utils.load_json_file_to_dict(
+                    legacy_add_data_filename, Predictions.ADDITIONAL_DATA
+                )
         except IOError:
             print_and_log("Additional data file not found, ignoring.")
 
@@ -255,6 +299,7 @@ class ClassPredictions(Predictions):
     def calculate_accuracy(self) -> float:
         """Calculates accuracy."""
         # TODO: get Labels and Positive case from class_params and pass as arguments to accuracy.
+        self.accuracy = ClassificationAccuracy()
         return self.accuracy.calculate_accuracy(
             self.expected_results,
             self.classified_predictions,
@@ -262,14 +307,31 @@ class ClassPredictions(Predictions):
             positive_class=self.DEFAULT_POSITIVE_CLASS,
         )
 
+    def calculate_accuracy_by_segment(
+        self, segment_sizes: npt.ArrayLike
+    ) -> npt.NDArray[np.float_]:
+        """Calculates the accuracy of consecutive segments of the given sizes, all at once. Segments without samples get NaN."""
+        outcomes = accuracy_utils.calculate_outcomes(
+            self.expected_results,
+            self.classified_predictions,
+            labels=self.DEFAULT_LABELS,
+            positive_class=self.DEFAULT_POSITIVE_CLASS,
+        )
+        return accuracy_utils.calculate_accuracy_from_counts(
+            accuracy_utils.count_outcomes_by_segment(outcomes, segment_sizes)
+        )
+
     # Overriden.
     def create_slice(self, starting_idx: int, size: int) -> ClassPredictions:
-        """Creates a new object of this type with a slice of the results in this one."""
-        sliced_predictions = super().create_slice(starting_idx, size)
-        class_predictions = ClassPredictions.from_predictions(
-            sliced_predictions, self.class_params
+        """Creates a new object of this type with a slice of the results in this one, reusing the classification of this one."""
+        sliced_predictions = typing.cast(
+            ClassPredictions, super().create_slice(starting_idx, size)
         )
-        return class_predictions
+        sliced_predictions.classified_predictions = read_only_view(
+            self.classified_predictions[starting_idx : starting_idx + size]
+        )
+        sliced_predictions.accuracy = ClassificationAccuracy()
+        return sliced_predictions
 
     # Overriden.
     def as_dataframe(
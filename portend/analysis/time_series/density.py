@@ -16,17 +16,31 @@
 
 from __future__ import annotations
 
+import math
+from collections import OrderedDict
 from typing import Any, Optional
 
 import numpy as np
 import numpy.typing as npt
+from scipy.signal import fftconvolve
 from scipy.stats import norm
 
 from portend.utils.logging import print_and_log
 
+NORMAL_DIST = "normal"
+HISTOGRAM_DIST = "histogram"
+KERNEL_DENSITY_DIST = "kernel_density"
+NON_PARAMETRIC_DISTS = [HISTOGRAM_DIST, KERNEL_DENSITY_DIST]
+
+DEFAULT_PDF_CACHE_SIZE = 256
+KERNEL_TRUNCATE_STD_DEVS = 5
+
 
 class DensityEstimator:
-    """Implements most common density functions."""
+    """
+    Implements most common density functions, evaluated over the configured range. Supported distributions are "normal", and the non-parametric
+    "histogram" and "kernel_density", which estimate the density of the data when given, and use a normal with the params otherwise.
+    """
 
     dist_range: Optional[
         npt.NDArray[np.float_]
@@ -43,6 +57,14 @@ class DensityEstimator:
         self.config_params = config_params
         self.setup_valid_range()
 
+        # LRU cache of normal pdfs evaluated over the range, by mean and std dev.
+        self.pdf_cache_size = int(
+            config_params.get("pdf_cache_size", DEFAULT_PDF_CACHE_SIZE)
+        )
+        self._pdf_cache: OrderedDict[
+            tuple[float, float], npt.NDArray[Any]
+        ] = OrderedDict()
+
     def setup_valid_range(self):
         """Compute the dist range based the configuration."""
         if self.dist_range is None:
@@ -63,14 +85,61 @@ class DensityEstimator:
     ) -> npt.NDArray[Any]:
         """Calculates and returns the probability distribution for the given data."""
         # print_and_log(f"Using distribution: {distribution}")
-        if distribution == "normal":
+        if distribution == NORMAL_DIST or (
+            distribution in NON_PARAMETRIC_DISTS and data is None
+        ):
             if data is None:
                 return self._calculate_normal_dist_from_params(density_params)
             else:
                 return self._calculate_normal_dist(data, density_params)
+        elif distribution == HISTOGRAM_DIST:
+            return self._calculate_histogram(data)
+        elif distribution == KERNEL_DENSITY_DIST:
+            return self._calculate_kernel_density(data)
         else:
             raise Exception(f"Unsupported distribution type: {distribution}.")
 
+    def calculate_probability_distributions(
+        self,
+        distribution: str,
+        data: Optional[npt.NDArray[Any]],
+        means: npt.ArrayLike,
+        std_devs: npt.ArrayLike,
+    ) -> npt.NDArray[Any]:
+        """
+        Calculates the probability distributions for many sets of params at once, one per row. If data is given, its mean is used for
+        all rows instead of the given means, as in calculate_probability_distribution. Each distinct set of params is only calculated once.
+        For non-parametric distributions, the density of the data does not depend on the params, so it is calculated once for all rows.
+        """
+        if self.dist_range is None:
+            raise Exception("Range has not been set up.")
+        std_devs = np.asarray(std_devs, dtype=float)
+        if distribution in NON_PARAMETRIC_DISTS and data is not None:
+            dist = self.calculate_probability_distribution(
+                distribution, data, {}
+            )
+            return np.broadcast_to(dist, (std_devs.size, dist.size))
+        if distribution not in NON_PARAMETRIC_DISTS + [NORMAL_DIST]:
+            raise Exception(f"Unsupported distribution type: {distribution}.")
+
+        if data is None:
+            means = np.asarray(means, dtype=float)
+        else:
+            means = np.full(std_devs.shape, np.mean(data))
+        if std_devs.size == 0:
+            return np.empty((0, self.dist_range.size))
+
+        params = np.stack([means, std_devs], axis=1)
+        unique_params, param_indices = np.unique(
+            params, axis=0, return_inverse=True
+        )
+        unique_dists: npt.NDArray[Any] = norm.pdf(
+            self.dist_range[np.newaxis, :],
+            unique_params[:, 0:1],
+            unique_params[:, 1:2],
+        )
+        return unique_dists[param_indices.reshape(-1)]
+
     def _calculate_normal_dist_from_params(
         self, density_params: dict[str, Any]
     ) -> npt.NDArray[Any]:
@@ -82,8 +151,7 @@ class DensityEstimator:
                 "Can't calculate normal distribution; one of the params is None"
             )
         # print_and_log(f"Mean: {mean}, Std Dev: {std_dev}")
-        dist: npt.NDArray[Any] = norm.pdf(self.dist_range, mean, std_dev)
-        return dist
+        return self._get_normal_pdf(mean, std_dev)
 
     def _calculate_normal_dist(
         self, data: npt.NDArray[Any], density_params: dict[str, Any]
@@ -96,5 +164,92 @@ class DensityEstimator:
                 "Can't calculate normal distribution; standard deviation provided for data is None"
             )
         # print_and_log(f"Mean: {mean}, Std Dev: {std_dev}")
+        return self._get_normal_pdf(mean, std_dev)
+
+    def _get_normal_pdf(self, mean: float, std_dev: float) -> npt.NDArray[Any]:
+        """Returns the normal pdf over the range for the given params, from the cache if it was already evaluated. Cached pdfs are read-only."""
+        key = (float(mean), float(std_dev))
+        cached_dist = self._pdf_cache.get(key)
+        if cached_dist is not None:
+            self._pdf_cache.move_to_end(key)
+            return cached_dist
+
         dist: npt.NDArray[Any] = norm.pdf(self.dist_range, mean, std_dev)
+        if self.pdf_cache_size > 0 and math.isfinite(key[0] + key[1]):
+            dist.flags.writeable = False
+            self._pdf_cache[key] = dist
+            if len(self._pdf_cache) > self.pdf_cache_size:
+                self._pdf_cache.popitem(last=False)
         return dist
+
+    def _get_range_step(self) -> float:
+        """Returns the step between the values of the range."""
+        if self.dist_range is None:
+            raise Exception("Range has not been set up.")
+        return float(self.config_params.get("range_step", 1))
+
+    def _calculate_histogram(self, data: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        """Histogram density estimation, with a bin centered in each value of the range."""
+        if self.dist_range is None:
+            raise Exception("Range has not been set up.")
+        data = np.asarray(data, dtype=float)
+        if data.size == 0:
+            raise Exception("Can't calculate histogram; there is no data.")
+        step = self._get_range_step()
+        bin_edges = np.append(self.dist_range, self.dist_range[-1] + step) - (
+            step / 2
+        )
+        counts, _ = np.histogram(data, bins=bin_edges)
+        dist: npt.NDArray[Any] = counts / (data.size * step)
+        return dist
+
+    def _calculate_kernel_density(
+        self, data: npt.NDArray[Any]
+    ) -> npt.NDArray[Any]:
+        """
+        Gaussian kernel density estimation over the range. The data is first binned linearly into the range values, and the bins are then
+        convolved with the kernel through an FFT, so the cost is O(n + range log range) instead of O(n * range). The bandwidth is taken
+        from the "kde_bandwidth" param, or from Scott's rule as in scipy's gaussian_kde.
+        """
+        if self.dist_range is None:
+            raise Exception("Range has not been set up.")
+        data = np.asarray(data, dtype=float)
+        if data.size < 2:
+            raise Exception(
+                "Can't calculate kernel density; at least 2 data values are needed."
+            )
+        bandwidth = self.config_params.get("kde_bandwidth")
+        if bandwidth is None:
+            bandwidth = np.std(data, ddof=1) * data.size ** (-1 / 5)
+        bandwidth = float(bandwidth)
+        if not bandwidth > 0:
+            raise Exception(
+                f"Can't calculate kernel density; invalid bandwidth {bandwidth}."
+            )
+
+        # Linear binning: each value adds weight to its two closest range values, proportionally to how close it is to each.
+        step = self._get_range_step()
+        num_bins = self.dist_range.size
+        positions = (data - self.dist_range[0]) / step
+        lower_bins = np.floor(positions).astype(np.int64)
+        upper_weights = positions - lower_bins
+        weights = np.zeros(num_bins)
+        for bins, bin_weights in (
+            (lower_bins, 1 - upper_weights),
+            (lower_bins + 1, upper_weights),
+        ):
+            valid = (bins >= 0) & (bins < num_bins)
+            weights += np.bincount(
+                bins[valid], weights=bin_weights[valid], minlength=num_bins
+            )
+
+        # The kernel is truncated where it is negligible, and at most as wide as needed to cover the whole range.
+        kernel_radius = min(
+            int(math.ceil(KERNEL_TRUNCATE_STD_DEVS * bandwidth / step)),
+            num_bins - 1,
+        )
+        kernel = norm.pdf(
+            step * np.arange(-kernel_radius, kernel_radius + 1), 0, bandwidth
+        )
+        dist: npt.NDArray[Any] = fftconvolve(weights, kernel, mode="same")
+        return np.maximum(dist, 0) / data.size
@@ -0,0 +1,186 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from portend.analysis.time_series.timeseries import TimeSeries
+from portend.utils.logging import print_and_log
+
+INITIAL_CAPACITY = 64
+
+
+class GrowingArray:
+    """A 1D array that can be appended to in amortized constant time, by doubling its capacity when full."""
+
+    def __init__(self, dtype: npt.DTypeLike):
+        self._data: npt.NDArray[Any] = np.zeros(INITIAL_CAPACITY, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get_view(self) -> npt.NDArray[Any]:
+        """Returns a view of the current contents, without copying them."""
+        return self._data[: self._size]
+
+    def extend(self, values: npt.ArrayLike):
+        """Appends the given values at the end."""
+        values = np.asarray(values)
+        if values.size > 0 and not np.can_cast(values.dtype, self._data.dtype):
+            self._data = self._data.astype(np.result_type(self._data, values))
+        new_size = self._size + values.size
+        capacity = self._data.size
+        if new_size > capacity:
+            while capacity < new_size:
+                capacity *= 2
+            data = np.zeros(capacity, dtype=self._data.dtype)
+            data[: self._size] = self._data[: self._size]
+            self._data = data
+        self._data[self._size : new_size] = values
+        self._size = new_size
+
+
+class StreamingTimeSeries:
+    """
+    Aggregates (timestamp, value) samples as they arrive, into the same time intervals used by TimeSeries.aggregate_by_timestamp, with constant work per sample.
+    An interval is closed once a sample arrives for an interval more than allowed_late_intervals after it; later samples for closed intervals are dropped.
+    Samples before the start of the first interval are dropped as well, and counted separately.
+    Closed intervals are kept in time_series, which grows in place so that metrics can be calculated on it without aggregating the history again.
+    """
+
+    def __init__(
+        self,
+        starting_interval: str,
+        interval_unit: str,
+        allowed_late_intervals: int = 0,
+        origin_timestamp: Optional[int] = None,
+    ):
+        """
+        :param starting_interval: the time interval to label the first interval with.
+        :param interval_unit: the unit of each interval, as a pandas offset alias.
+        :param allowed_late_intervals: how many intervals a sample can arrive late and still be aggregated.
+        :param origin_timestamp: timestamp in ns where the first interval starts; defaults to the first sample received, as in offline aggregation.
+            Required if late samples are allowed, since samples arriving late for the interval before the first sample could not be aggregated.
+        """
+        if allowed_late_intervals < 0:
+            raise Exception(
+                f"Allowed late intervals can't be negative: {allowed_late_intervals}"
+            )
+        if allowed_late_intervals > 0 and origin_timestamp is None:
+            raise Exception(
+                "An origin timestamp is required to allow late samples, the first sample received can't be used as origin."
+            )
+        self.allowed_late_intervals = allowed_late_intervals
+        self.origin_timestamp = origin_timestamp
+        self.num_dropped_samples = 0
+        self.num_early_samples = 0
+
+        # Closed intervals.
+        self.time_series = TimeSeries()
+        self.time_series.setup_time_intervals(
+            pd.to_datetime(starting_interval), interval_unit, 0
+        )
+        self._aggregated = GrowingArray(np.int64)
+        self._num_samples = GrowingArray(np.int64)
+
+        # Open intervals, by index, with their aggregated value and number of samples.
+        self._open_intervals: dict[int, list[Any]] = {}
+        self._last_interval_idx = -1
+
+    def get_num_closed_intervals(self) -> int:
+        """Returns the number of intervals that have been closed so far."""
+        return self.time_series.get_num_intervals()
+
+    def push(self, timestamp: int, value: Any) -> range:
+        """Adds a sample, with its timestamp in ns. Returns the range of indices of the intervals closed by it, if any."""
+        if self.origin_timestamp is None:
+            self.origin_timestamp = int(timestamp)
+        num_closed = self.get_num_closed_intervals()
+        interval_idx = (
+            int(timestamp) - self.origin_timestamp
+        ) // self.time_series.step_ns
+        if interval_idx < 0:
+            self.num_early_samples += 1
+            print_and_log(
+                f"WARNING: Dropping sample with timestamp {timestamp}, it is before the first interval, which starts at {self.origin_timestamp}."
+            )
+            return range(num_closed, num_closed)
+        if interval_idx < num_closed:
+            self.num_dropped_samples += 1
+            print_and_log(
+                f"WARNING: Dropping sample with timestamp {timestamp}, its interval {interval_idx} was already closed."
+            )
+            return range(num_closed, num_closed)
+
+        interval = self._open_intervals.get(interval_idx)
+        if interval is None:
+            self._open_intervals[interval_idx] = [value, 1]
+        else:
+            interval[0] += value
+            interval[1] += 1
+
+        self._last_interval_idx = max(self._last_interval_idx, interval_idx)
+        return self._close_intervals(
+            self._last_interval_idx - self.allowed_late_intervals
+        )
+
+    def flush(self) -> range:
+        """Closes all open intervals, e.g., when the stream ends. Returns the range of indices of the intervals closed."""
+        return self._close_intervals(self._last_interval_idx + 1)
+
+    def get_intervals(self, intervals: range) -> TimeSeries:
+        """Returns a time series with only the given closed intervals, sharing their data."""
+        time_series = TimeSeries()
+        time_series._set_time_intervals(
+            self.time_series.start_ns
+            + self.time_series.step_ns * intervals.start,
+            self.time_series.step_ns,
+            len(intervals),
+        )
+        time_series.aggregated = self.time_series.aggregated[
+            intervals.start : intervals.stop
+        ]
+        time_series.num_samples = self.time_series.num_samples[
+            intervals.start : intervals.stop
+        ]
+        return time_series
+
+    def _close_intervals(self, end_idx: int) -> range:
+        """Closes all intervals before end_idx, including ones without samples, and adds them to the time series."""
+        start_idx = self.get_num_closed_intervals()
+        if end_idx <= start_idx:
+            return range(start_idx, start_idx)
+
+        closed_intervals = [
+            self._open_intervals.pop(interval_idx, [0, 0])
+            for interval_idx in range(start_idx, end_idx)
+        ]
+        self._aggregated.extend([interval[0] for interval in closed_intervals])
+        self._num_samples.extend([interval[1] for interval in closed_intervals])
+
+        # Expose the closed intervals through views, so the time series is updated without copying.
+        self.time_series._set_time_intervals(
+            self.time_series.start_ns, self.time_series.step_ns, end_idx
+        )
+        self.time_series.aggregated = self._aggregated.get_view()
+        self.time_series.num_samples = self._num_samples.get_view()
+        return range(start_idx, end_idx)
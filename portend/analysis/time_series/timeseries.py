@@ -41,6 +41,10 @@ class IntervalGenerator:
     def get_last_time_interval(self) -> pd.Timestamp:
         raise NotImplementedError()
 
+    def calculate_time_interval_indices(self) -> npt.NDArray[np.int64]:
+        """Calculates the index of the time interval where each sample falls into, for all samples at once."""
+        raise NotImplementedError()
+
     def get_number_of_intervals(self) -> int:
         """Returns the number of intervals for the total of samples."""
         interval_delta: int = (
@@ -78,6 +82,14 @@ class TimestampIntervalGenerator(IntervalGenerator):
     def get_last_time_interval(self) -> pd.Timestamp:
         return self.calculate_time_interval(self.timestamps.size - 1)
 
+    def calculate_time_interval_indices(self) -> npt.NDArray[np.int64]:
+        """Calculates the index of the time interval of each timestamp, with integer arithmetic on the differences to the first one."""
+        timestamps = np.asarray(self.timestamps, dtype=np.int64)
+        if timestamps.size == 0:
+            return np.empty(0, dtype=np.int64)
+        unit_delta = pd.to_timedelta(1, self.interval_unit).value  # type: ignore
+        return (timestamps - timestamps[0]) // unit_delta
+
 
 class NumSamplesIntervalGenerator(IntervalGenerator):
     """Calculates time intervals based on number of samples per interval."""
@@ -104,15 +116,29 @@ class NumSamplesIntervalGenerator(IntervalGenerator):
     def get_last_time_interval(self) -> pd.Timestamp:
         return self.calculate_time_interval(self.num_samples - 1)
 
+    def calculate_time_interval_indices(self) -> npt.NDArray[np.int64]:
+        """Calculates the index of the time interval of each sample, given by its position."""
+        return (
+            np.arange(self.num_samples, dtype=np.int64) // self.samples_per_time
+        )
+
 
 class TimeSeries:
     """Represents a time series with a time interval and an aggregated value."""
 
-    time_intervals: list[pd.Timestamp] = []
+    # Time intervals are evenly spaced, stored as the first one and the step between them, in nanoseconds since the epoch.
+    start_ns: int = 0
+    step_ns: int = 1
+    num_intervals: int = 0
+    _time_intervals_index: Optional[pd.DatetimeIndex] = None
+
     aggregated = np.empty(0)
     num_samples: npt.NDArray[np.int_] = np.empty(0, dtype=int)
-    pdf: list[npt.NDArray[Any]] = []
-    pdf_params: list[Any] = []
+    pdf: npt.NDArray[np.float_] = np.empty((0, 1))
+
+    # Parameters of the pdf for each interval, as parallel arrays.
+    pdf_means: npt.NDArray[np.float_] = np.empty(0)
+    pdf_std_devs: npt.NDArray[np.float_] = np.empty(0)
 
     def check_valid_idx(self, time_interval_idx: int):
         """Checks if the interval idx is inside the valid range"""
@@ -124,22 +150,63 @@ class TimeSeries:
                 f"Invalid time interval id passed: {time_interval_idx}, length is {self.get_num_intervals()}"
             )
 
-    def set_time_intervals(self, time_intervals: list[Any]):
-        """Sets the time intervals list."""
-        self.time_intervals = time_intervals
+    def set_time_intervals(self, time_intervals: typing.Sequence[Any]):
+        """Sets the time intervals, which have to be evenly spaced."""
+        intervals_ns = pd.DatetimeIndex(time_intervals).asi8
+        steps_ns = np.diff(intervals_ns)
+        if steps_ns.size > 0 and (
+            steps_ns[0] <= 0 or np.any(steps_ns != steps_ns[0])
+        ):
+            raise Exception("Time intervals have to be evenly spaced.")
+        self._set_time_intervals(
+            int(intervals_ns[0]) if intervals_ns.size > 0 else 0,
+            int(steps_ns[0]) if steps_ns.size > 0 else self.step_ns,
+            intervals_ns.size,
+        )
+
+    def copy_time_intervals(self, time_series: TimeSeries):
+        """Sets the same time intervals of the given time series."""
+        self._set_time_intervals(
+            time_series.start_ns, time_series.step_ns, time_series.num_intervals
+        )
+
+    def _set_time_intervals(
+        self, start_ns: int, step_ns: int, num_intervals: int
+    ):
+        self.start_ns = start_ns
+        self.step_ns = step_ns
+        self.num_intervals = num_intervals
+        self._time_intervals_index = None
+
+    def get_time_intervals(self) -> pd.DatetimeIndex:
+        """Getter for the time intervals, built from the start and step when first needed."""
+        if self._time_intervals_index is None:
+            self._time_intervals_index = pd.DatetimeIndex(
+                self.start_ns
+                + self.step_ns * np.arange(self.num_intervals, dtype=np.int64)
+            )
+        return self._time_intervals_index
 
-    def get_time_intervals(self) -> list[pd.Timestamp]:
-        """Getter for the list of time intervals."""
-        return self.time_intervals
+    def get_time_interval(self, time_interval_idx: int) -> pd.Timestamp:
+        """Returns the time interval with the given index."""
+        self.check_valid_idx(time_interval_idx)
+        return pd.Timestamp(self.start_ns + self.step_ns * time_interval_idx)
 
     def get_num_intervals(self) -> int:
         """Returns the amount of intervals in the object."""
-        return len(self.time_intervals)
+        return self.num_intervals
 
     def get_interval_index(self, interval) -> int:
         """Returns the index of the given interval."""
-        interval_idx = self.time_intervals.index(interval)
-        return interval_idx
+        offset_ns = pd.Timestamp(interval).value - self.start_ns
+        interval_idx, remainder = divmod(offset_ns, self.step_ns)
+        if (
+            remainder != 0
+            or interval_idx < 0
+            or interval_idx >= self.num_intervals
+        ):
+            raise Exception(f"Interval {interval} is not in the time series.")
+        return int(interval_idx)
 
     def get_aggregated(
         self, time_interval_idx: Optional[int] = None
@@ -158,18 +225,39 @@ class TimeSeries:
         self.check_valid_idx(time_interval_idx)
         return float(self.pdf[time_interval_idx])
 
-    def set_pdf(self, pdf: list[npt.NDArray[Any]]):
-        """Setter for the list of pdfs."""
-        self.pdf = pdf
+    def set_pdf(self, pdf: typing.Sequence[npt.NDArray[Any]]):
+        """Setter for the pdfs, one per interval."""
+        self.pdf = np.asarray(pdf, dtype=float)
 
-    def get_pdf_params(self, time_interval_idx: int) -> Any:
+    def get_pdf_params(self, time_interval_idx: int) -> dict[str, float]:
         """Getter for a specific pdf_params for the given time interval."""
         self.check_valid_idx(time_interval_idx)
-        return self.pdf_params[time_interval_idx]
+        return {
+            "mean": float(self.pdf_means[time_interval_idx]),
+            "std_dev": float(self.pdf_std_devs[time_interval_idx]),
+        }
+
+    def set_pdf_params(self, pdf_params: list[dict[str, Any]]):
+        """Setter for the pdf parameters, from a list with a dict for each interval."""
+        self.set_pdf_param_arrays(
+            [params.get("mean", np.nan) for params in pdf_params],
+            [params.get("std_dev", np.nan) for params in pdf_params],
+        )
 
-    def set_pdf_params(self, pdf_params: list[Any]):
-        """Setter for the list of pdf parameters."""
-        self.pdf_params = pdf_params
+    def get_pdf_means(self) -> npt.NDArray[np.float_]:
+        """Returns the means of the pdfs of all intervals."""
+        return self.pdf_means
+
+    def get_pdf_std_devs(self) -> npt.NDArray[np.float_]:
+        """Returns the standard deviations of the pdfs of all intervals."""
+        return self.pdf_std_devs
+
+    def set_pdf_param_arrays(
+        self, means: npt.ArrayLike, std_devs: npt.ArrayLike
+    ):
+        """Sets the pdf parameters, from arrays with the mean and standard deviation of each interval."""
+        self.pdf_means = np.asarray(means, dtype=float)
+        self.pdf_std_devs = np.asarray(std_devs, dtype=float)
 
     def get_num_samples(self, time_interval_idx: int) -> int:
         """Returns the number of samples aggregated for the given time interval."""
@@ -184,16 +272,18 @@ class TimeSeries:
         self, starting_interval: pd.Timestamp, unit: str, num_intervals: int
     ):
         """Sets up time intervals given the starting one, unit, and how many, as well as pre-allocating other arrays."""
-        self.time_intervals = [pd.Timestamp()] * num_intervals
-        for i in range(0, num_intervals):
-            self.time_intervals[i] = starting_interval + pd.Timedelta(
-                i, unit=unit  # type: ignore
-            )
+        self._set_time_intervals(
+            pd.Timestamp(starting_interval).value,
+            pd.to_timedelta(1, unit=unit).value,  # type: ignore
+            num_intervals,
+        )
 
-        self.aggregated = np.zeros(self.get_num_intervals(), dtype=int)
-        self.num_samples = np.zeros(self.get_num_intervals(), dtype=int)
-        self.pdf = [np.empty(1)] * self.get_num_intervals()
-        self.pdf_params = [{}] * self.get_num_intervals()
+        self.aggregated = np.zeros(num_intervals, dtype=int)
+        self.num_samples = np.zeros(num_intervals, dtype=int)
+        self.pdf = np.empty((num_intervals, 1))
+        self.set_pdf_param_arrays(
+            np.full(num_intervals, np.nan), np.full(num_intervals, np.nan)
+        )
 
     def aggregate(
         self,
@@ -209,22 +299,30 @@ class TimeSeries:
             starting_interval, interval_unit, num_intervals
         )
         print_and_log(
-            f"Last time interval: {self.time_intervals[len(self.time_intervals) - 1]}"
+            f"Last time interval: {self.get_time_interval(num_intervals - 1)}"
         )
 
-        # Go over all samples, adding their output to the corresponding position in the aggregated array.
-        total_num_samples = values.size
-        for sample_idx in range(0, total_num_samples):
-            # Calculate the interval for the current sample.
-            sample_time_interval = interval_generator.calculate_time_interval(
-                sample_idx
+        # Calculate the interval of all samples at once, and add up their outputs and counts per interval.
+        interval_indices = interval_generator.calculate_time_interval_indices()
+        if interval_indices.size > 0 and (
+            interval_indices.min() < 0
+            or interval_indices.max() >= num_intervals
+        ):
+            raise Exception(
+                "Samples fall outside of the time intervals, timestamps have to be sorted."
             )
-            # print(f"Sample: {sample_idx}, time interval: {sample_time_interval}")
-
-            # Update the aggregated sum and the number of samples.
-            interval_idx = self.get_interval_index(sample_time_interval)
-            self.aggregated[interval_idx] += values[sample_idx]
-            self.num_samples[interval_idx] += 1
+        values = np.asarray(values)
+        aggregated = np.bincount(
+            interval_indices,
+            weights=values.astype(np.float64),
+            minlength=num_intervals,
+        )
+        self.aggregated = (
+            aggregated.astype(int) if values.dtype.kind in "biu" else aggregated
+        )
+        self.num_samples = np.bincount(
+            interval_indices, minlength=num_intervals
+        )
 
         print_and_log("Finished aggregating.")
 
@@ -269,11 +367,14 @@ class TimeSeries:
     def to_dict(self) -> dict[str, Any]:
         """Returns the main attributes of this object as a dictionary."""
         dictionary = {
-            "time_intervals": self.time_intervals,
+            "time_intervals": list(self.get_time_intervals()),
             "aggregated": self.aggregated,
             "num_samples": self.num_samples,
             "pdf": self.pdf,
-            "pdf_params": self.pdf_params,
+            "pdf_params": [
+                self.get_pdf_params(time_interval_idx)
+                for time_interval_idx in range(self.get_num_intervals())
+            ],
         }
         return dictionary
 
@@ -297,8 +398,9 @@ def create_test_time_series(
         [np.random.randint(dist_start, dist_end, (dist_total))]
         * time_series.get_num_intervals()
     )
-    time_series.set_pdf_params(
-        [{"mean": 5, "std_dev": 3}] * time_series.get_num_intervals()
+    time_series.set_pdf_param_arrays(
+        np.full(time_series.get_num_intervals(), 5.0),
+        np.full(time_series.get_num_intervals(), 3.0),
     )
 
     return time_series
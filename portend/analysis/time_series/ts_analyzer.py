@@ -16,13 +16,20 @@
 
 from __future__ import annotations
 
+import copy
+import os
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Dict, Optional
 
+import numpy as np
+import numpy.typing as npt
+
 import portend.metrics.metric_loader as metric_loader
 from portend.analysis.predictions import ClassPredictions, Predictions
 from portend.analysis.time_series.timeseries import TimeSeries
 from portend.datasets.dataset import DataSet
+from portend.metrics.metric import MetricResult
 from portend.metrics.ts_metrics import TSMetric
 from portend.models.ts_model import TimeSeriesModel
 from portend.utils.logging import print_and_log
@@ -33,17 +40,16 @@ def analyze_ts(
     prediction_list: list[Predictions],
     ts_config: Optional[dict[str, Any]],
     metrics_config: Optional[list[dict[str, Any]]],
-) -> dict[int, dict[str, Any]]:
-    """Analyzes a timeseries data."""
+) -> dict[int, dict[int, dict[str, Any]]]:
+    """
+    Analyzes a timeseries data. Returns the results by interval of each dataset, keyed by the dataset position. With more than one dataset,
+    each one is analyzed in a separate process, all with the same time-series model.
+    """
     if ts_config is None:
         raise Exception("Time series configuration is missing.")
-
-    # Note that Time Series analysis only supports 1 dataset, will ignore the rest if any.
-    full_dataset = datasets[0]
-    predictions = typing.cast(ClassPredictions, prediction_list[0])
-    if len(datasets) > 1:
+    if len(datasets) != len(prediction_list):
         raise Exception(
-            "Time Series Analysis does not support more than 1 dataset."
+            f"Got {len(prediction_list)} predictions for {len(datasets)} datasets."
         )
 
     # Aggregate dataset and calculate original dataset classifier accuracy by time interval.
@@ -52,29 +58,86 @@ def analyze_ts(
     )
     if time_interval is None:
         raise Exception("Time interval configuration is missing.")
+
+    # Load the time-series model once, for all datasets.
+    try:
+        print_and_log("Time-series model loading.")
+        ts_model = TimeSeriesModel()
+        ts_model.load_from_file(typing.cast(str, ts_config.get("ts_model")))
+    except Exception as ex:
+        print_and_log(
+            f"WARNING: Could not load or run time-series model: {str(ex)}"
+        )
+        raise ex
+
+    if len(datasets) == 1:
+        return {
+            0: analyze_dataset_ts(
+                datasets[0].get_timestamps(copy=False),
+                typing.cast(ClassPredictions, prediction_list[0]),
+                ts_model,
+                time_interval,
+                metrics_config,
+            )
+        }
+
+    # Analyze each dataset in a process pool; each process gets the model once, and only the timestamps and predictions of each dataset.
+    num_workers = ts_config.get("num_workers")
+    num_workers = min(
+        int(num_workers) if num_workers else os.cpu_count() or 1,
+        len(datasets),
+    )
+    print_and_log(
+        f"Analyzing {len(datasets)} datasets with {num_workers} processes."
+    )
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_set_worker_ts_model,
+        initargs=(ts_model,),
+    ) as executor:
+        futures = [
+            executor.submit(
+                _analyze_dataset_ts_in_worker,
+                dataset.get_timestamps(copy=False),
+                _without_additional_data(predictions),
+                time_interval,
+                metrics_config,
+            )
+            for dataset, predictions in zip(datasets, prediction_list)
+        ]
+        return {
+            dataset_idx: future.result()
+            for dataset_idx, future in enumerate(futures)
+        }
+
+
+def analyze_dataset_ts(
+    timestamps: npt.NDArray[np.int_],
+    predictions: ClassPredictions,
+    ts_model: TimeSeriesModel,
+    time_interval: dict[str, Any],
+    metrics_config: Optional[list[dict[str, Any]]],
+) -> dict[int, dict[str, Any]]:
+    """Aggregates the predictions of a dataset by time interval, and calculates the accuracy and metrics for each interval."""
     time_series = TimeSeries()
     time_series.aggregate_by_timestamp(
         time_interval.get("starting_interval"),
         time_interval.get("interval_unit"),
         predictions.get_predictions(),
-        full_dataset.get_timestamps(),
+        timestamps,
     )
     accuracy = calculate_accuracy(predictions, time_series)
 
-    # Load and run time-series model on the aggregated data.
+    # Run time-series model on the aggregated data.
     ts_predictions = (
         None  # timeseries.create_test_time_series(0, 1000, 1001)    # TEST
     )
     try:
-        print_and_log("Time-series model loading and executing.")
-        ts_model = TimeSeriesModel()
-        ts_model.load_from_file(typing.cast(str, ts_config.get("ts_model")))
+        print_and_log("Time-series model executing.")
         ts_predictions, _ = ts_model.predict(time_series)
         print_and_log("Time-series model finished running.")
     except Exception as ex:
-        print_and_log(
-            f"WARNING: Could not load or run time-series model: {str(ex)}"
-        )
+        print_and_log(f"WARNING: Could not run time-series model: {str(ex)}")
         raise ex
 
     # Calculate metrics and return combined results.
@@ -85,29 +148,48 @@ def analyze_ts(
     return metric_results
 
 
+_worker_ts_model: Optional[TimeSeriesModel] = None
+"""Time-series model of a worker process, set once when it starts."""
+
+
+def _set_worker_ts_model(ts_model: TimeSeriesModel):
+    global _worker_ts_model
+    _worker_ts_model = ts_model
+
+
+def _analyze_dataset_ts_in_worker(
+    timestamps: npt.NDArray[np.int_],
+    predictions: ClassPredictions,
+    time_interval: dict[str, Any],
+    metrics_config: Optional[list[dict[str, Any]]],
+) -> dict[int, dict[str, Any]]:
+    """Analyzes a dataset in a worker process, with its time-series model."""
+    if _worker_ts_model is None:
+        raise Exception("Time-series model has not been set up in worker.")
+    return analyze_dataset_ts(
+        timestamps, predictions, _worker_ts_model, time_interval, metrics_config
+    )
+
+
+def _without_additional_data(predictions: Predictions) -> ClassPredictions:
+    """Returns a shallow copy of the predictions without their additional data, which time-series analysis does not use, to send it to other processes."""
+    light_predictions = typing.cast(ClassPredictions, copy.copy(predictions))
+    light_predictions.additional_data = {}
+    return light_predictions
+
+
 def calculate_accuracy(
     predictions: ClassPredictions, time_series: TimeSeries
 ) -> dict[int, Any]:
     """Calculates the accuracy of a classifier using time intervals defined in a time series."""
-    accuracy_by_interval: dict[int, Any] = {}
-    starting_sample_idx = 0
     print_and_log("Calculating accuracy by interval.")
-    for interval_index, _ in enumerate(time_series.get_time_intervals()):
-        # Calculate the size of this interval, and obtain a slice from the current idx of that size.
-        interval_sample_size = time_series.get_num_samples(interval_index)
-        predictions_slice = predictions.create_slice(
-            starting_sample_idx, interval_sample_size
-        )
-
-        # Calculate the accuracy of the slice and store it.
-        accuracy = None
-        if predictions_slice is not None:
-            accuracy = predictions_slice.calculate_accuracy()
-        accuracy_by_interval[interval_index] = accuracy
-
-        # Update the starting idx for next iteration.
-        starting_sample_idx += interval_sample_size
-
+    accuracies = predictions.calculate_accuracy_by_segment(
+        time_series.num_samples
+    )
+    accuracy_by_interval: dict[int, Any] = {
+        interval_index: None if np.isnan(accuracy) else float(accuracy)
+        for interval_index, accuracy in enumerate(accuracies)
+    }
     print_and_log("Finished calculating accuracy by interval.")
     return accuracy_by_interval
 
@@ -123,8 +205,66 @@ def calculate_metrics(
         return {}
 
     results: dict[int, dict[str, Any]] = {}
+    for interval_index, time_interval in enumerate(
+        time_series.get_time_intervals()
+    ):
+        results[interval_index] = {}
+        results[interval_index]["interval"] = time_interval.timestamp()
+        results[interval_index]["metrics"] = []
+
+    for metric_name, metric in load_metrics(
+        time_series, ts_predictions, metrics
+    ):
+        print_and_log(f"Calculating metric: {metric_name}")
+        all_results = _calculate_metric_for_all_intervals(metric_name, metric)
+        for interval_index in results.keys():
+            # Calculate metric for one interval, if it could not be calculated for all of them at once.
+            if all_results is None:
+                interval_results = calculate_interval_metrics(
+                    [(metric_name, metric)], interval_index
+                )
+            else:
+                interval_result = all_results[interval_index]
+                interval_results = (
+                    [interval_result.to_json()]
+                    if interval_result is not None
+                    else []
+                )
+
+            # Accumulate results.
+            results[interval_index]["metrics"].extend(interval_results)
+
+    return results
+
+
+def _calculate_metric_for_all_intervals(
+    metric_name: str, metric: TSMetric
+) -> Optional[list[Optional[MetricResult[Any]]]]:
+    """Calculates a metric for all intervals at once, if supported by it. Returns None if not, or if it failed, so that intervals are calculated one by one."""
+    try:
+        all_results = metric.calculate_metric_for_all_intervals()
+    except Exception as ex:
+        print_and_log(
+            f"WARNING: Could not calculate metric {metric_name} for all intervals at once, calculating them one by one: {str(ex)}"
+        )
+        return None
+
+    if all_results is not None:
+        for metric_results in all_results:
+            if metric_results is not None:
+                metric_results.metric_name = metric_name
+    return all_results
+
+
+def load_metrics(
+    time_series: TimeSeries,
+    ts_predictions: TimeSeries,
+    metrics: list[dict[str, Any]],
+) -> list[tuple[str, TSMetric]]:
+    """Loads the metrics for the given configs, working on the given time series and its predictions, together with their names."""
+    loaded_metrics: list[tuple[str, TSMetric]] = []
     for metric_info in metrics:
-        metric_name = metric_info.get("name")
+        metric_name = str(metric_info.get("name"))
         print_and_log(f"Loading metric: {metric_name}")
 
         metric_type = metric_loader.load_metric_type(metric_info)
@@ -136,32 +276,29 @@ def calculate_metrics(
                 config=metric_info,
             ),
         )
+        loaded_metrics.append((metric_name, metric))
+    return loaded_metrics
 
-        print_and_log(f"Calculating metric: {metric_name}")
-        for interval_index, time_interval in enumerate(
-            time_series.get_time_intervals()
-        ):
-            if interval_index not in results.keys():
-                results[interval_index] = {}
-                results[interval_index]["interval"] = time_interval.timestamp()
-                results[interval_index]["metrics"] = []
-
-            # Calculate metric.
-            try:
-                # print_and_log(f"Calculating metric for interval: {time_interval}")
-                metric.step_setup(interval_index)
-                metric_results = metric.calculate_metric()
-                metric_results.metric_name = metric_name
-            except Exception as ex:
-                print_and_log(
-                    f"WARNING: Could not prepare or calculate metric {metric_name} for interval {interval_index}: {str(ex)}"
-                )
-                continue
 
-            # Accumulate results.
-            results[interval_index]["metrics"].append(metric_results.to_json())
+def calculate_interval_metrics(
+    metrics: list[tuple[str, TSMetric]], interval_index: int
+) -> list[dict[str, Any]]:
+    """Calculates the given loaded metrics for one time interval, skipping the ones that fail."""
+    interval_results: list[dict[str, Any]] = []
+    for metric_name, metric in metrics:
+        try:
+            # print_and_log(f"Calculating metric for interval: {interval_index}")
+            metric.step_setup(interval_index)
+            metric_results = metric.calculate_metric()
+            metric_results.metric_name = metric_name
+        except Exception as ex:
+            print_and_log(
+                f"WARNING: Could not prepare or calculate metric {metric_name} for interval {interval_index}: {str(ex)}"
+            )
+            continue
 
-    return results
+        interval_results.append(metric_results.to_json())
+    return interval_results
 
 
 def add_accuracy(
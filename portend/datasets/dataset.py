@@ -16,17 +16,58 @@
 
 from __future__ import annotations
 
+import hashlib
 import typing
-from typing import Any, Dict, Optional
+import weakref
+from typing import Any, Dict, Iterator, Optional
 
 import numpy as np
 import numpy.typing as npt
 import pandas as pd
 
+from portend.datasets.post_process_cache import PostProcessCache, get_cache_key
 from portend.utils import dataframe_helper
 from portend.utils import files as file_utils
 from portend.utils.typing import SequenceLike
 
+
+def read_only_view(array: npt.NDArray[Any]) -> npt.NDArray[Any]:
+    """Returns a view of the array that can't be modified, so shared data is not changed by accident."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def fingerprint_ids(ids: SequenceLike) -> str:
+    """Returns a hash of the given ids, in order."""
+    str_ids = [str(sample_id) for sample_id in ids]
+    hasher = hashlib.sha256(str(len(str_ids)).encode("utf-8"))
+    hasher.update("\n".join(str_ids).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class DataBatch:
+    """A slice of consecutive samples of a dataset, with aligned ids, model inputs, model output, and requested columns."""
+
+    def __init__(
+        self,
+        start: int,
+        ids: npt.NDArray[Any],
+        inputs: Optional[list[SequenceLike]],
+        output: Optional[SequenceLike],
+        columns: dict[str, npt.NDArray[Any]],
+    ):
+        """Inits the batch. start is the position of its first sample in the whole dataset."""
+        self.start = start
+        self.ids = ids
+        self.inputs = inputs
+        self.output = output
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
 ############################
 # DataSet class.
 ############################
@@ -47,6 +88,27 @@ class DataSet:
     input_key: Optional[str] = None
     output_key: Optional[str] = None
 
+    # Lazily built hash index from ids to positions, and the dataframe and key it was built for.
+    _id_index: Optional[pd.Index] = None
+    _id_index_positions: Optional[npt.NDArray[np.int_]] = None
+    _id_index_source: Optional[
+        tuple[weakref.ref[pd.DataFrame], str, int]
+    ] = None
+
+    # Version of the data derived by post_process(). Has to be increased when that changes, to invalidate cached arrays.
+    POST_PROCESS_VERSION = 1
+
+    # Names of the arrays post_process() gets with get_post_processed_array(), and the columns only used to build them. When
+    # the post-process cache is enabled, those columns are not kept, and not even loaded if all the arrays are cached.
+    POST_PROCESSED_ARRAYS: list[str] = []
+    POST_PROCESS_SOURCE_COLUMNS: list[str] = []
+
+    # Cache for arrays derived when post-processing, only set while loading from a file if a cache folder is configured.
+    post_process_cache: Optional[PostProcessCache] = None
+
+    # File the data was loaded from, set before post-processing, so post_process() can find files stored next to it.
+    dataset_filename: Optional[str] = None
+
     ############################
     # ID methods.
     ############################
@@ -54,17 +116,72 @@ class DataSet:
     def set_id_key(self, ids_key: str):
         """Sets the id key."""
         self.id_key = ids_key
-
-    def get_ids(self) -> npt.NDArray[Any]:
-        """Returns the dataset ids."""
-        return np.array(self.dataframe[self.id_key])
+        self.invalidate_id_index()
+
+    def get_ids(self, copy: bool = True) -> npt.NDArray[Any]:
+        """Returns the dataset ids. If copy is false, returns a read-only view of them instead of a copy."""
+        return self.get_column(self.id_key, copy)
+
+    def invalidate_id_index(self):
+        """Discards the id index, so that it is rebuilt on next use. Only needed if ids are modified in place."""
+        self._id_index = None
+        self._id_index_positions = None
+        self._id_index_source = None
+
+    def _get_id_index(self) -> pd.Index:
+        """Returns the hash index of ids, building it if the dataframe, id key or number of samples changed."""
+        source = self._id_index_source
+        if (
+            self._id_index is None
+            or source is None
+            or source[0]() is not self.dataframe
+            or source[1] != self.id_key
+            or source[2] != len(self.dataframe.index)
+        ):
+            id_index = pd.Index(self.dataframe[self.id_key])
+            if id_index.is_unique:
+                self._id_index_positions = None
+            else:
+                # Keep only the first position of repeated ids.
+                first_ids = ~id_index.duplicated(keep="first")
+                self._id_index_positions = np.flatnonzero(first_ids)
+                id_index = id_index[first_ids]
+            self._id_index = id_index
+            self._id_index_source = (
+                weakref.ref(self.dataframe),
+                self.id_key,
+                len(self.dataframe.index),
+            )
+        return self._id_index
 
     def get_id_position(self, id_to_find: str) -> int:
         """Gets the position of a given id"""
-        position_info = np.where(self.get_ids() == id_to_find)
-        if len(position_info[0]) == 0:
+        try:
+            position = self._get_id_index().get_loc(id_to_find)
+        except KeyError:
             raise Exception(f"Id {id_to_find} not found")
-        return int(position_info[0][0])
+        if self._id_index_positions is not None:
+            position = self._id_index_positions[position]
+        return int(position)
+
+    def get_positions_by_ids(
+        self, ids_to_find: SequenceLike
+    ) -> npt.NDArray[np.int_]:
+        """Gets the positions of all the given ids, in the same order."""
+        positions = self._get_id_index().get_indexer(ids_to_find)
+        missing = positions < 0
+        if np.any(missing):
+            missing_ids = np.asarray(ids_to_find)[missing]
+            raise Exception(
+                f"{len(missing_ids)} ids not found, first one: {missing_ids[0]}"
+            )
+        if self._id_index_positions is not None:
+            positions = self._id_index_positions[positions]
+        return positions
+
+    def get_ids_fingerprint(self) -> str:
+        """Returns a hash of all ids in their current order, to check that positions into this dataset are still valid."""
+        return fingerprint_ids(self.dataframe[self.id_key])
 
     ############################
     # Timestamp methods.
@@ -74,9 +191,9 @@ class DataSet:
         """Sets the timestamps key."""
         self.timestamp_key = timestamps_key
 
-    def get_timestamps(self) -> npt.NDArray[np.int_]:
-        """Returns the timestamps, as Unix timestamps."""
-        return np.array(self.dataframe[self.timestamp_key])
+    def get_timestamps(self, copy: bool = True) -> npt.NDArray[np.int_]:
+        """Returns the timestamps, as Unix timestamps. If copy is false, returns a read-only view of them instead of a copy."""
+        return self.get_column(self.timestamp_key, copy)
 
     def set_timestamps(self, timestamps: npt.NDArray[np.int_]):
         """Sets the timestamps, as Unix timestamps."""
@@ -103,11 +220,16 @@ class DataSet:
         """Returns a sample associated to this id as a dictionary."""
         if position < self.get_number_of_samples():
             return typing.cast(
-                Dict[str, Any], self.dataframe.loc[position].to_dict()
+                Dict[str, Any], self.dataframe.iloc[position].to_dict()
             )
         else:
             return {}
 
+    def get_samples_by_ids(self, ids_to_find: SequenceLike) -> pd.DataFrame:
+        """Returns a dataframe with the samples for the given ids, in the same order, gathered in one operation."""
+        positions = self.get_positions_by_ids(ids_to_find)
+        return self.dataframe.take(positions).reset_index(drop=True)
+
     def set_samples(self, samples: list[dict[str, Any]]):
         """Sets the given samples."""
         if len(samples) > 0:
@@ -120,18 +242,41 @@ class DataSet:
         """Gets the samples."""
         return self.dataframe.to_dict("records")
 
+    def set_columns(self, columns: dict[str, SequenceLike]):
+        """Sets the samples from a dict with the values of each column, without building a dict per sample."""
+        self.dataframe = pd.DataFrame(columns)
+
+    def get_column(self, key: str, copy: bool = False) -> npt.NDArray[Any]:
+        """Returns the values of a column. By default, this is a read-only view of the data in the dataset, so it must be copied
+        to be modified. If copy is true, a new array that can be modified is returned instead.
+        """
+        if copy:
+            return np.array(self.dataframe[key])
+        return read_only_view(self.dataframe[key].to_numpy())
+
+    def get_columns(
+        self, keys: Optional[list[str]] = None, copy: bool = False
+    ) -> dict[str, npt.NDArray[Any]]:
+        """Returns the values of the given columns, or all of them, with the same copy semantics as get_column()."""
+        if keys is None:
+            keys = list(self.dataframe.columns)
+        return {key: self.get_column(key, copy) for key in keys}
+
     ########################################
     # Setup and dataframe serialization.
     ########################################
 
-    def as_dataframe(self, only_ids: bool = False) -> pd.DataFrame:
-        """Returns the dataset as as dataframe."""
+    def as_dataframe(
+        self, only_ids: bool = False, copy: bool = True
+    ) -> pd.DataFrame:
+        """Returns the dataset as as dataframe. If copy is false, the dataframe shares the data of the dataset: columns can be
+        added or replaced in it, but values must not be modified in place."""
         if only_ids:
             # If this option is selected, we only want to return ids, so we drop everything else.
             columns = {self.id_key: self.dataframe[self.id_key]}
             dataset_df = pd.DataFrame().assign(**columns)
         else:
-            dataset_df = self.dataframe.copy(deep=True)
+            dataset_df = self.dataframe.copy(deep=copy)
 
         return dataset_df
 
@@ -144,14 +289,16 @@ class DataSet:
         print(self.dataframe.head(1))
 
     # May be overriden if derived dataset has extra data attributes.
-    def clone(self, cloned_dataset: DataSet) -> DataSet:
-        """Clones into the provided dataset."""
+    def clone(self, cloned_dataset: DataSet, deep: bool = True) -> DataSet:
+        """Clones into the provided dataset. If deep is false, the clone shares the data of this dataset, with the same rules
+        as as_dataframe() without copy: only whole columns can be set in the clone.
+        """
         cloned_dataset.id_key = self.id_key
         cloned_dataset.timestamp_key = self.timestamp_key
         cloned_dataset.input_key = self.input_key
         cloned_dataset.output_key = self.output_key
 
-        cloned_dataset.from_dataframe(self.as_dataframe())
+        cloned_dataset.from_dataframe(self.as_dataframe(copy=deep))
         return cloned_dataset
 
     ###############################
@@ -165,28 +312,89 @@ class DataSet:
         convert_to_timestamp: Optional[
             typing.Callable[[SequenceLike], npt.NDArray[np.int_]]
         ] = None,
+        select_rows: Optional[
+            typing.Callable[[DataSet], npt.NDArray[np.int_]]
+        ] = None,
+        run_post_process: bool = True,
     ):
         """Loads ids and times from a JSON file into this object. Stores the rest as a dataframe.
         convert_to_timestamp should be a function that converts from whatever format the dataset has its datetime,
-        to Unix timestamp."""
+        to Unix timestamp.
+        select_rows can be a function that receives this dataset with the raw file data, and returns the positions of the only rows to keep.
+        run_post_process can be set to false to skip post-processing, if the data will only be used to build other datasets.
+        """
         if dataset_filename is None:
             raise Exception("Can't load data from file, no filename provided")
 
         # Load all keys. Input and Output keys can be None by default.
-        self.id_key = dataset_config.get(
-            "dataset_id_key", DataSet.DEFAULT_ID_KEY
-        )
-        self.timestamp_key = dataset_config.get(
-            "dataset_timestamp_key", DataSet.DEFAULT_TIMESTAMP_KEY
+        self.load_keys(dataset_config)
+
+        # Derived arrays are only cached for whole files, since selected rows may change between loads.
+        cache_dir = dataset_config.get("dataset_cache_dir")
+        post_process_cache = (
+            PostProcessCache(
+                cache_dir,
+                get_cache_key(
+                    dataset_filename,
+                    f"{type(self).__module__}.{type(self).__qualname__}",
+                    self.POST_PROCESS_VERSION,
+                    dataset_config,
+                    cache_dir,
+                ),
+            )
+            if run_post_process
+            and cache_dir is not None
+            and select_rows is None
+            else None
         )
-        self.input_key = dataset_config.get("dataset_input_key")
-        self.output_key = dataset_config.get("dataset_output_key")
 
-        # Load from file.
-        dataset_df = dataframe_helper.load_dataframe_from_file(dataset_filename)
+        # Load from file, skipping the columns only used to build derived arrays, if these are already cached.
+        excluded_columns = (
+            self.POST_PROCESS_SOURCE_COLUMNS
+            if post_process_cache is not None
+            and len(self.POST_PROCESS_SOURCE_COLUMNS) > 0
+            and post_process_cache.has_arrays(self.POST_PROCESSED_ARRAYS)
+            else []
+        )
+        dataset_df = dataframe_helper.load_dataframe_from_file(
+            dataset_filename, excluded_columns
+        )
         self.from_dataframe(dataset_df)
+        self.dataset_filename = dataset_filename
+
+        # Only keep the selected rows, if a selection was given, before doing any further processing.
+        if select_rows is not None:
+            selected_positions = select_rows(self)
+            self.dataframe = self.dataframe.take(
+                selected_positions
+            ).reset_index(drop=True)
+            print(
+                f"Selected {len(self.dataframe.index)} rows out of {len(dataset_df.index)}",
+                flush=True,
+            )
+            del dataset_df
+
+        self.setup_timestamps(convert_to_timestamp)
+        print("Done setting up keys and timestamps", flush=True)
 
-        # Set up timestamps, cleaning up null ones and converting it to specified internal format if needed.
+        # Call optional post process function, if needed to process loaded data.
+        if run_post_process:
+            self.post_process_cache = post_process_cache
+            self.post_process(dataset_config)
+
+            # Once the derived arrays are cached, the columns they were built from are not needed, same as when loading them from the cache.
+            if post_process_cache is not None:
+                self.dataframe = self.dataframe.drop(
+                    columns=self.POST_PROCESS_SOURCE_COLUMNS, errors="ignore"
+                )
+
+    def setup_timestamps(
+        self,
+        convert_to_timestamp: Optional[
+            typing.Callable[[SequenceLike], npt.NDArray[np.int_]]
+        ] = None,
+    ):
+        """Set up timestamps, if any, converting them to the internal format with the given function if needed."""
         try:
             if self.has_timestamps():
                 if convert_to_timestamp is None:
@@ -203,21 +411,66 @@ class DataSet:
                 f"Could not setup timestamps from dataset: {type(ex).__name__}: {str(ex)}"
             )
 
-        print("Done setting up keys and timestamps", flush=True)
+    def load_keys(self, dataset_config: dict[str, Any]):
+        """Loads the id, timestamp, input and output keys from the dataset config."""
+        self.id_key = dataset_config.get(
+            "dataset_id_key", DataSet.DEFAULT_ID_KEY
+        )
+        self.timestamp_key = dataset_config.get(
+            "dataset_timestamp_key", DataSet.DEFAULT_TIMESTAMP_KEY
+        )
+        self.input_key = dataset_config.get("dataset_input_key")
+        self.output_key = dataset_config.get("dataset_output_key")
 
-        # Call optional post process function, if needed to process loaded data.
-        self.post_process(dataset_config)
+    @classmethod
+    def iter_file_batches(
+        cls,
+        dataset_filename: str,
+        dataset_config: dict[str, Any],
+        batch_size: int,
+        columns: Optional[list[str]] = None,
+        chunk_size: int = dataframe_helper.DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[DataBatch]:
+        """Yields batches of a dataset file without loading it whole, reading and post-processing it in chunks of chunk_size rows.
+        Batch start positions are relative to the whole file, and batches never span two chunks.
+        """
+        chunk_start = 0
+        for chunk_df in dataframe_helper.iter_dataframe_chunks(
+            dataset_filename, chunk_size
+        ):
+            chunk_dataset = cls()
+            chunk_dataset.load_keys(dataset_config)
+            chunk_dataset.from_dataframe(chunk_df.reset_index(drop=True))
+            chunk_dataset.dataset_filename = dataset_filename
+            chunk_dataset.setup_timestamps()
+            chunk_dataset.post_process(dataset_config)
+            for batch in chunk_dataset.iter_batches(batch_size, columns):
+                batch.start += chunk_start
+                yield batch
+            chunk_start += len(chunk_df.index)
 
     # May be optionally overriden to post-process data.
     def post_process(self, dataset_config: dict[str, Any]):
         """Only needs ot be extended if there is post-processing that is needed after loading from a file."""
         return
 
-    def save_to_file(self, output_filename: str):
-        """Stores Numpy arrays with a dataset into a JSON file."""
+    def get_post_processed_array(
+        self, name: str, build: typing.Callable[[], npt.NDArray[Any]]
+    ) -> npt.NDArray[Any]:
+        """To be used in post_process() for expensive derived arrays. Builds the array with the given function, or, if
+        the post-process cache is enabled, reopens it memory-mapped and read-only from a previous load of the same file.
+        """
+        if self.post_process_cache is None:
+            return build()
+        return self.post_process_cache.get_array(name, build)
+
+    def save_to_file(self, output_filename: str, compact: bool = False):
+        """Stores Numpy arrays with a dataset into a file, JSON by default. Compact JSON has no indentation."""
         file_utils.create_folder_for_file(output_filename)
-        dataset_df = self.as_dataframe()
-        dataframe_helper.save_dataframe_to_file(dataset_df, output_filename)
+        dataset_df = self.as_dataframe(copy=False)
+        dataframe_helper.save_dataframe_to_file(
+            dataset_df, output_filename, compact
+        )
 
     ###############################
     # Model input/output methods.
@@ -241,18 +494,76 @@ class DataSet:
                 "Input key has not been set, can't return model input."
             )
 
+    # Should be overriden together with get_model_inputs().
+    def get_model_inputs_slice(
+        self, start: int, stop: int
+    ) -> Optional[list[SequenceLike]]:
+        """Returns the same inputs as get_model_inputs(), but only for the samples in the given range of positions, or None if there are no inputs."""
+        if self.input_key is not None:
+            if self.input_key not in self.dataframe:
+                raise Exception(
+                    f"Model input key '{self.input_key}' is not in dataset."
+                )
+            return [np.array(self.dataframe[self.input_key].iloc[start:stop])]
+        else:
+            return None
+
+    def get_model_output_slice(
+        self, start: int, stop: int
+    ) -> Optional[SequenceLike]:
+        """Returns the same output as get_model_output(), but only for the samples in the given range of positions, or None if there is no output."""
+        if self.output_key is not None:
+            if self.output_key not in self.dataframe:
+                raise Exception(
+                    f"Model output key '{self.output_key}' is not in dataset."
+                )
+            return np.array(
+                list(self.dataframe[self.output_key].iloc[start:stop])
+            )
+        else:
+            return None
+
+    def get_batch(
+        self, start: int, stop: int, columns: Optional[list[str]] = None
+    ) -> DataBatch:
+        """Returns the samples in the given range of positions as a batch, including the given columns."""
+        batch_df = self.dataframe.iloc[start:stop]
+        return DataBatch(
+            start,
+            np.array(batch_df[self.id_key]),
+            self.get_model_inputs_slice(start, stop),
+            self.get_model_output_slice(start, stop),
+            {column: np.array(batch_df[column]) for column in columns or []},
+        )
+
+    def iter_batches(
+        self, batch_size: int, columns: Optional[list[str]] = None
+    ) -> Iterator[DataBatch]:
+        """Yields consecutive batches of up to batch_size samples, with aligned ids, model inputs, model output, and the given columns."""
+        if batch_size <= 0:
+            raise RuntimeError(f"Invalid batch size: {batch_size}")
+        num_samples = self.get_number_of_samples()
+        for start in range(0, num_samples, batch_size):
+            yield self.get_batch(
+                start, min(start + batch_size, num_samples), columns
+            )
+
     def set_model_output_key(self, output_key: Optional[str]):
         """Sets the output key to be used."""
         self.output_key = output_key
 
-    def get_model_output(self) -> SequenceLike:
-        """Has to return a numpy array with the output."""
+    def get_model_output(self, copy: bool = True) -> SequenceLike:
+        """Has to return a numpy array with the output. If copy is false, numeric outputs are returned as a read-only view."""
         if self.output_key is not None:
             if self.output_key not in self.dataframe:
                 raise Exception(
                     f"Model output key '{self.output_key}' is not in dataset."
                 )
-            return np.array(list(self.dataframe[self.output_key]))
+            output_column = self.dataframe[self.output_key]
+            if copy or output_column.dtype == object:
+                # Outputs made of objects (e.g., lists or strings) need to be converted to a proper array.
+                return np.array(list(output_column))
+            return self.get_column(self.output_key)
         else:
             raise Exception(
                 "Output key has not been set, can't return model output."
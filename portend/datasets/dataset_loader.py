@@ -51,14 +51,9 @@ def load_dataset(
         dataset_instance.load_from_file(dataset_filename, dataset_config)
         return dataset_instance
     else:
-        # First load the base dataset, which should be larger but contains the complete samples we need (and more).
-        base_dataset: DataSet = dataset_class()
-        base_dataset.load_from_file(dataset_file_base, dataset_config)
-
-        # Now create a real, reconstructed dataset from the full samples in the base_dataset and the references in the dataset_filename reference dataset file.
         reconstructed_dataset = _load_full_from_ref_and_base(
             ref_dataset_file=dataset_filename,
-            base_dataset=base_dataset,
+            base_dataset_file=dataset_file_base,
             output_dataset_class=dataset_class,
             dataset_config=dataset_config,
         )
@@ -67,11 +62,11 @@ def load_dataset(
 
 def _load_full_from_ref_and_base(
     ref_dataset_file: Optional[str],
-    base_dataset: DataSet,
+    base_dataset_file: str,
     output_dataset_class: type,
     dataset_config: dict[str, Any],
 ) -> DataSet:
-    """Given a base dataset and a file with a references to samples there, combine them into a reconstructed one."""
+    """Given a base dataset file and a file with a references to samples there, combine them into a reconstructed one."""
     if ref_dataset_file is None:
         raise Exception("Can't load reference dataset, no filename provided")
 
@@ -80,6 +75,17 @@ def _load_full_from_ref_and_base(
     reference_dataset = RefDataSet()
     reference_dataset.load_from_file(ref_dataset_file, dataset_config)
 
+    # Then load the base dataset, which should be larger but contains the complete samples we need (and more).
+    # Only the referenced samples are kept, and they are not post-processed, since the reconstructed dataset will be.
+    print("Loading referenced samples from base dataset...", flush=True)
+    base_dataset: DataSet = output_dataset_class()
+    base_dataset.load_from_file(
+        base_dataset_file,
+        dataset_config,
+        select_rows=reference_dataset.select_base_rows,
+        run_post_process=False,
+    )
+
     # Now create a new, reconstructed dataset by getting the full data for each sample from their reference and the actual data in the base dataset.
     print("Creating full dataset from both...", flush=True)
     reconstructed_dataset = reference_dataset.create_from_reference(
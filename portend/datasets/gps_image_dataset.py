@@ -19,6 +19,7 @@ from __future__ import annotations
 from typing import Any, Optional
 
 from portend.datasets.image_dataset import ImageDataSet
+from portend.datasets.image_store import DEFAULT_NUM_WORKERS
 from portend.utils import exif_gps
 
 
@@ -27,6 +28,8 @@ class GPSImageDataSet(ImageDataSet):
 
     DEFAULT_COORDINATES_KEY = "coordinates"
 
+    HAS_FILE_METADATA = True
+
     # Overriden.
     @classmethod
     def create_dataset_from_folder(
@@ -35,25 +38,28 @@ class GPSImageDataSet(ImageDataSet):
         extensions: Optional[list[str]] = [],
         fields: Optional[dict[str, Any]] = {},
         existing_data: Optional[str] = "",
+        metadata_cache_file: Optional[str] = None,
+        num_workers: int = DEFAULT_NUM_WORKERS,
     ):
-        """Creates a JSON file with the expected ImageDataSet format for all images in a given folder."""
+        """Creates a JSON file with the expected ImageDataSet format for all images in a given folder, with their GPS coordinates."""
         print(f"Creating GPSImageDataset dataset from folder {image_folder}")
-        image_dataset: ImageDataSet = super().create_dataset_from_folder(
-            image_folder, extensions, fields, existing_data
+        return super().create_dataset_from_folder(
+            image_folder,
+            extensions,
+            fields,
+            existing_data,
+            metadata_cache_file,
+            num_workers,
         )
 
-        # Go over each sample, load their EXIF GPS data, and update the sample with the coordinates.
-        new_samples = []
-        for sample in image_dataset.get_samples():
-            path = sample[cls.DEFAULT_IMAGE_PATH_KEY]
-            coordinates = exif_gps.get_exif_gps_decimal_coordinates(path)
-
-            # Default to 0,0
-            if len(coordinates) == 0:
-                coordinates = [0, 0]
+    # Overriden.
+    @classmethod
+    def get_file_metadata(cls, image_file_path: str) -> dict[str, Any]:
+        """Loads the EXIF GPS data of the image file, as its coordinates."""
+        coordinates = exif_gps.get_exif_gps_decimal_coordinates(image_file_path)
 
-            sample.update({cls.DEFAULT_COORDINATES_KEY: coordinates})
-            new_samples.append(sample)
+        # Default to 0,0
+        if len(coordinates) == 0:
+            coordinates = [0, 0]
 
-        image_dataset.set_samples(new_samples)
-        return image_dataset
+        return {cls.DEFAULT_COORDINATES_KEY: coordinates}
@@ -19,15 +19,30 @@ from __future__ import annotations
 import json
 import os
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Optional, Type
 
-import cv2
 import numpy.typing as npt
 from natsort import natsorted
 
 from portend.datasets import dataset
 from portend.datasets.dataset_loader import load_dataset_class
+from portend.datasets.image_shards import (
+    DEFAULT_MAX_SHARD_MB,
+    ImageShards,
+    get_shards_name,
+    has_image_shards,
+    remove_image_shards,
+    write_image_shards,
+)
+from portend.datasets.image_store import (
+    BYTES_IN_MB,
+    DEFAULT_NUM_WORKERS,
+    ImageStore,
+    write_images,
+)
+from portend.utils.metadata_cache import FileMetadataCache
 
 DEFAULT_EXTENSIONS = [".png", ".jpg", ".tif", ".tiff"]
 DEFAULT_IMAGE_DATASET_CLASS = "portend.datasets.image_dataset.ImageDataSet"
@@ -51,6 +66,8 @@ def create_image_dataset_to_file(
     fields: Optional[dict[str, Any]] = {},
     existing_data: Optional[str] = "",
     json_file: Optional[str] = None,
+    metadata_cache_file: Optional[str] = None,
+    num_workers: Optional[int] = None,
 ):
     """Creates an image dataset from a config and stores it to a file."""
     if image_folder is None:
@@ -65,6 +82,8 @@ def create_image_dataset_to_file(
         extensions,
         fields,
         existing_data,
+        metadata_cache_file,
+        num_workers if num_workers is not None else DEFAULT_NUM_WORKERS,
     )
 
     # Finally, store dataset info to JSON file.
@@ -76,19 +95,41 @@ def create_image_dataset_to_file(
     dataset.save_to_file(output_filepath, save_images=False)
 
 
+class ImageDataBatch(dataset.DataBatch):
+    """A batch of samples of an image dataset, which also has their images."""
+
+    def __init__(
+        self, batch: dataset.DataBatch, images: list[npt.NDArray[Any]]
+    ):
+        """Inits from the basic batch for the same samples."""
+        super().__init__(
+            batch.start, batch.ids, batch.inputs, batch.output, batch.columns
+        )
+        self.images = images
+
+
 class ImageDataSet(dataset.DataSet):
     """A dataset for handling a list of images."""
 
     DEFAULT_IMAGE_FOLDER = "."
     DEFAULT_IMAGE_PATH_KEY = "image_path"
     DEFAULT_DATASET_FILENAME = "dataset.json"
+    IMAGES_PER_WORKER_IN_BATCH = 16
+    IMAGE_STORAGE_FILES = "files"
+    IMAGE_STORAGE_SHARDS = "shards"
+
+    # Whether get_file_metadata() is implemented, to extract data for each sample from its image file.
+    HAS_FILE_METADATA = False
 
     def __init__(self, image_folder: str = DEFAULT_IMAGE_FOLDER):
         """Inits, receives output folder for images."""
         self.image_path_key: str = ImageDataSet.DEFAULT_IMAGE_PATH_KEY
         self.image_folder = image_folder
-        self.image_list: list[npt.NDArray[Any]] = []
+        self.image_list: ImageStore = ImageStore()
         self.image_names: list[str] = []
+        self.num_workers: int = DEFAULT_NUM_WORKERS
+        self.image_storage = ImageDataSet.IMAGE_STORAGE_FILES
+        self.max_shard_bytes = DEFAULT_MAX_SHARD_MB * BYTES_IN_MB
 
     def set_image_folder(self, image_folder: Optional[str]):
         self.image_folder = (
@@ -97,41 +138,100 @@ class ImageDataSet(dataset.DataSet):
             else ImageDataSet.DEFAULT_IMAGE_FOLDER
         )
 
+    def set_image_storage(
+        self,
+        image_storage: Optional[str],
+        max_shard_mb: Optional[float] = None,
+    ):
+        """Sets how images will be saved: as separate image files, or packed into shards of up to max_shard_mb."""
+        if image_storage is not None:
+            if image_storage not in [
+                ImageDataSet.IMAGE_STORAGE_FILES,
+                ImageDataSet.IMAGE_STORAGE_SHARDS,
+            ]:
+                raise RuntimeError(f"Invalid image storage: {image_storage}")
+            self.image_storage = image_storage
+        if max_shard_mb is not None:
+            self.max_shard_bytes = int(float(max_shard_mb) * BYTES_IN_MB)
+
     # Overriden
-    def clone_image_dataset(self, cloned_dataset: ImageDataSet) -> ImageDataSet:
-        """Clones into the provided dataset."""
+    def clone_image_dataset(
+        self, cloned_dataset: ImageDataSet, deep: bool = True
+    ) -> ImageDataSet:
+        """Clones into the provided dataset. Images are always shared copy-on-write, deep only applies to the rest of the data."""
         cloned_dataset = typing.cast(
-            ImageDataSet, super().clone(cloned_dataset)
+            ImageDataSet, super().clone(cloned_dataset, deep)
         )
         cloned_dataset.image_path_key = self.image_path_key
         cloned_dataset.image_folder = self.image_folder
-        cloned_dataset.image_list = (
-            self.image_list
-        )  # TODO: deep copy of this. Or does it waste too much space?
+        cloned_dataset.image_list = self.image_list.clone()
         cloned_dataset.image_names = self.image_names.copy()
+        cloned_dataset.num_workers = self.num_workers
+        cloned_dataset.image_storage = self.image_storage
+        cloned_dataset.max_shard_bytes = self.max_shard_bytes
         return cloned_dataset
 
     # Overriden.
     def post_process(self, dataset_config: dict[str, Any]):
-        """Loads the actual images from the filenames or folders indicated in the JSON file."""
-        # Goes over the paths and loads the actual images into a list.
+        """Sets up the images from the filenames or folders indicated in the JSON file. They are only decoded when first accessed."""
         self.image_path_key = dataset_config.get(
             "dataset_image_path_key", ImageDataSet.DEFAULT_IMAGE_PATH_KEY
         )
-        self.image_list = [
-            cv2.imread(img_file)
-            for img_file in self.dataframe[self.image_path_key]
-        ]
+        self.num_workers = int(
+            dataset_config.get("dataset_image_workers", DEFAULT_NUM_WORKERS)
+        )
+        image_paths = list(self.dataframe[self.image_path_key])
         self.image_names = [
-            str(Path(img_file).stem)
-            for img_file in self.dataframe[self.image_path_key]
+            str(Path(img_file).stem) for img_file in image_paths
         ]
 
-        # Assuming all images are in the same folder, set the image folder to the one of the first image (this is mostly informational only).
+        # Assuming all images are in the same folder, set the image folder to the one of the first image.
         if len(self.dataframe) > 0:
-            self.set_image_folder(
-                str(Path(self.dataframe[self.image_path_key][0]).parent)
+            self.set_image_folder(str(Path(image_paths[0]).parent))
+
+        # Goes over the paths and sets up a store that loads the actual images on demand, optionally capping the memory used.
+        # If the images of this dataset file were sharded, they are read from its shards by file name, instead of from the files themselves.
+        image_cache_mb = dataset_config.get("dataset_image_cache_mb")
+        max_bytes = (
+            int(float(image_cache_mb) * BYTES_IN_MB)
+            if image_cache_mb is not None
+            else None
+        )
+        shards_name = (
+            get_shards_name(self.dataset_filename)
+            if self.dataset_filename is not None
+            else None
+        )
+        if (
+            len(self.dataframe) > 0
+            and shards_name is not None
+            and has_image_shards(self.image_folder, shards_name)
+        ):
+            print(
+                f"Loading sharded images {shards_name} from {self.image_folder}"
+            )
+            image_shards = ImageShards(self.image_folder, shards_name)
+            self.image_list = ImageStore.from_keys(
+                [Path(img_file).name for img_file in image_paths],
+                image_shards.get_image,
+                max_bytes=max_bytes,
+                num_workers=self.num_workers,
             )
+            self.image_storage = ImageDataSet.IMAGE_STORAGE_SHARDS
+        else:
+            self.image_list = ImageStore.from_paths(
+                image_paths, max_bytes=max_bytes, num_workers=self.num_workers
+            )
+
+    # Overriden.
+    def get_batch(
+        self, start: int, stop: int, columns: Optional[list[str]] = None
+    ) -> ImageDataBatch:
+        """Returns the samples in the given range of positions as a batch, with their images decoded in parallel."""
+        return ImageDataBatch(
+            super().get_batch(start, stop, columns),
+            self.image_list.get_images(range(start, stop)),
+        )
 
     def set_images_from_list(
         self, images: list[npt.NDArray[Any]], image_names: list[str] = []
@@ -144,31 +244,70 @@ class ImageDataSet(dataset.DataSet):
                 f"Can't set images from list, lengths don't match: samples: {self.get_number_of_samples()}, images: {len(images)}, image names: {len(image_names)}"
             )
 
-        self.image_list = images
+        self.image_list = ImageStore.from_images(images)
         self.image_names = image_names
 
-        # Replace value of image path with the new ones from the list.
-        for i, _ in self.dataframe.iterrows():
-            i = typing.cast(int, i)
-            self.dataframe.at[i, self.image_path_key] = os.path.join(
-                self.image_folder, self.image_names[i]
-            )
+        # Replace the whole image path column with the new paths from the list.
+        self.dataframe[self.image_path_key] = [
+            os.path.join(self.image_folder, image_name)
+            for image_name in self.image_names
+        ]
 
     # Overriden.
-    def save_to_file(self, output_filename: str, save_images: bool = True):
-        """Saves dataset to JSON file, and images to configured folder."""
+    def save_to_file(
+        self,
+        output_filename: str,
+        compact: bool = False,
+        save_images: bool = True,
+    ):
+        """Saves dataset to JSON file, and images to configured folder, as separate files or as shards named after the dataset file."""
         # Call base to save the paths fo a JSON file.
-        super().save_to_file(output_filename)
+        super().save_to_file(output_filename, compact)
 
-        if save_images:
-            # Write the images to disk.
+        if (
+            save_images
+            and self.image_storage == ImageDataSet.IMAGE_STORAGE_SHARDS
+        ):
+            # Pack the images into shards, indexed by the file name in their path.
+            write_image_shards(
+                self.image_folder,
+                get_shards_name(output_filename),
+                [
+                    Path(img_file).name
+                    for img_file in self.dataframe[self.image_path_key]
+                ],
+                self.image_list,
+                self.max_shard_bytes,
+            )
+        elif save_images:
+            # Write the images to disk, encoding them in parallel, one batch at a time to limit decoded images in memory.
             os.makedirs(self.image_folder, exist_ok=True)
-            for i in range(len(self.image_list)):
-                cv2.imwrite(
-                    self.dataframe.loc[i][self.image_path_key],
-                    self.image_list[i],
+            image_paths = list(self.dataframe[self.image_path_key])
+            batch_size = max(
+                1, self.num_workers * ImageDataSet.IMAGES_PER_WORKER_IN_BATCH
+            )
+            for start, image_batch in zip(
+                range(0, len(self.image_list), batch_size),
+                self.image_list.iter_batches(batch_size),
+            ):
+                write_images(
+                    image_paths[start : start + len(image_batch)],
+                    image_batch,
+                    self.num_workers,
                 )
 
+            # Remove any shards written before for this dataset file, which would be loaded instead of the new files. This is done
+            # after writing the files, since the images may have been read from those shards.
+            remove_image_shards(
+                self.image_folder, get_shards_name(output_filename)
+            )
+
+    # May be overriden, together with HAS_FILE_METADATA, to add data extracted from each image file to its sample.
+    @classmethod
+    def get_file_metadata(cls, image_file_path: str) -> dict[str, Any]:
+        """Returns additional fields for the sample of the given image file. Has to be JSON serializable, to be cached."""
+        return {}
+
     @classmethod
     def create_dataset_from_folder(
         cls,
@@ -176,53 +315,133 @@ class ImageDataSet(dataset.DataSet):
         extensions: Optional[list[str]] = DEFAULT_EXTENSIONS,
         fields: Optional[dict[str, Any]] = {},
         existing_data: Optional[str] = "",
+        metadata_cache_file: Optional[str] = None,
+        num_workers: int = DEFAULT_NUM_WORKERS,
     ) -> ImageDataSet:
-        """Creates a JSON file with the expected ImageDataSet format for all images in a given folder."""
+        """Creates a JSON file with the expected ImageDataSet format for all images in a given folder.
+        If the class extracts metadata from each file and a metadata_cache_file is given, it is cached there, so that indexing
+        the folder again only extracts it from new or changed files. Without it, nothing is written.
+        """
         if image_folder is None:
             raise Exception("Did not receive image folder value")
         if extensions is None:
             extensions = DEFAULT_EXTENSIONS
 
-        # Get the files in the folder and structure their paths in a dict appropriate for the dataset.
+        # Scan the folder once, keeping the stats of each image file, and structure their paths in a dict appropriate for the dataset.
         print(f"Creating ImageDataset dataset from folder {image_folder}")
-        extensions_lower = [x.lower() for x in extensions]
-        files = natsorted(os.listdir(image_folder))
+        extensions_lower = {x.lower() for x in extensions}
+        excluded_path = (
+            os.path.abspath(metadata_cache_file)
+            if metadata_cache_file is not None
+            else None
+        )
+        with os.scandir(image_folder) as entries:
+            file_stats = {
+                entry.name: entry.stat()
+                for entry in entries
+                if entry.is_file()
+                and (
+                    len(extensions_lower) == 0
+                    or Path(entry.name).suffix.lower() in extensions_lower
+                )
+                and os.path.abspath(entry.path) != excluded_path
+            }
+        files = natsorted(file_stats.keys())
         file_paths = [os.path.join(image_folder, file) for file in files]
 
         samples = [
             {
-                dataset.DataSet.DEFAULT_ID_KEY: os.path.basename(
-                    image_file_path
-                ),
+                dataset.DataSet.DEFAULT_ID_KEY: file,
                 ImageDataSet.DEFAULT_IMAGE_PATH_KEY: image_file_path,
             }
-            for image_file_path in file_paths
-            if len(extensions) == 0
-            or Path(image_file_path).suffix.lower() in extensions_lower
+            for file, image_file_path in zip(files, file_paths)
         ]
 
         # Add additional fields, if any.
         if fields is not None and len(fields) > 0:
             for sample in samples:
-                for field_key, field_value in fields.items():
-                    sample.update({field_key: field_value})
+                sample.update(fields)
 
-        # Merge with existing data if any.
+        # Merge with existing data if any, finding each existing sample by id.
         if existing_data is not None and len(existing_data) > 0:
             with open(existing_data) as f:
-                data = json.load(f)
-                for sample in samples:
-                    for item in data:
-                        if (
-                            sample[dataset.DataSet.DEFAULT_ID_KEY]
-                            == item[dataset.DataSet.DEFAULT_ID_KEY]
-                        ):
-                            curr_data = item[dataset.DataSet.DEFAULT_ID_KEY]
-                            print(curr_data)
-                            for field_key, field_value in curr_data.items():
-                                sample.update({field_key: field_value})
+                existing_samples_by_id = {
+                    item[dataset.DataSet.DEFAULT_ID_KEY]: item
+                    for item in json.load(f)
+                }
+            for sample in samples:
+                existing_sample = existing_samples_by_id.get(
+                    sample[dataset.DataSet.DEFAULT_ID_KEY]
+                )
+                if existing_sample is not None:
+                    sample.update(existing_sample)
+
+        # Add metadata extracted from each file, if any.
+        if cls.HAS_FILE_METADATA:
+            files_metadata = cls._get_files_metadata(
+                file_paths,
+                [file_stats[file] for file in files],
+                metadata_cache_file,
+                num_workers,
+            )
+            for sample, file_metadata in zip(samples, files_metadata):
+                sample.update(file_metadata)
 
         # Create an image dataset with this.
-        image_dataset = ImageDataSet()
+        image_dataset = cls()
         image_dataset.set_samples(samples)
         return image_dataset
+
+    @classmethod
+    def _get_files_metadata(
+        cls,
+        file_paths: list[str],
+        file_stats: list[os.stat_result],
+        metadata_cache_file: Optional[str],
+        num_workers: int,
+    ) -> list[dict[str, Any]]:
+        """Returns the metadata of each file, from the cache if the file did not change, or extracting it in parallel threads."""
+        cache = (
+            FileMetadataCache(metadata_cache_file)
+            if metadata_cache_file is not None
+            else None
+        )
+        cache_keys = [os.path.abspath(path) for path in file_paths]
+        files_metadata: list[Optional[dict[str, Any]]] = [
+            (
+                cache.get(cache_key, stat.st_size, stat.st_mtime_ns)
+                if cache is not None
+                else None
+            )
+            for cache_key, stat in zip(cache_keys, file_stats)
+        ]
+
+        missing_positions = [
+            position
+            for position, file_metadata in enumerate(files_metadata)
+            if file_metadata is None
+        ]
+        print(
+            f"Extracting metadata from {len(missing_positions)} new or changed files, out of {len(file_paths)}"
+        )
+        with ThreadPoolExecutor(max_workers=max(1, num_workers)) as executor:
+            for position, file_metadata in zip(
+                missing_positions,
+                executor.map(
+                    cls.get_file_metadata,
+                    [file_paths[position] for position in missing_positions],
+                ),
+            ):
+                files_metadata[position] = file_metadata
+                if cache is not None:
+                    cache.set(
+                        cache_keys[position],
+                        file_stats[position].st_size,
+                        file_stats[position].st_mtime_ns,
+                        file_metadata,
+                    )
+
+        if cache is not None:
+            cache.keep_only(cache_keys)
+            cache.save()
+        return typing.cast(list[dict[str, Any]], files_metadata)
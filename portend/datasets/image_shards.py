@@ -0,0 +1,253 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import os
+import threading
+import typing
+from pathlib import Path
+from typing import Any, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from portend.datasets.image_store import (
+    BYTES_IN_MB,
+    DEFAULT_NUM_WORKERS,
+    write_images,
+)
+
+# Files are named after the dataset that owns them, so datasets can share an image folder.
+SHARDS_INDEX_FILENAME_FORMAT = "{}_image_shards.npz"
+SHARD_FILENAME_PREFIX_FORMAT = "{}_image_shard_"
+SHARD_FILENAME_SUFFIX = ".bin"
+SHARD_NUMBER_FORMAT = "{:05d}"
+TEMP_FILE_SUFFIX = ".tmp"
+DEFAULT_MAX_SHARD_MB = 256
+MAX_IMAGE_DIMS = 3
+EXPORT_BATCH_SIZE = 256
+
+# Keys of the arrays in the index file.
+NAMES_KEY = "names"
+SHARDS_KEY = "shards"
+OFFSETS_KEY = "offsets"
+SHAPES_KEY = "shapes"
+DTYPES_KEY = "dtypes"
+SHARD_FILES_KEY = "shard_files"
+
+
+def get_shards_name(dataset_filename: str) -> str:
+    """Returns the name of the shards of the images of the given dataset file, which is the name of the file without extension."""
+    return Path(dataset_filename).stem
+
+
+def has_image_shards(folder: str, name: str) -> bool:
+    """Checks if the given folder contains the sharded images with the given name."""
+    return os.path.isfile(
+        os.path.join(folder, SHARDS_INDEX_FILENAME_FORMAT.format(name))
+    )
+
+
+def remove_image_shards(folder: str, name: str):
+    """Removes the shards with the given name from the folder, index first, so images are read from loose files again."""
+    index_path = os.path.join(folder, SHARDS_INDEX_FILENAME_FORMAT.format(name))
+    if os.path.isfile(index_path):
+        os.remove(index_path)
+        print(f"Removed image shards {name} from {folder}")
+    _remove_shard_files(folder, name, used_shard_files=[])
+
+
+def _remove_shard_files(folder: str, name: str, used_shard_files: list[str]):
+    """Removes the shard files with the given name in the folder that are not in the given list."""
+    if not os.path.isdir(folder):
+        return
+    shard_prefix = SHARD_FILENAME_PREFIX_FORMAT.format(name)
+    for filename in os.listdir(folder):
+        if (
+            filename.startswith(shard_prefix)
+            and filename.endswith(SHARD_FILENAME_SUFFIX)
+            and filename[
+                len(shard_prefix) : -len(SHARD_FILENAME_SUFFIX)
+            ].isdigit()
+            and filename not in used_shard_files
+        ):
+            os.remove(os.path.join(folder, filename))
+
+
+def write_image_shards(
+    folder: str,
+    name: str,
+    names: list[str],
+    images: typing.Iterable[npt.NDArray[Any]],
+    max_shard_bytes: int = DEFAULT_MAX_SHARD_MB * BYTES_IN_MB,
+):
+    """
+    Writes the raw bytes of the images, one after the other, into shard files of up to max_shard_bytes, plus an index with the offset, shape and type of each image.
+    All files are named after the given shards name, and only replace previous shards with the same name.
+    Files are only replaced once all are written, so the images being written may come from the shards in the same folder.
+    """
+    os.makedirs(folder, exist_ok=True)
+    num_images = len(names)
+    shards = np.empty(num_images, dtype=np.int32)
+    offsets = np.empty(num_images, dtype=np.int64)
+    # Unused dimensions are marked with -1, since images may have dimensions of size 0.
+    shapes = np.full((num_images, MAX_IMAGE_DIMS), -1, dtype=np.int64)
+    dtypes: list[str] = []
+    shard_files: list[str] = []
+
+    shard_file = None
+    shard_size = 0
+    position = -1
+    try:
+        for position, image in enumerate(images):
+            image = np.ascontiguousarray(image)
+            if image.ndim > MAX_IMAGE_DIMS:
+                raise RuntimeError(
+                    f"Can't shard image {names[position]} with {image.ndim} dimensions."
+                )
+            if shard_file is None or (
+                shard_size > 0 and shard_size + image.nbytes > max_shard_bytes
+            ):
+                if shard_file is not None:
+                    shard_file.close()
+                shard_files.append(
+                    SHARD_FILENAME_PREFIX_FORMAT.format(name)
+                    + SHARD_NUMBER_FORMAT.format(len(shard_files))
+                    + SHARD_FILENAME_SUFFIX
+                )
+                shard_file = open(
+                    os.path.join(folder, shard_files[-1] + TEMP_FILE_SUFFIX),
+                    "wb",
+                )
+                shard_size = 0
+
+            shards[position] = len(shard_files) - 1
+            offsets[position] = shard_size
+            shapes[position, : image.ndim] = image.shape
+            dtypes.append(image.dtype.str)
+            shard_file.write(image.data)
+            shard_size += image.nbytes
+    finally:
+        if shard_file is not None:
+            shard_file.close()
+    if position + 1 != num_images:
+        raise RuntimeError(
+            f"Can't shard images, got {position + 1} images for {num_images} names."
+        )
+
+    for shard_filename in shard_files:
+        shard_path = os.path.join(folder, shard_filename)
+        os.replace(shard_path + TEMP_FILE_SUFFIX, shard_path)
+    index_path = os.path.join(folder, SHARDS_INDEX_FILENAME_FORMAT.format(name))
+    with open(index_path + TEMP_FILE_SUFFIX, "wb") as index_file:
+        np.savez(
+            index_file,
+            **{
+                NAMES_KEY: np.array(names, dtype=str),
+                SHARDS_KEY: shards,
+                OFFSETS_KEY: offsets,
+                SHAPES_KEY: shapes,
+                DTYPES_KEY: np.array(dtypes, dtype=str),
+                SHARD_FILES_KEY: np.array(shard_files, dtype=str),
+            },
+        )
+    os.replace(index_path + TEMP_FILE_SUFFIX, index_path)
+
+    # Remove shards left from previous writes with more shards, which the new index doesn't use.
+    _remove_shard_files(folder, name, used_shard_files=shard_files)
+    print(
+        f"Saved {num_images} images into {len(shard_files)} shards {name} in {folder}"
+    )
+
+
+class ImageShards:
+    """Read-only access to sharded images, by name or position, through memory-mapped shard files."""
+
+    def __init__(self, folder: str, name: str):
+        """Loads the index of the sharded images with the given name in the folder. Shards are mapped when first needed."""
+        self.folder = folder
+        self.name = name
+        with np.load(
+            os.path.join(folder, SHARDS_INDEX_FILENAME_FORMAT.format(name)),
+            allow_pickle=False,
+        ) as index:
+            self.names: list[str] = index[NAMES_KEY].tolist()
+            self._shards = index[SHARDS_KEY]
+            self._offsets = index[OFFSETS_KEY]
+            self._shapes = index[SHAPES_KEY]
+            self._dtypes = index[DTYPES_KEY]
+            self._shard_files: list[str] = index[SHARD_FILES_KEY].tolist()
+        self._position_by_name = {
+            name: position for position, name in enumerate(self.names)
+        }
+        self._mapped_shards: dict[int, npt.NDArray[np.uint8]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get_position(self, name: str) -> int:
+        """Returns the position of the image with the given name."""
+        if name not in self._position_by_name:
+            raise KeyError(f"Image {name} not found in shards in {self.folder}")
+        return self._position_by_name[name]
+
+    def get_image(self, name_or_position: Union[str, int]) -> npt.NDArray[Any]:
+        """Returns a read-only view of the image with the given name or position, directly over the mapped shard."""
+        position = (
+            self.get_position(name_or_position)
+            if isinstance(name_or_position, str)
+            else int(name_or_position)
+        )
+        shape = tuple(int(dim) for dim in self._shapes[position] if dim >= 0)
+        dtype = np.dtype(str(self._dtypes[position]))
+        num_bytes = int(np.prod(shape)) * dtype.itemsize
+        offset = int(self._offsets[position])
+        image_bytes = self._get_mapped_shard(int(self._shards[position]))[
+            offset : offset + num_bytes
+        ]
+        return image_bytes.view(dtype).reshape(shape)
+
+    def export_to_files(
+        self, output_folder: str, num_workers: int = DEFAULT_NUM_WORKERS
+    ):
+        """Writes each image as a separate file named as the image (e.g., a PNG), for tools that need loose image files."""
+        os.makedirs(output_folder, exist_ok=True)
+        for start in range(0, len(self), EXPORT_BATCH_SIZE):
+            positions = range(start, min(start + EXPORT_BATCH_SIZE, len(self)))
+            write_images(
+                [
+                    os.path.join(output_folder, self.names[position])
+                    for position in positions
+                ],
+                [self.get_image(position) for position in positions],
+                num_workers,
+            )
+        print(f"Exported {len(self)} images to {output_folder}")
+
+    def _get_mapped_shard(self, shard: int) -> npt.NDArray[np.uint8]:
+        """Returns the memory-mapped bytes of a shard, mapping it the first time."""
+        with self._lock:
+            if shard not in self._mapped_shards:
+                shard_path = os.path.join(self.folder, self._shard_files[shard])
+                # Empty files can't be mapped, but can only have empty images.
+                self._mapped_shards[shard] = (
+                    np.memmap(shard_path, dtype=np.uint8, mode="r")
+                    if os.path.getsize(shard_path) > 0
+                    else np.empty(0, dtype=np.uint8)
+                )
+            return self._mapped_shards[shard]
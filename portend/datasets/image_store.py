@@ -0,0 +1,277 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+import os
+import threading
+import typing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Union
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+
+BYTES_IN_MB = 1024 * 1024
+DEFAULT_NUM_WORKERS = os.cpu_count() or 1
+
+
+def read_image(path: str) -> npt.NDArray[Any]:
+    """Decodes the image in the given file."""
+    image = cv2.imread(path)
+    if image is None:
+        raise IOError(f"Could not read image from {path}")
+    return image
+
+
+def write_images(
+    paths: typing.Sequence[str],
+    images: typing.Sequence[npt.NDArray[Any]],
+    num_workers: int = DEFAULT_NUM_WORKERS,
+):
+    """Encodes and writes each image to its path, in parallel threads (OpenCV releases the GIL while encoding)."""
+    if len(paths) != len(images):
+        raise RuntimeError(
+            f"Can't write images, got {len(paths)} paths for {len(images)} images."
+        )
+    if num_workers <= 1 or len(paths) <= 1:
+        for path, image in zip(paths, images):
+            cv2.imwrite(path, image)
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            list(executor.map(cv2.imwrite, paths, images))
+
+
+class ImageStore:
+    """
+    Sequence of images, some backed by files and decoded only when first accessed, others kept in memory.
+    Images are deduplicated by path, and decoded images can be capped to a maximum of resident bytes, evicting the least recently used.
+    Clones are copy-on-write: they share the images of their source until an image is replaced or written to in the clone.
+    Shared images are never modified in place, so writes always go through get_writable_image() or set_image().
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        num_workers: int = DEFAULT_NUM_WORKERS,
+    ):
+        """Inits an empty store. If max_bytes is None, decoded images are never evicted. Batches are decoded with num_workers threads."""
+        self.max_bytes = max_bytes
+        self.num_workers = num_workers
+        self._lock = threading.Lock()
+        self._slot_by_position: npt.NDArray[np.int_] = np.empty(0, np.int_)
+        self._slot_paths: list[Optional[str]] = []
+        self._reader: Callable[[str], npt.NDArray[Any]] = read_image
+        self._pinned: dict[int, npt.NDArray[Any]] = {}
+        self._cache: OrderedDict[int, npt.NDArray[Any]] = OrderedDict()
+        self._resident_bytes = 0
+        self._owned_slots: set[int] = set()
+        self._source: Optional[ImageStore] = None
+
+    @staticmethod
+    def from_paths(
+        paths: list[str],
+        max_bytes: Optional[int] = None,
+        num_workers: int = DEFAULT_NUM_WORKERS,
+    ) -> ImageStore:
+        """Creates a store with one image per path, decoded lazily. Repeated paths share the same image."""
+        return ImageStore.from_keys(paths, read_image, max_bytes, num_workers)
+
+    @staticmethod
+    def from_keys(
+        keys: list[str],
+        reader: Callable[[str], npt.NDArray[Any]],
+        max_bytes: Optional[int] = None,
+        num_workers: int = DEFAULT_NUM_WORKERS,
+    ) -> ImageStore:
+        """Creates a store with one image per key (e.g., a path), read lazily with the given reader. Repeated keys share the same image."""
+        store = ImageStore(max_bytes, num_workers)
+        store._reader = reader
+        slot_by_key: dict[str, int] = {}
+        slots = np.empty(len(keys), np.int_)
+        for position, key in enumerate(keys):
+            key = str(key)
+            if key not in slot_by_key:
+                slot_by_key[key] = len(store._slot_paths)
+                store._slot_paths.append(key)
+            slots[position] = slot_by_key[key]
+        store._slot_by_position = slots
+        return store
+
+    @staticmethod
+    def from_images(images: typing.Sequence[npt.NDArray[Any]]) -> ImageStore:
+        """Creates a store with the given images, always kept in memory."""
+        if isinstance(images, ImageStore):
+            return images
+        store = ImageStore()
+        store._slot_paths = [None] * len(images)
+        store._pinned = dict(enumerate(images))
+        store._slot_by_position = np.arange(len(images))
+        return store
+
+    def __len__(self) -> int:
+        return len(self._slot_by_position)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[npt.NDArray[Any], list[npt.NDArray[Any]]]:
+        if isinstance(index, slice):
+            return self.get_images(range(*index.indices(len(self))))
+        return self._get_slot_image(int(self._slot_by_position[index]))
+
+    def __iter__(self) -> Iterator[npt.NDArray[Any]]:
+        for position in range(len(self)):
+            yield self._get_slot_image(int(self._slot_by_position[position]))
+
+    def get_images(
+        self, positions: typing.Iterable[int]
+    ) -> list[npt.NDArray[Any]]:
+        """Returns the images at the given positions, as a batch. Images not yet decoded are decoded in parallel."""
+        slots = [
+            int(self._slot_by_position[position]) for position in positions
+        ]
+        decoded = self._decode_missing_slots(slots)
+        return [
+            decoded[slot] if slot in decoded else self._get_slot_image(slot)
+            for slot in slots
+        ]
+
+    def iter_batches(self, batch_size: int) -> Iterator[list[npt.NDArray[Any]]]:
+        """Yields consecutive batches of up to batch_size images."""
+        for start in range(0, len(self), batch_size):
+            yield self.get_images(
+                range(start, min(start + batch_size, len(self)))
+            )
+
+    def clone(self) -> ImageStore:
+        """Returns a copy-on-write clone, sharing all images (and decoded images from files) with this store."""
+        cloned_store = ImageStore(self.max_bytes, self.num_workers)
+        cloned_store._reader = self._reader
+        cloned_store._source = (
+            self._source if self._source is not None else self
+        )
+        with self._lock:
+            cloned_store._slot_by_position = self._slot_by_position.copy()
+            cloned_store._slot_paths = self._slot_paths.copy()
+            cloned_store._pinned = self._pinned.copy()
+
+            # Images written to until now are now shared, so they have to be copied again before writing.
+            self._owned_slots.clear()
+        return cloned_store
+
+    def set_image(self, position: int, image: npt.NDArray[Any]):
+        """Replaces the image at the given position only, keeping it in memory. Other positions and stores sharing the old image are not affected."""
+        with self._lock:
+            slot = len(self._slot_paths)
+            self._slot_paths.append(None)
+            self._pinned[slot] = image
+            self._slot_by_position[position] = slot
+
+    def get_writable_image(self, position: int) -> npt.NDArray[Any]:
+        """Returns an image for the given position that can be modified in place, copying it first only if it is shared."""
+        slot = int(self._slot_by_position[position])
+        if slot in self._owned_slots:
+            return self._pinned[slot]
+
+        writable_image = np.array(self._get_slot_image(slot), copy=True)
+        self.set_image(position, writable_image)
+        with self._lock:
+            self._owned_slots.add(int(self._slot_by_position[position]))
+        return writable_image
+
+    def get_path(self, position: int) -> Optional[str]:
+        """Returns the path of the file for the image at the given position, or None if it is only in memory."""
+        return self._slot_paths[int(self._slot_by_position[position])]
+
+    def get_resident_bytes(self) -> int:
+        """Returns the bytes currently used by decoded images that can be evicted."""
+        return self._resident_bytes
+
+    def clear_cache(self):
+        """Evicts all decoded images. They will be decoded again from their files when needed."""
+        with self._lock:
+            self._cache.clear()
+            self._resident_bytes = 0
+
+    def _get_slot_image(self, slot: int) -> npt.NDArray[Any]:
+        """Returns the image for a slot, decoding it if needed, and marking it as recently used."""
+        with self._lock:
+            cached_image = self._get_cached_slot_image(slot)
+        if cached_image is not None:
+            return cached_image
+        if self._source is not None:
+            return self._source._get_slot_image(slot)
+
+        image = self._reader(typing.cast(str, self._slot_paths[slot]))
+        with self._lock:
+            self._add_to_cache(slot, image)
+        return image
+
+    def _get_cached_slot_image(self, slot: int) -> Optional[npt.NDArray[Any]]:
+        """Returns the image for a slot if it is in memory, marking it as recently used. Lock must be held."""
+        if slot in self._pinned:
+            return self._pinned[slot]
+        if slot in self._cache:
+            self._cache.move_to_end(slot)
+            return self._cache[slot]
+        return None
+
+    def _decode_missing_slots(
+        self, slots: list[int]
+    ) -> dict[int, npt.NDArray[Any]]:
+        """Decodes, in parallel, the images for the slots not in memory, and returns them by slot."""
+        with self._lock:
+            missing_slots = list(
+                dict.fromkeys(
+                    slot
+                    for slot in slots
+                    if slot not in self._pinned and slot not in self._cache
+                )
+            )
+        if self._source is not None:
+            return self._source._decode_missing_slots(missing_slots)
+        if len(missing_slots) <= 1 or self.num_workers <= 1:
+            return {}
+
+        paths = [
+            typing.cast(str, self._slot_paths[slot]) for slot in missing_slots
+        ]
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            images = list(executor.map(self._reader, paths))
+        decoded = dict(zip(missing_slots, images))
+        with self._lock:
+            for slot, image in decoded.items():
+                self._add_to_cache(slot, image)
+        return decoded
+
+    def _add_to_cache(self, slot: int, image: npt.NDArray[Any]):
+        """Adds a decoded image, if not there already, evicting others if needed. Lock must be held."""
+        if slot in self._cache:
+            return
+        self._cache[slot] = image
+        self._resident_bytes += image.nbytes
+        self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        """Evicts least recently used images until under the max bytes, always keeping the latest one. Lock must be held."""
+        if self.max_bytes is None:
+            return
+        while self._resident_bytes > self.max_bytes and len(self._cache) > 1:
+            _, evicted_image = self._cache.popitem(last=False)
+            self._resident_bytes -= evicted_image.nbytes
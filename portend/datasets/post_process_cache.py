@@ -0,0 +1,163 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import typing
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+CACHE_FILE_FORMAT = "{}-{}.npy"
+FILE_HASH_FILE_FORMAT = "file-{}.json"
+CACHE_KEY_LENGTH = 32
+TEMP_FILE_SUFFIX = ".tmp"
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# Keys of the file hash sidecar files.
+SIZE_KEY = "size"
+MTIME_KEY = "mtime_ns"
+HASH_KEY = "sha256"
+
+
+def hash_file(file_path: str) -> str:
+    """Returns the SHA-256 hash of the contents of a file."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while True:
+            buffer = file.read(HASH_BUFFER_SIZE)
+            if not buffer:
+                break
+            hasher.update(buffer)
+    return hasher.hexdigest()
+
+
+def get_file_hash(file_path: str, cache_dir: str) -> str:
+    """
+    Returns the SHA-256 hash of the contents of a file. It is stored in a sidecar file in the cache folder, and reused without
+    reading the file again while its size and modification time are the same.
+    """
+    file_stat = os.stat(file_path)
+    path_key = hashlib.sha256(
+        os.path.abspath(file_path).encode("utf-8")
+    ).hexdigest()[:CACHE_KEY_LENGTH]
+    sidecar_path = os.path.join(
+        cache_dir, FILE_HASH_FILE_FORMAT.format(path_key)
+    )
+    if os.path.isfile(sidecar_path):
+        try:
+            with open(sidecar_path, "r") as sidecar_file:
+                stored = json.load(sidecar_file)
+            if (
+                stored.get(SIZE_KEY) == file_stat.st_size
+                and stored.get(MTIME_KEY) == file_stat.st_mtime_ns
+                and isinstance(stored.get(HASH_KEY), str)
+            ):
+                return typing.cast(str, stored[HASH_KEY])
+        except (ValueError, OSError) as ex:
+            print(
+                f"Ignoring invalid file hash {sidecar_path}: {type(ex).__name__}: {str(ex)}"
+            )
+
+    file_hash = hash_file(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{sidecar_path}.{os.getpid()}{TEMP_FILE_SUFFIX}"
+    with open(temp_path, "w") as sidecar_file:
+        json.dump(
+            {
+                SIZE_KEY: file_stat.st_size,
+                MTIME_KEY: file_stat.st_mtime_ns,
+                HASH_KEY: file_hash,
+            },
+            sidecar_file,
+        )
+    os.replace(temp_path, sidecar_path)
+    return file_hash
+
+
+def get_cache_key(
+    dataset_filename: str,
+    dataset_class_name: str,
+    version: int,
+    dataset_config: dict[str, Any],
+    cache_dir: str,
+) -> str:
+    """
+    Returns a key that changes if the dataset file contents, the dataset class, its post-process version or the dataset config change.
+    The hash of the file contents is only computed again if its size or modification time changed.
+    """
+    hasher = hashlib.sha256(
+        get_file_hash(dataset_filename, cache_dir).encode("utf-8")
+    )
+    hasher.update(f"{dataset_class_name}:{version}".encode("utf-8"))
+    hasher.update(
+        json.dumps(dataset_config, sort_keys=True, default=str).encode("utf-8")
+    )
+    return hasher.hexdigest()[:CACHE_KEY_LENGTH]
+
+
+class PostProcessCache:
+    """Stores arrays derived from a dataset file into .npy files in a cache folder, to reopen them memory-mapped in later loads."""
+
+    def __init__(self, cache_dir: str, cache_key: str):
+        self.cache_dir = cache_dir
+        self.cache_key = cache_key
+
+    def get_array_path(self, name: str) -> str:
+        """Returns the path of the cache file for the given array."""
+        return os.path.join(
+            self.cache_dir, CACHE_FILE_FORMAT.format(self.cache_key, name)
+        )
+
+    def has_arrays(self, names: list[str]) -> bool:
+        """Checks if all the given arrays are in the cache."""
+        return all(os.path.isfile(self.get_array_path(name)) for name in names)
+
+    def get_array(
+        self, name: str, build: typing.Callable[[], npt.NDArray[Any]]
+    ) -> npt.NDArray[Any]:
+        """Returns a read-only, memory-mapped array from the cache, building it and storing it first if it is not there."""
+        array_path = self.get_array_path(name)
+        if os.path.isfile(array_path):
+            try:
+                array = np.load(array_path, mmap_mode="r", allow_pickle=False)
+                print(f"Loaded cached {name} from {array_path}", flush=True)
+                return array
+            except (ValueError, OSError) as ex:
+                print(
+                    f"Ignoring invalid cache file {array_path}: {type(ex).__name__}: {str(ex)}"
+                )
+
+        array = build()
+        if array.dtype.hasobject:
+            raise RuntimeError(
+                f"Can't cache {name}, arrays of objects are not supported."
+            )
+        # Write to a temporary file first, so concurrent runs never see a partial file.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{array_path}.{os.getpid()}{TEMP_FILE_SUFFIX}"
+        with open(temp_path, "wb") as cache_file:
+            np.save(cache_file, array, allow_pickle=False)
+        os.replace(temp_path, array_path)
+        print(f"Cached {name} into {array_path}", flush=True)
+
+        # Reopen mapped, so the memory of the built array can be released.
+        del array
+        return np.load(array_path, mmap_mode="r", allow_pickle=False)
@@ -18,18 +18,25 @@ from __future__ import annotations
 
 import secrets
 import typing
-from typing import Any
+from pathlib import Path
+from typing import Any, Optional
 
 import numpy as np
 import numpy.typing as npt
 import pandas as pd
 
-from portend.datasets.dataset import DataSet
+from portend.datasets.dataset import DataSet, fingerprint_ids
+from portend.utils import files as file_utils
 from portend.utils.typing import SequenceLike
 
+POSITIONAL_FILE_EXT = ".npz"
+
 
 class RefDataSet(DataSet):
-    """A dataset referencing the ids of another dataset."""
+    """
+    A dataset referencing the ids of another dataset. Alternatively, it can reference row positions of a specific base dataset,
+    identified by a fingerprint of its ids, which is stored in a compact binary file.
+    """
 
     ORIGINAL_ID_KEY = "original_id"
     x_original_ids = np.empty(0, str)
@@ -37,15 +44,130 @@ class RefDataSet(DataSet):
     SAMPLE_GROUP_ID_KEY = "sample_group_id"
     sample_group_ids = np.empty(0, str)
 
+    # Keys used only by the positional format.
+    ORIGINAL_POSITION_KEY = "original_position"
+    BASE_FINGERPRINT_KEY = "base_fingerprint"
+    ID_PREFIX_KEY = "id_prefix"
+    x_original_positions: Optional[npt.NDArray[np.int32]] = None
+    base_fingerprint: Optional[str] = None
+    id_prefix: str = ""
+
+    def is_positional(self) -> bool:
+        """Whether this dataset references base positions instead of ids."""
+        return self.x_original_positions is not None
+
     # Overriden to add additional internal data.
-    def as_dataframe(self, only_ids: bool = False) -> pd.DataFrame:
+    def as_dataframe(
+        self, only_ids: bool = False, copy: bool = True
+    ) -> pd.DataFrame:
         """Adds internal data to a new dataframe."""
-        dataset_df = super().as_dataframe(only_ids)
+        dataset_df = super().as_dataframe(only_ids, copy)
         if not only_ids:
-            dataset_df[RefDataSet.ORIGINAL_ID_KEY] = self.x_original_ids
+            if self.is_positional():
+                dataset_df[
+                    RefDataSet.ORIGINAL_POSITION_KEY
+                ] = self.x_original_positions
+            else:
+                dataset_df[RefDataSet.ORIGINAL_ID_KEY] = self.x_original_ids
             dataset_df[RefDataSet.SAMPLE_GROUP_ID_KEY] = self.sample_group_ids
         return dataset_df
 
+    # Overriden to support the positional binary format.
+    def load_from_file(
+        self,
+        dataset_filename: Optional[str],
+        dataset_config: dict[str, Any],
+        convert_to_timestamp: Optional[
+            typing.Callable[[SequenceLike], npt.NDArray[np.int_]]
+        ] = None,
+        select_rows: Optional[
+            typing.Callable[[DataSet], npt.NDArray[np.int_]]
+        ] = None,
+        run_post_process: bool = True,
+    ):
+        """Loads the references from a file, either with ids in any dataset format, or with positions in the binary format."""
+        if dataset_filename is not None and RefDataSet.is_positional_file(
+            dataset_filename
+        ):
+            self.load_keys(dataset_config)
+            self._load_positional_file(dataset_filename)
+        else:
+            super().load_from_file(
+                dataset_filename,
+                dataset_config,
+                convert_to_timestamp,
+                select_rows,
+                run_post_process,
+            )
+
+    # Overriden to support the positional binary format.
+    def save_to_file(self, output_filename: str, compact: bool = False):
+        """Saves the references, using the binary format if this dataset references positions."""
+        if self.is_positional():
+            self._save_positional_file(output_filename)
+        else:
+            super().save_to_file(output_filename, compact)
+
+    @staticmethod
+    def is_positional_file(filename: str) -> bool:
+        """Checks if the given file contains positional references."""
+        if Path(filename).suffix.lower() != POSITIONAL_FILE_EXT:
+            return False
+        with np.load(filename, allow_pickle=False) as npz_file:
+            return RefDataSet.BASE_FINGERPRINT_KEY in npz_file.files
+
+    def _save_positional_file(self, output_filename: str):
+        """Stores positions, sample groups and timestamps as binary arrays. Ids are regenerated from their prefix."""
+        if Path(output_filename).suffix.lower() != POSITIONAL_FILE_EXT:
+            raise Exception(
+                f"Positional reference datasets must be saved to a {POSITIONAL_FILE_EXT} file, got {output_filename}"
+            )
+        print(f"Saving positional references to file {output_filename}")
+        file_utils.create_folder_for_file(output_filename)
+        arrays: dict[str, npt.NDArray[Any]] = {
+            RefDataSet.ORIGINAL_POSITION_KEY: np.asarray(
+                self.x_original_positions, dtype=np.int32
+            ),
+            RefDataSet.SAMPLE_GROUP_ID_KEY: np.asarray(
+                self.sample_group_ids, dtype=np.int32
+            ),
+            RefDataSet.BASE_FINGERPRINT_KEY: np.array(self.base_fingerprint),
+            RefDataSet.ID_PREFIX_KEY: np.array(self.id_prefix),
+        }
+        if self.has_timestamps():
+            arrays[RefDataSet.DEFAULT_TIMESTAMP_KEY] = np.asarray(
+                self.get_timestamps(copy=False), dtype=np.int64
+            )
+        with open(output_filename, "wb") as output_file:
+            np.savez(output_file, **arrays)
+
+    def _load_positional_file(self, dataset_filename: str):
+        """Loads positions, sample groups and timestamps, and regenerates the ids."""
+        print(f"Loading positional references from file {dataset_filename}")
+        with np.load(dataset_filename, allow_pickle=False) as npz_file:
+            self.x_original_positions = npz_file[
+                RefDataSet.ORIGINAL_POSITION_KEY
+            ]
+            self.sample_group_ids = npz_file[RefDataSet.SAMPLE_GROUP_ID_KEY]
+            self.base_fingerprint = str(
+                npz_file[RefDataSet.BASE_FINGERPRINT_KEY]
+            )
+            self.id_prefix = str(npz_file[RefDataSet.ID_PREFIX_KEY])
+            columns = {
+                self.id_key: RefDataSet.new_sample_ids(
+                    len(self.x_original_positions), self.id_prefix
+                )
+            }
+            if RefDataSet.DEFAULT_TIMESTAMP_KEY in npz_file.files:
+                columns[self.timestamp_key] = npz_file[
+                    RefDataSet.DEFAULT_TIMESTAMP_KEY
+                ]
+        self.dataframe = pd.DataFrame(columns)
+        print(
+            f"Done loading {len(self.x_original_positions)} positional references",
+            flush=True,
+        )
+
     # Overriden to add post processing.
     def post_process(self, dataset_config: dict[str, typing.Any]):
         """Prepares dataset after it has been loaded."""
@@ -82,6 +204,15 @@ class RefDataSet(DataSet):
         new_id = secrets.token_hex(10)
         return [new_id, 0]
 
+    @staticmethod
+    def new_sample_ids(
+        num_samples: int, prefix: Optional[str] = None
+    ) -> npt.NDArray[np.str_]:
+        """Returns unique ids for the given number of samples at once, as a shared random prefix plus a sequence number."""
+        if prefix is None:
+            prefix = secrets.token_hex(5)
+        return np.char.add(f"{prefix}-", np.arange(num_samples).astype(np.str_))
+
     def create_from_lists(
         self,
         samples: list[Any],
@@ -95,6 +226,59 @@ class RefDataSet(DataSet):
         self.x_original_ids = np.array(original_ids)
         self.sample_group_ids = np.array(sample_group_ids)
 
+    def create_from_positions(
+        self,
+        base_dataset: DataSet,
+        original_positions: SequenceLike,
+        sample_group_ids: SequenceLike,
+    ):
+        """Adds multiple samples by their row position in the given base dataset, with ids generated in bulk and no timestamps."""
+        self.x_original_positions = np.asarray(
+            original_positions, dtype=np.int32
+        )
+        self.sample_group_ids = np.asarray(sample_group_ids, dtype=np.int32)
+        self.base_fingerprint = base_dataset.get_ids_fingerprint()
+        self.id_prefix = secrets.token_hex(5)
+        num_samples = len(self.x_original_positions)
+        self.dataframe = pd.DataFrame(
+            {
+                self.id_key: RefDataSet.new_sample_ids(
+                    num_samples, self.id_prefix
+                ),
+                self.timestamp_key: np.zeros(num_samples, dtype=np.int64),
+            }
+        )
+
+    def select_base_rows(self, base_dataset: DataSet) -> npt.NDArray[np.int_]:
+        """
+        Returns the sorted positions of the samples of the given base dataset referenced here, so that only those are loaded.
+        Positional references are updated to point into the reduced base dataset.
+        """
+        if self.is_positional():
+            if self.base_fingerprint != base_dataset.get_ids_fingerprint():
+                raise Exception(
+                    "Base dataset does not match the one used to create the positional references."
+                )
+            base_positions, ref_positions = np.unique(
+                typing.cast(npt.NDArray[np.int32], self.x_original_positions),
+                return_inverse=True,
+            )
+            self.x_original_positions = ref_positions.astype(np.int32)
+            self.base_fingerprint = fingerprint_ids(
+                base_dataset.dataframe[base_dataset.id_key].take(base_positions)
+            )
+        else:
+            base_positions = np.unique(
+                base_dataset.get_positions_by_ids(
+                    pd.unique(self.get_original_ids())
+                )
+            )
+        print(
+            f"References use {len(base_positions)} samples of the base dataset",
+            flush=True,
+        )
+        return base_positions
+
     def create_from_reference(
         self,
         base_dataset: DataSet,
@@ -102,26 +286,36 @@ class RefDataSet(DataSet):
         dataset_config: dict[str, Any],
     ) -> DataSet:
         """Creates a new dataset by getting the full samples of a reference from the base dataset."""
-        # Gather all complete samples from the refs and full data.
-        samples = []
-        for idx, original_id in enumerate(self.get_original_ids()):
-            # Only show print update every 500 ids.
-            if idx % 500 == 0:
-                print(
-                    f"Finished preparing {idx} samples out of {self.get_number_of_samples()}",
-                    flush=True,
+        # Gather all complete samples from the full data in one indexed take, in the order of the refs.
+        print(
+            f"Gathering {self.get_number_of_samples()} samples from base dataset",
+            flush=True,
+        )
+        if self.is_positional():
+            if self.base_fingerprint != base_dataset.get_ids_fingerprint():
+                raise Exception(
+                    "Base dataset does not match the one used to create the positional references."
                 )
+            positions = typing.cast(
+                npt.NDArray[np.int32], self.x_original_positions
+            )
+        else:
+            positions = base_dataset.get_positions_by_ids(
+                self.get_original_ids()
+            )
+        full_samples = base_dataset.dataframe.take(positions).reset_index(
+            drop=True
+        )
 
-            # Get the full sample, but replace the timestamp (if any) with the one from the reference dataset.
-            full_sample = base_dataset.get_sample_by_id(original_id)
-            full_sample[self.timestamp_key] = self.dataframe.loc[idx][
+        # Replace the timestamps (if any) with the ones from the reference dataset.
+        if self.has_timestamps():
+            full_samples[self.timestamp_key] = self.dataframe[
                 self.timestamp_key
-            ]
-            samples.append(full_sample)
+            ].to_numpy()
 
-        # Add all samples to create the new dataset.
+        # Use all samples to create the new dataset.
         new_dataset: DataSet = output_dataset_class()
-        new_dataset.set_samples(samples)
+        new_dataset.from_dataframe(full_samples)
 
         # Set all keys and post-process if needed.
         new_dataset.set_id_key(base_dataset.id_key)
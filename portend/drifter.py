@@ -67,7 +67,8 @@ def main():
             input_dataset, params
         )
         output_file = config.get("output").get("output_dataset_file")
-        drifted_dataset.save_to_file(output_file)
+        compact = bool(config.get("output").get("compact_output", False))
+        drifted_dataset.save_to_file(output_file, compact)
         if "save_backup" in config.get("output"):
             file_utils.save_timestamped_backup(output_file, "drift")
 
@@ -24,6 +24,8 @@ from typing import Any, Dict
 import cv2
 import numpy as np
 
+from portend.datasets.image_store import ImageStore
+
 #
 # Default parameters for fog drift
 #
@@ -45,6 +47,15 @@ DEFAULT_PARAMS = {
 #
 #
 def drift_images(img_list, params: dict[str, Any]):
+    img_store = ImageStore.from_images(img_list).clone()
+    drift_images_in_place(img_store, params)
+    return list(img_store)
+
+
+#
+# Drifts all images in the store, writing each result into the store's own copy of the image, with a single float buffer for intermediate results.
+#
+def drift_images_in_place(img_store: ImageStore, params: dict[str, Any]):
     print(DEFAULT_PARAMS)
     gray = float(params.get("gray", DEFAULT_PARAMS["gray"]))
     blend = float(params.get("blend", DEFAULT_PARAMS["blend"]))
@@ -53,18 +64,7 @@ def drift_images(img_list, params: dict[str, Any]):
         Dict[str, Any], params.get("blur", DEFAULT_PARAMS["blur"])
     )
 
-    gray_mat = np.full(img_list[0].shape, gray * 255)
-    img_list = [
-        np.clip(
-            gray_mat * blend
-            + img * (1 - blend)
-            + (np.random.random(img.shape) * 2 - 1) * 255 * noise,
-            0,
-            255,
-        )
-        for img in img_list
-    ]
-
+    kernel = None
     if blur:
         blur_radius = int(blur.get("radius", DEFAULT_PARAMS["blur"]["radius"]))
         blur_alpha = float(blur.get("alpha", DEFAULT_PARAMS["blur"]["alpha"]))
@@ -73,9 +73,24 @@ def drift_images(img_list, params: dict[str, Any]):
             kernel = np.ones((k, k)) * blur_alpha
             kernel[blur_radius - 1, blur_radius - 1] = 1
             kernel = kernel / np.sum(kernel)
-            img_list = [cv2.filter2D(img, -1, kernel) for img in img_list]
 
-    return img_list
+    work_buffer = None
+    for position in range(len(img_store)):
+        img = img_store.get_writable_image(position)
+        if work_buffer is None or work_buffer.shape != img.shape:
+            work_buffer = np.empty(img.shape, np.float64)
+
+        np.multiply(img, 1 - blend, out=work_buffer)
+        work_buffer += gray * 255 * blend
+        if noise != 0:
+            work_buffer += (np.random.random(img.shape) * 2 - 1) * 255 * noise
+        np.clip(work_buffer, 0, 255, out=work_buffer)
+        if kernel is not None:
+            cv2.filter2D(work_buffer, -1, kernel, dst=work_buffer)
+
+        # Round to the 8-bit image, as it would be when encoding the float result.
+        np.rint(work_buffer, out=work_buffer)
+        np.copyto(img, work_buffer, casting="unsafe")
 
 
 #
@@ -58,15 +58,28 @@ def apply_drift(
     print_and_log(f"Starting image drift, for submodule: {submodule_name}")
     drift_submodule = load_sub_module(submodule_name)
     print_and_log(f"Drifting {len(base_dataset.image_list)} images...")
-    drifted_images = drift_submodule.drift_images(
-        base_dataset.image_list, params
+    drifted_dataset = ImageDataSet()
+    # The clone shares the base data, since only whole columns are replaced in it.
+    drifted_dataset = base_dataset.clone_image_dataset(
+        drifted_dataset, deep=False
     )
+    if hasattr(drift_submodule, "drift_images_in_place"):
+        # The cloned images are copied only when each is drifted, and written in place.
+        drift_submodule.drift_images_in_place(
+            drifted_dataset.image_list, params
+        )
+        drifted_images = drifted_dataset.image_list
+    else:
+        drifted_images = drift_submodule.drift_images(
+            base_dataset.image_list, params
+        )
 
-    # Create a new dataset with these new images.
+    # Set up the new dataset with these new images.
     drifted_image_names = generate_drifted_image_names(base_dataset.image_names)
-    drifted_dataset = ImageDataSet()
-    drifted_dataset = base_dataset.clone_image_dataset(drifted_dataset)
     drifted_dataset.set_image_folder(params.get("img_output_dir"))
+    drifted_dataset.set_image_storage(
+        params.get("img_storage"), params.get("img_shard_mb")
+    )
     drifted_dataset.set_images_from_list(drifted_images, drifted_image_names)
 
     return drifted_dataset
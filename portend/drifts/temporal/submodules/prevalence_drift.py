@@ -256,7 +256,7 @@ def test(full_dataset: DataSet, drift_params: dict[str, Any]):
     num_sample_groups = int(num_samples / sample_group_size)
 
     # TODO: Change this to support bins values other than by dataset results?
-    labelled_output = full_dataset.get_model_output()
+    labelled_output = full_dataset.get_model_output(copy=False)
     all_sample_group_prevalences: dict[int, dict[int, int]] = {}
     for curr_sample_group_id in range(0, num_sample_groups):
         # For a given sample group, count percentage of samples by result.
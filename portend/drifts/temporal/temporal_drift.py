@@ -44,8 +44,12 @@ TEMPORAL_DRIFT_PACKAGE = "portend.drifts.temporal.submodules."
 # - **max_num_samples**: how many samples to output into the drifted dataset.
 # - **sample_group_size**: size of the sample group for generating the drifted dataset.
 # - **sample_group_shuffle**: (OPTIONAL) true or false to indicate whether to shuffle samples in each group after selecting them from bins. Defaults to true.
+# - **ref_format**: (OPTIONAL) "ids" to reference samples by their id in the base dataset, or "positional" to reference them by row position in a compact binary file (output file has to be .npz). Defaults to "ids".
 #
 
+REF_FORMAT_IDS = "ids"
+REF_FORMAT_POSITIONAL = "positional"
+
 
 def load_sub_module(submodule_name: Optional[str]) -> types.ModuleType:
     """Loads the drift submodule."""
@@ -65,12 +69,20 @@ def apply_drift(base_dataset: DataSet, params: dict[str, Any]) -> DataSet:
         else True
     )
     drift_submodule = load_sub_module(params.get("submodule"))
+    ref_format = params.get("ref_format", REF_FORMAT_IDS)
+    if ref_format not in [REF_FORMAT_IDS, REF_FORMAT_POSITIONAL]:
+        raise Exception(f"Invalid ref format configured: {ref_format}")
+    positional = ref_format == REF_FORMAT_POSITIONAL
 
-    # Setup bins.
+    # Setup bins, which will contain either ids or positions of the base dataset samples.
     bin_value = params.get("bin_value", "results")
     bin_shuffle = params.get("bin_shuffle", True)
     input_bins = _load_bins(
-        base_dataset, params.get("bins", []), bin_value, bin_shuffle
+        base_dataset,
+        params.get("bins", []),
+        bin_value,
+        bin_shuffle,
+        positional,
     )
 
     # Loop until we get all samples we want.
@@ -80,7 +92,7 @@ def apply_drift(base_dataset: DataSet, params: dict[str, Any]) -> DataSet:
     new_samples: list[list[Any]] = []
     original_ids = []
     sample_group_ids = []
-    while len(new_samples) < max_num_samples:
+    while len(original_ids) < max_num_samples:
         print_and_log(
             f"Now getting data for sample group of size {sample_group_size}, using bin offset {curr_bin_offset}"
         )
@@ -98,9 +110,10 @@ def apply_drift(base_dataset: DataSet, params: dict[str, Any]) -> DataSet:
             print_and_log("Shuffling sample group samples.")
             random.shuffle(sample_group_sample_ids)
 
-        # Gather new data in lists.
-        for _ in range(len(sample_group_sample_ids)):
-            new_samples.append(drifted_dataset.new_empty_sample())
+        # Gather new data in lists. Positional samples get their ids in bulk later.
+        if not positional:
+            for _ in range(len(sample_group_sample_ids)):
+                new_samples.append(drifted_dataset.new_empty_sample())
         original_ids.extend(sample_group_sample_ids)
         sample_group_ids.extend(
             [sample_group_id] * len(sample_group_sample_ids)
@@ -111,9 +124,14 @@ def apply_drift(base_dataset: DataSet, params: dict[str, Any]) -> DataSet:
         sample_group_id += 1
 
     # Set the dataset with the data.
-    drifted_dataset.create_from_lists(
-        new_samples, original_ids, sample_group_ids
-    )
+    if positional:
+        drifted_dataset.create_from_positions(
+            base_dataset, original_ids, sample_group_ids
+        )
+    else:
+        drifted_dataset.create_from_lists(
+            new_samples, original_ids, sample_group_ids
+        )
     print_and_log("Finished applying drift")
 
     # Adds timestamps.
@@ -127,8 +145,9 @@ def _load_bins(
     bin_params: list[list[Any]],
     bin_value: str = "results",
     shuffle: bool = True,
+    positional: bool = False,
 ) -> list[databin.DataBin]:
-    """Loads a dataset into bins"""
+    """Loads a dataset into bins, by id, or by row position if positional is true."""
     if len(bin_params) == 0:
         raise Exception("No valid bins were configured.")
 
@@ -136,7 +155,12 @@ def _load_bins(
     print_and_log(f"Bins: {bin_params}")
     values = _get_bin_values(base_dataset, bin_value)
     bins = databin.create_bins(bin_params, shuffle)
-    bins = databin.sort_into_bins(base_dataset.get_ids(), values, bins)
+    sample_refs = (
+        np.arange(base_dataset.get_number_of_samples())
+        if positional
+        else base_dataset.get_ids(copy=False)
+    )
+    bins = databin.sort_into_bins(sample_refs, values, bins)
 
     # Setup queues.
     print_and_log("Filled bins: ")
@@ -151,7 +175,7 @@ def _get_bin_values(base_dataset: DataSet, bin_value: str) -> SequenceLike:
     """Gets the values to be used when sorting into bins for the given dataset, from the configured options."""
     values: SequenceLike
     if bin_value == "results":
-        values = base_dataset.get_model_output()
+        values = base_dataset.get_model_output(copy=False)
     elif bin_value == "all":
         # We set all values to 0, assuming single bin will also set its value to 0.
         values = [0] * base_dataset.get_number_of_samples()
@@ -19,6 +19,7 @@ from __future__ import annotations
 from typing import Any
 
 import numpy as np
+import numpy.typing as npt
 
 from portend.datasets import dataset
 from portend.utils.typing import SequenceLike
@@ -37,6 +38,10 @@ class IcebergDataSet(dataset.DataSet):
 
     x_combined_bands = np.empty((0, BAND_WIDTH, BAND_HEIGHT, BAND_DEPTH))
 
+    # The bands are only used to build the combined bands, which can be cached.
+    POST_PROCESSED_ARRAYS = ["x_combined_bands"]
+    POST_PROCESS_SOURCE_COLUMNS = [BAND1_KEY, BAND2_KEY]
+
     # Overriden.
     def post_process(self, dataset_config: dict[str, Any]):
         """Clean up angles and combine images internally."""
@@ -50,35 +55,33 @@ class IcebergDataSet(dataset.DataSet):
         print("Done cleaning up angle", flush=True)
 
         # Sets up a combined set of inputs containing each separate band, plus a combined image of both bands.
-        x_band1 = np.array(self.dataframe[IcebergDataSet.BAND1_KEY])
-        x_band2 = np.array(self.dataframe[IcebergDataSet.BAND2_KEY])
-        square_x_band1 = np.array(
-            [
-                np.array(band)
-                .astype(np.float32)
-                .reshape(self.BAND_WIDTH, self.BAND_HEIGHT)
-                for band in x_band1
-            ]
-        )
-        square_x_band2 = np.array(
-            [
-                np.array(band)
-                .astype(np.float32)
-                .reshape(self.BAND_WIDTH, self.BAND_HEIGHT)
-                for band in x_band2
-            ]
-        )
-        self.x_combined_bands = np.concatenate(
-            [
-                square_x_band1[:, :, :, np.newaxis],
-                square_x_band2[:, :, :, np.newaxis],
-                ((square_x_band1 + square_x_band2) / 2)[:, :, :, np.newaxis],
-            ],
-            axis=-1,
+        self.x_combined_bands = self.get_post_processed_array(
+            "x_combined_bands", self._combine_bands
         )
 
         print("Done post-processing data", flush=True)
 
+    def _combine_bands(self) -> npt.NDArray[np.float32]:
+        """Fills an array with each band and their average as channels, converting all rows at once."""
+        num_samples = len(self.dataframe.index)
+        combined_bands = np.empty(
+            (num_samples, self.BAND_WIDTH, self.BAND_HEIGHT, self.BAND_DEPTH),
+            dtype=np.float32,
+        )
+        for channel, band_key in enumerate(
+            [IcebergDataSet.BAND1_KEY, IcebergDataSet.BAND2_KEY]
+        ):
+            combined_bands[:, :, :, channel] = np.array(
+                self.dataframe[band_key].tolist(), dtype=np.float32
+            ).reshape(num_samples, self.BAND_WIDTH, self.BAND_HEIGHT)
+        np.add(
+            combined_bands[:, :, :, 0],
+            combined_bands[:, :, :, 1],
+            out=combined_bands[:, :, :, 2],
+        )
+        combined_bands[:, :, :, 2] /= 2
+        return combined_bands
+
     # Overriden (implemented abstract method).
     def get_model_inputs(self) -> list[SequenceLike]:
         """Returns the 2 inputs to be used: the combined bands and the angle."""
@@ -86,3 +89,13 @@ class IcebergDataSet(dataset.DataSet):
             self.x_combined_bands,
             np.array(self.dataframe[IcebergDataSet.ANGLE_KEY]),
         ]
+
+    # Overriden.
+    def get_model_inputs_slice(
+        self, start: int, stop: int
+    ) -> list[SequenceLike]:
+        """Returns the 2 inputs for the given range of samples, with the combined bands as a view."""
+        return [
+            self.x_combined_bands[start:stop],
+            np.array(self.dataframe[IcebergDataSet.ANGLE_KEY].iloc[start:stop]),
+        ]
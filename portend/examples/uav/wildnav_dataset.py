@@ -19,7 +19,7 @@ from __future__ import annotations
 import csv
 import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 from portend.datasets.image_dataset import ImageDataSet
 from portend.utils.typing import SequenceLike
@@ -42,6 +42,17 @@ class WildnavDataSet(ImageDataSet):
         model_inputs.append([self._csv_input_file_name()])
         return model_inputs
 
+    # Overriden.
+    def get_model_inputs_slice(
+        self, start: int, stop: int
+    ) -> Optional[list[SequenceLike]]:
+        """Returns the image inputs for the given range of samples, plus the CSV file with additional data."""
+        model_inputs = super().get_model_inputs_slice(start, stop)
+        if model_inputs is None:
+            return None
+        model_inputs.append([self._csv_input_file_name()])
+        return model_inputs
+
     def _csv_input_file_name(self) -> str:
         """Returns the name of the CSV input file that Wildnav expects."""
         return os.path.join(self.image_folder, PHOTO_CSV_FILE)
@@ -67,10 +78,11 @@ class WildnavDataSet(ImageDataSet):
             writer.writerow(header)
 
             # Write one line for each image with the coordinates, plus zero for the additional flight data we don't have.
-            for image_id in self.get_ids():
-                sample = self.get_sample_by_id(image_id)
-                image_file = Path(sample[self.image_path_key]).name
-                coordinates: list[float] = sample[COORDINATES_KEY]
+            for image_path, coordinates in zip(
+                self.dataframe[self.image_path_key],
+                self.dataframe[COORDINATES_KEY],
+            ):
+                image_file = Path(image_path).name
                 lat = coordinates[0]
                 long = coordinates[1]
                 line = [image_file, lat, long, 0, 0, 0, 0, 0, 0, 0]
@@ -62,6 +62,8 @@ def main():
             config.get("fields"),
             config.get("existing_data"),
             config.get("json_file"),
+            config.get("metadata_cache"),
+            config.get("workers"),
         )
     elif action == "config_gen":
         print_and_log("Running config generation action.")
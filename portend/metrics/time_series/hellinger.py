@@ -29,11 +29,16 @@ class HellingerMetric(DistanceMetric):
     def metric_distance(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
         """Calculates Hellinger distance."""
         hellinger_dist = np.sqrt(
-            np.sum(np.where(p != 0, (np.sqrt(p) - np.sqrt(q)) ** 2, 0))
+            np.sum(np.where(p != 0, (np.sqrt(p) - np.sqrt(q)) ** 2, 0), axis=-1)
         ) / np.sqrt(2)
         # print(f"Hellinger Distance: {hellinger_dist}")
         return hellinger_dist
 
+    # Overriden.
+    def metric_distances(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
+        """Calculates Hellinger distance for each row."""
+        return self.metric_distance(p, q)
+
 
 """
 if __name__ == "__main__":
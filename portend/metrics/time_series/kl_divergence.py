@@ -28,7 +28,12 @@ class KLDivergenceMetric(DistanceMetric):
     # Overriden.
     def metric_distance(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
         """Calculates KL-divergence."""
-        kl_div = np.sum(np.where(p != 0, p * np.log2(p / q), 0))
+        kl_div = np.sum(np.where(p != 0, p * np.log2(p / q), 0), axis=-1)
         # print(f"KL div: {kl_div}")
         # print(f"Entropy: {entropy(p, q)}")
         return kl_div
+
+    # Overriden.
+    def metric_distances(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
+        """Calculates KL-divergence for each row."""
+        return self.metric_distance(p, q)
@@ -16,6 +16,7 @@
 
 from __future__ import annotations
 
+import numpy as np
 from scipy import stats
 
 from portend.analysis.time_series.timeseries import TimeSeries
@@ -38,3 +39,15 @@ class KolmogorovSmirnovMetric(ErrorMetric):
 
         ks_stat = stats.kstest([x], "norm", args=(loc, scale)).statistic
         return ks_stat
+
+    # Overriden.
+    def metric_errors(
+        self, time_series: TimeSeries, ts_predictions: TimeSeries
+    ):
+        """Calculates the Kolmogorov-Smirnov error for all intervals. With one sample x, the statistic is max(F(x), 1 - F(x))."""
+        cdf = stats.norm.cdf(
+            time_series.get_aggregated(),
+            ts_predictions.get_pdf_means(),
+            ts_predictions.get_pdf_std_devs(),
+        )
+        return np.maximum(cdf, 1 - cdf)
@@ -30,10 +30,15 @@ class TVD(DistanceMetric):
     # Overriden.
     def metric_distance(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
         """Calculates total variation distance."""
-        tvd = np.mean(np.abs(p - q)) / 2
+        tvd = np.mean(np.abs(p - q), axis=-1) / 2
         # print(f"Total variation distance: {tvd}")
         return tvd
 
+    # Overriden.
+    def metric_distances(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
+        """Calculates total variation distance for each row."""
+        return self.metric_distance(p, q)
+
 
 """
 if __name__ == "__main__":
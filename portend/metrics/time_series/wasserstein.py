@@ -30,10 +30,15 @@ class Wasserstein(DistanceMetric):
     # Overriden.
     def metric_distance(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
         """Calculates Wasserstein distance."""
-        wass = np.mean(np.abs(p - q))
+        wass = np.mean(np.abs(p - q), axis=-1)
         # print(f"Wasserstein distance: {wass}")
         return wass
 
+    # Overriden.
+    def metric_distances(self, p: npt.NDArray[Any], q: npt.NDArray[Any]):
+        """Calculates Wasserstein distance for each row."""
+        return self.metric_distance(p, q)
+
 
 """
 if __name__ == "__main__":
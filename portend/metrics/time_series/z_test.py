@@ -34,3 +34,12 @@ class ZTestMetric(ErrorMetric):
         sigma = ts_predictions.get_pdf_params(time_interval_id).get("std_dev")
         t = (x1 - x2) / sigma
         return t
+
+    # Overriden.
+    def metric_errors(
+        self, time_series: TimeSeries, ts_predictions: TimeSeries
+    ):
+        """Calculates the STEPD error for all intervals."""
+        return (
+            time_series.get_aggregated() - ts_predictions.get_pdf_means()
+        ) / ts_predictions.get_pdf_std_devs()
@@ -18,11 +18,16 @@ from __future__ import annotations
 
 from typing import Any, Optional
 
+import numpy as np
 import numpy.typing as npt
 
 from portend.analysis.time_series.density import DensityEstimator
 from portend.analysis.time_series.timeseries import TimeSeries
 from portend.metrics.metric import Metric, MetricResult
+from portend.utils.timer import Timer
+
+MAX_BATCH_DIST_VALUES = 2**22
+"""Max number of values in the probability distributions calculated at once for a batch of intervals."""
 
 
 class TSMetric(Metric):
@@ -47,6 +52,46 @@ class TSMetric(Metric):
         """Method to be called once in each step/iteration, if any."""
         self.time_interval_id = time_interval_id
 
+    def calculate_metric_for_all_intervals(
+        self,
+    ) -> Optional[list[Optional[MetricResult[Any]]]]:
+        """
+        Calculates the metric for all intervals at once, if the metric supports it, or returns None so that each interval is calculated
+        with step_setup and calculate_metric. Intervals the metric can't be calculated for have None as their result, same as they
+        would fail when calculated one by one. The time of the whole batch is split evenly among the results.
+        """
+        timer = Timer()
+        timer.start()
+        values = self._calculate_metric_for_all_intervals()
+        timer.stop()
+        if values is None:
+            return None
+
+        skipped = np.ma.getmaskarray(values)
+        num_results = int(np.count_nonzero(~skipped))
+        interval_timer = Timer()
+        interval_timer.elapsed = timer.elapsed / max(num_results, 1)
+        interval_timer.proc_elapsed = timer.proc_elapsed / max(num_results, 1)
+        results: list[Optional[MetricResult[Any]]] = []
+        for value, is_skipped in zip(np.ma.getdata(values), skipped):
+            if is_skipped:
+                results.append(None)
+                continue
+            result: MetricResult[Any] = MetricResult()
+            result.value = value
+            result.timer = interval_timer
+            results.append(result)
+        return results
+
+    def _calculate_metric_for_all_intervals(
+        self,
+    ) -> Optional[npt.NDArray[Any]]:
+        """
+        Returns the values of the metric for all intervals, or None if the metric can only be calculated one interval at a time.
+        Intervals it can't be calculated for can be masked, returning a masked array.
+        """
+        return None
+
 
 class ErrorMetric(TSMetric):
     """Implements an error-based metric that calculates error based on output."""
@@ -70,6 +115,19 @@ class ErrorMetric(TSMetric):
             "Calculation for error metric must be implemented by submetric."
         )
 
+    # Overriden.
+    def _calculate_metric_for_all_intervals(
+        self,
+    ) -> Optional[npt.NDArray[Any]]:
+        """Overriden."""
+        return self.metric_errors(self.datasets, self.predictions)
+
+    def metric_errors(
+        self, time_series: TimeSeries, ts_predictions: TimeSeries
+    ) -> Optional[npt.NDArray[Any]]:
+        """Calculates the error for all intervals at once. Returns None if not implemented by the submetric."""
+        return None
+
 
 class DistanceMetric(TSMetric):
     """Implements a distance-based metric that can load metric-specific functions from a config."""
@@ -127,3 +185,65 @@ class DistanceMetric(TSMetric):
         raise NotImplementedError(
             "Calculation for error metric must be implemented by submetric."
         )
+
+    # Overriden.
+    def _calculate_metric_for_all_intervals(
+        self,
+    ) -> Optional[npt.NDArray[Any]]:
+        """
+        Builds the probability distributions of batches of intervals as matrices, one row per interval, and calculates the distances row-wise.
+        Intervals without valid pdf params are masked, since their distributions can't be calculated.
+        """
+        if self.density_estimator is None:
+            raise Exception("Density estimator has not been set up.")
+        if self.density_estimator.dist_range is None:
+            raise Exception("Range has not been set up.")
+
+        distribution = self.config_params.get("distribution", "")
+        all_means = self.predictions.get_pdf_means()
+        all_std_devs = self.predictions.get_pdf_std_devs()
+        valid = (
+            np.isfinite(all_means)
+            & np.isfinite(all_std_devs)
+            & (all_std_devs > 0)
+        )
+        means = all_means[valid]
+        std_devs = all_std_devs[valid]
+        batch_size = max(
+            MAX_BATCH_DIST_VALUES
+            // max(self.density_estimator.dist_range.size, 1),
+            1,
+        )
+        distances: list[npt.NDArray[Any]] = []
+        for start in range(0, means.size, batch_size):
+            batch = slice(start, start + batch_size)
+            prev_distributions = (
+                self.density_estimator.calculate_probability_distributions(
+                    distribution,
+                    self.datasets.get_aggregated(),
+                    means[batch],
+                    std_devs[batch],
+                )
+            )
+            curr_distributions = (
+                self.density_estimator.calculate_probability_distributions(
+                    distribution, None, means[batch], std_devs[batch]
+                )
+            )
+            batch_distances = self.metric_distances(
+                prev_distributions, curr_distributions
+            )
+            if batch_distances is None:
+                return None
+            distances.append(batch_distances)
+
+        all_distances = np.ma.masked_all(all_means.size, dtype=np.float64)
+        if distances:
+            all_distances[valid] = np.concatenate(distances)
+        return all_distances
+
+    def metric_distances(
+        self, p: npt.NDArray[Any], q: npt.NDArray[Any]
+    ) -> Optional[npt.NDArray[Any]]:
+        """Calculates the distance between each row of p and the same row of q. Returns None if not implemented by the submetric."""
+        return None
@@ -21,6 +21,7 @@ import shutil
 import typing
 from typing import Any, List
 
+import numpy.typing as npt
 import pandas as pd
 
 from portend.models.ml_model import MLModel
@@ -77,13 +78,13 @@ class ProcessModel(MLModel):
     # Implemented.
     def predict(
         self, input: list[list[str]]
-    ) -> tuple[SequenceLike, dict[str, dict[str, Any]]]:
+    ) -> tuple[SequenceLike, dict[str, dict[str, npt.NDArray[Any]]]]:
         """
         Prediction works by setting the input for the external process, executing it, and processing the output file.
         Assumptions:
           - Input will be one or more lists of files to be passed to the process to the DEFAULT_INPUT_FOLDER folder.
           - Output will be in a CSV output file defined in the constant DEFAULT_OUTPUT_FILE.
-          - Results will be returned as an list, and extra data as a dict keyed by filename, with a dict each keyed by column.
+          - Results will be returned as an list, and extra data as a dict keyed by filename, with a dict each of typed column arrays keyed by column.
         """
         # TODO: This only support passing files. There is currently no support for other types of inputs.
         if len(self.command) == 0:
@@ -16,8 +16,10 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Optional
 
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 from statsmodels.regression.linear_model import PredictionResults
 from statsmodels.tsa.arima.model import ARIMA, ARIMAResults
@@ -31,6 +33,9 @@ class TimeSeriesModel(MLModel):
 
     model: ARIMAResults
 
+    _forecasts: Optional[dict[int, tuple[float, float]]] = None
+    """Cached pdf params predicted for each interval, by its timestamp in ns, until the model gets new observations."""
+
     # Implemented.
     def create_model(
         self, time_intervals, aggregated_history, interval_unit, params
@@ -55,6 +60,7 @@ class TimeSeriesModel(MLModel):
         model = ARIMA(dataframe, freq=interval_unit, order=model_order)
         fit_model: ARIMAResults = model.fit()
         self.model = fit_model
+        self._forecasts = None
 
     # Implemented.
     def save_to_file(self, model_filename: str):
@@ -63,6 +69,34 @@ class TimeSeriesModel(MLModel):
     # Implemented.
     def load_from_file(self, model_filename: str):
         self.model = ARIMAResults.load(model_filename)
+        self._forecasts = None
+
+    def add_observations(
+        self, input: TimeSeries, keep_history: bool = False, refit: bool = False
+    ):
+        """
+        Adds the aggregated values of new intervals, which have to follow the last one in the model, so that predictions for later intervals
+        are forecasted from them, without fitting the model again. By default the model is only extended with the new observations, which
+        costs the same no matter how much history it has; keep_history appends them instead, keeping all previous ones, as needed to refit.
+        """
+        if input.get_num_intervals() == 0:
+            return
+
+        # The new observations use the frequency of the model, which may be a calendar one (e.g., "W" or "MS") that doesn't match the step.
+        freq = getattr(self.model.model._index, "freq", None)
+        if freq is None:
+            freq = pd.tseries.frequencies.to_offset(
+                pd.Timedelta(input.step_ns, unit="ns")
+            )
+        dataframe = pd.DataFrame(
+            {"Values": input.get_aggregated()},
+            index=pd.DatetimeIndex(input.get_time_intervals(), freq=freq),
+        )
+        if keep_history or refit:
+            self.model = self.model.append(dataframe, refit=refit)
+        else:
+            self.model = self.model.extend(dataframe)
+        self._forecasts = None
 
     # Implemented.
     def predict(
@@ -70,18 +104,28 @@ class TimeSeriesModel(MLModel):
     ) -> tuple[TimeSeries, dict[str, dict[str, Any]]]:
         """Creates the prediction data, for now only pdf params, based on the fit model."""
         intervals = input.get_time_intervals()
-        start_interval = intervals[0]
-        end_interval = intervals[len(intervals) - 1]
-
-        # Predict the pdf params for each time interval in the series.
-        pdf_params = _get_prediction_params(
-            self.model, start_interval, end_interval
-        )
+        if self._forecasts is None:
+            self._forecasts = {}
+
+        # Predict the pdf params for each time interval in the series, unless all of them were already predicted.
+        interval_keys = intervals.asi8.tolist()
+        if all(key in self._forecasts for key in interval_keys):
+            means = np.array([self._forecasts[key][0] for key in interval_keys])
+            std_devs = np.array(
+                [self._forecasts[key][1] for key in interval_keys]
+            )
+        else:
+            means, std_devs = _get_prediction_params(
+                self.model, intervals[0], intervals[len(intervals) - 1]
+            )
+            self._forecasts.update(
+                zip(interval_keys, zip(means.tolist(), std_devs.tolist()))
+            )
 
         # Return a time series object with the same intervals plus the pdf params set for each.
         ts_predictions = TimeSeries()
-        ts_predictions.set_time_intervals(input.get_time_intervals())
-        ts_predictions.set_pdf_params(pdf_params)
+        ts_predictions.copy_time_intervals(input)
+        ts_predictions.set_pdf_param_arrays(means, std_devs)
         return ts_predictions, {}
 
 
@@ -89,21 +133,17 @@ def _get_prediction_params(
     fit_model: ARIMAResults,
     start_interval: pd.Timestamp,
     end_interval: pd.Timestamp,
-) -> list[Any]:
-    """Gets the prediction params for the given intervals."""
+) -> tuple[npt.NDArray[Any], npt.NDArray[Any]]:
+    """Gets the prediction params for the given intervals, as arrays of means and standard deviations."""
     print(f"Intervals to predict: {start_interval} to {end_interval}")
     forecasts: PredictionResults = fit_model.get_prediction(
         start=start_interval, end=end_interval
     )
 
-    pdf_params = []
     confidence_level = 0.68
     alpha = 1 - confidence_level
     summary = forecasts.summary_frame(alpha=alpha)
     print(summary)
-    for _, row in summary.iterrows():
-        mu = row["mean"]
-        sigma = row["mean_ci_upper"] - mu
-        pdf_params.append({"mean": mu, "std_dev": sigma})
-
-    return pdf_params
+    means = summary["mean"].to_numpy(dtype=float)
+    std_devs = summary["mean_ci_upper"].to_numpy(dtype=float) - means
+    return means, std_devs
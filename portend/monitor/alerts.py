@@ -20,10 +20,21 @@ import math
 import typing
 from typing import Any, Dict, Optional
 
+import numpy as np
+import pandas as pd
+
 from portend.analysis.analyzer import calculate_metrics
 from portend.analysis.predictions import Predictions
+from portend.analysis.time_series import ts_analyzer
+from portend.analysis.time_series.streaming import (
+    GrowingArray,
+    StreamingTimeSeries,
+)
+from portend.analysis.time_series.timeseries import TimeSeries
 from portend.datasets.dataset import DataSet
 from portend.metrics.basic import BasicMetric
+from portend.metrics.metric import MetricResult
+from portend.models.ts_model import TimeSeriesModel
 from portend.utils.logging import print_and_log
 
 ALERT_LEVEL_NONE = "none"
@@ -154,21 +165,38 @@ def calculate_alert_level(
         datasets, [prediction], config["metrics"], metric_cache=metrics_cache
     )
 
-    # We go over the metrics, assuming they are ordered, and first one with a non "none" alert level will be used.
-    alert_level = ALERT_LEVEL_NONE
+    # We assume we should get only one result per metric here, in the Monitor in operations.
+    metric_values: list[tuple[str, Any]] = []
     for metric in metric_results["metrics"]:
         metric_name = str(metric["name"])
         curr_metric_results = typing.cast(Dict[str, float], metric["results"])
-
-        # We assume we should get only one result here, in the Monitor in operations.
         if len(curr_metric_results) != 1:
             raise Exception(
                 f"Expected one result for metric {metric_name}, got {len(curr_metric_results)}"
             )
-        metric_result = curr_metric_results[next(iter(curr_metric_results))]
+        metric_values.append(
+            (metric_name, curr_metric_results[next(iter(curr_metric_results))])
+        )
+
+    return select_alert_level(metric_values, config["alerts"])
+
+
+def select_alert_level(
+    metric_values: list[tuple[str, Any]],
+    alerts_config: dict[str, list[dict[str, Any]]],
+) -> str:
+    """
+    Returns the alert level for the first threshold matched by the first metric that matches one, given the metric names and values, in order.
 
+    :param metric_values: A list of the name and result value of each metric, ordered from the most to least important.
+    :param alerts_config: A dictionary with the thresholds and alert levels for each metric name, ordered from most critical to least.
+    :return: A string indicating the alert level, or the string "none" if no alert level is found.
+    """
+    # We go over the metrics, assuming they are ordered, and first one with a non "none" alert level will be used.
+    alert_level = ALERT_LEVEL_NONE
+    for metric_name, metric_result in metric_values:
         # Ignore metrics not configured with alerts.
-        if metric_name not in config["alerts"]:
+        if metric_name not in alerts_config:
             print_and_log(
                 f"Ignoring metric {metric_name} since was not found in list of configured alerts."
             )
@@ -178,7 +206,7 @@ def calculate_alert_level(
         print_and_log(
             f"Analyzing alert levels for metric {metric_name}, value {metric_result}"
         )
-        alerts: list[dict[str, Any]] = config["alerts"][metric_name]
+        alerts: list[dict[str, Any]] = alerts_config[metric_name]
         for threshold in alerts:
             if metric_result < threshold["less_than"]:
                 # If we matched a threshold, store that alert level and stop looping over following thresholds.
@@ -193,3 +221,107 @@ def calculate_alert_level(
             break
 
     return alert_level
+
+
+class TimeSeriesMonitor:
+    """
+    Monitor for time-series metrics in operations. Samples are aggregated into time intervals as they arrive, and each interval is
+    evaluated with the configured TSMetrics once it is closed, using the predictions of the time-series model for it.
+    """
+
+    def __init__(
+        self,
+        config: dict[str, Any],
+        ts_model: Optional[TimeSeriesModel] = None,
+    ):
+        """
+        :param config: The monitor config, with "metrics" and "alerts" as in calculate_alert_level, plus a "time_series" section with
+            "time_interval" ("starting_interval", "interval_unit"), "ts_model" and, optionally, "allowed_late_intervals" and "incremental_model".
+        :param ts_model: The time-series model to use; if not given, it is loaded from the "ts_model" path in the config.
+        """
+        ts_config: Optional[dict[str, Any]] = config.get("time_series")
+        if ts_config is None:
+            raise Exception("Time series configuration is missing.")
+        time_interval: Optional[dict[str, Any]] = ts_config.get("time_interval")
+        if time_interval is None:
+            raise Exception("Time interval configuration is missing.")
+
+        self.config = config
+        # Intervals start at the starting interval, so that samples arriving late for the first intervals are still aggregated.
+        starting_interval = time_interval.get("starting_interval")
+        self.stream = StreamingTimeSeries(
+            starting_interval,
+            time_interval.get("interval_unit"),
+            int(ts_config.get("allowed_late_intervals", 0)),
+            origin_timestamp=pd.to_datetime(starting_interval).value,
+        )
+
+        if ts_model is None:
+            ts_model = TimeSeriesModel()
+            ts_model.load_from_file(typing.cast(str, ts_config.get("ts_model")))
+        self.ts_model = ts_model
+        self.incremental_model = ts_config.get("incremental_model") == "on"
+
+        # Predictions for closed intervals, grown as intervals are closed.
+        self.ts_predictions = TimeSeries()
+        self._pdf_means = GrowingArray(np.float64)
+        self._pdf_std_devs = GrowingArray(np.float64)
+
+        self.metrics = ts_analyzer.load_metrics(
+            self.stream.time_series, self.ts_predictions, config["metrics"]
+        )
+
+    def add_sample(self, timestamp: int, value: Any) -> list[dict[str, Any]]:
+        """
+        Adds the model output for a sample, with its timestamp in ns. Returns the results for each interval closed by it, if any, with the
+        interval, the metric results and the alert level.
+        """
+        return self._evaluate_intervals(self.stream.push(timestamp, value))
+
+    def flush(self) -> list[dict[str, Any]]:
+        """Closes and evaluates all pending intervals, e.g., when operations end. Returns their results."""
+        return self._evaluate_intervals(self.stream.flush())
+
+    def _evaluate_intervals(self, intervals: range) -> list[dict[str, Any]]:
+        """Predicts the pdf params for the given newly closed intervals, and calculates their metrics and alert levels."""
+        if len(intervals) == 0:
+            return []
+
+        closed_time_series = self.stream.get_intervals(intervals)
+        predictions, _ = self.ts_model.predict(closed_time_series)
+        self._pdf_means.extend(predictions.get_pdf_means())
+        self._pdf_std_devs.extend(predictions.get_pdf_std_devs())
+        self.ts_predictions.copy_time_intervals(self.stream.time_series)
+        self.ts_predictions.set_pdf_param_arrays(
+            self._pdf_means.get_view(), self._pdf_std_devs.get_view()
+        )
+
+        results: list[dict[str, Any]] = []
+        for interval_index in intervals:
+            metric_results = ts_analyzer.calculate_interval_metrics(
+                self.metrics, interval_index
+            )
+            alert_level = select_alert_level(
+                [
+                    (
+                        metric[MetricResult.METRIC_NAME_KEY],
+                        metric[MetricResult.METRIC_RESULTS_KEY],
+                    )
+                    for metric in metric_results
+                ],
+                self.config["alerts"],
+            )
+            results.append(
+                {
+                    "interval": self.stream.time_series.get_time_interval(
+                        interval_index
+                    ).timestamp(),
+                    "metrics": metric_results,
+                    "alert_level": alert_level,
+                }
+            )
+
+        # Add the observed intervals to the model, so the next ones are forecasted from them.
+        if self.incremental_model:
+            self.ts_model.add_observations(closed_time_series)
+        return results
@@ -68,12 +68,21 @@ def get_predictions(
     predictions_input = dataset_config.get("predictions_input")
     if predictions_input is None and args.pfolder is None and model is not None:
         print_and_log("Predicting for dataset inputs...")
-        prediction = analyzer.predict(
-            model,
-            model_input=full_dataset.get_model_inputs(),
-            model_output=full_dataset.get_model_output(),
-            class_params=config.get("classification"),
-        )
+        predict_batch_size = config.get("model").get("predict_batch_size")
+        if predict_batch_size is not None:
+            prediction = analyzer.predict_in_batches(
+                model,
+                full_dataset,
+                int(predict_batch_size),
+                class_params=config.get("classification"),
+            )
+        else:
+            prediction = analyzer.predict(
+                model,
+                model_input=full_dataset.get_model_inputs(),
+                model_output=full_dataset.get_model_output(copy=False),
+                class_params=config.get("classification"),
+            )
         print_and_log("Finished predicting")
         load_mode = False
     else:
@@ -168,10 +177,14 @@ def main():
                 full_dataset,
                 prediction,
                 output_filename=dataset_config.get("predictions_output"),
+                compact=bool(dataset_config.get("compact_output", False)),
             )
         elif mode == "label":
             analysis_io.save_updated_dataset(
-                full_dataset, prediction, dataset_config.get("labelled_output")
+                full_dataset,
+                prediction,
+                dataset_config.get("labelled_output"),
+                compact=bool(dataset_config.get("compact_output", False)),
             )
         else:
             print_and_log("Unsupported mode: " + mode)
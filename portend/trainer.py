@@ -26,6 +26,7 @@ from portend.datasets import dataset_loader
 from portend.datasets.dataset import DataSet
 from portend.models import ml_model
 from portend.models.ts_model import TimeSeriesModel
+from portend.training import ts_order_search
 from portend.training.model_trainer import ModelTrainer
 from portend.utils import setup
 from portend.utils.logging import print_and_log
@@ -102,14 +103,23 @@ def main():
             f"Finished aggregating data, number of aggregated intervals: {time_series.get_num_intervals()}"
         )
 
-        print_and_log("Training time-series model")
-        ts_model = TimeSeriesModel()
-        ts_model.create_model(
-            time_series.get_time_intervals(),
-            time_series.get_aggregated(),
-            time_interval_params.get("interval_unit"),
-            config.get("ts_hyper_parameters"),
-        )
+        ts_hyper_parameters = config.get("ts_hyper_parameters")
+        if "order_search" in ts_hyper_parameters:
+            # Search for the best order among several candidates, fitting them on the same aggregated data.
+            ts_model, _, _ = ts_order_search.search_model_order(
+                time_series,
+                time_interval_params.get("interval_unit"),
+                ts_hyper_parameters.get("order_search"),
+            )
+        else:
+            print_and_log("Training time-series model")
+            ts_model = TimeSeriesModel()
+            ts_model.create_model(
+                time_series.get_time_intervals(),
+                time_series.get_aggregated(),
+                time_interval_params.get("interval_unit"),
+                ts_hyper_parameters,
+            )
 
         print_and_log("Finished training time-series model, saving it now.")
         ts_model.save_to_file(config.get("ts_output_model"))
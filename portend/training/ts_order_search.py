@@ -0,0 +1,200 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict
+
+import numpy as np
+import numpy.typing as npt
+
+from portend.analysis.time_series.timeseries import TimeSeries
+from portend.models.ts_model import TimeSeriesModel
+from portend.utils.logging import print_and_log
+
+CRITERION_AIC = "aic"
+CRITERION_BIC = "bic"
+CRITERION_HOLDOUT = "holdout"
+CRITERIA = [CRITERION_AIC, CRITERION_BIC, CRITERION_HOLDOUT]
+DEFAULT_HOLDOUT_INTERVALS = 10
+ORDER_KEYS = ["order_p", "order_q", "order_d"]
+
+
+def get_candidate_params(search_config: dict[str, Any]) -> list[dict[str, int]]:
+    """Returns the ts_hyper_parameters for each combination of the orders listed in the search config."""
+    order_values: list[list[int]] = []
+    for order_key in ORDER_KEYS:
+        values = search_config.get(order_key, [0])
+        if not isinstance(values, list):
+            values = [values]
+        order_values.append([int(value) for value in values])
+    return [
+        dict(zip(ORDER_KEYS, orders))
+        for orders in itertools.product(*order_values)
+    ]
+
+
+def search_model_order(
+    time_series: TimeSeries,
+    interval_unit: str,
+    search_config: dict[str, Any],
+) -> tuple[TimeSeriesModel, dict[str, int], list[dict[str, Any]]]:
+    """
+    Fits a time-series model for each candidate order in the search config, in a process pool, and ranks them by the configured
+    criterion, lower being better: AIC or BIC of the model fit on all intervals, or the RMSE of forecasting the last holdout intervals
+    with a model fit on the previous ones. Returns the best model fit on all intervals, its params, and the score of each candidate.
+    """
+    criterion = str(search_config.get("criterion", CRITERION_AIC)).lower()
+    if criterion not in CRITERIA:
+        raise Exception(
+            f"Unsupported order search criterion: {criterion}, it has to be one of {CRITERIA}"
+        )
+    holdout_intervals = 0
+    if criterion == CRITERION_HOLDOUT:
+        holdout_intervals = int(
+            search_config.get("holdout_intervals", DEFAULT_HOLDOUT_INTERVALS)
+        )
+        if not 0 < holdout_intervals < time_series.get_num_intervals():
+            raise Exception(
+                f"Invalid number of holdout intervals {holdout_intervals} for {time_series.get_num_intervals()} intervals."
+            )
+    candidates = get_candidate_params(search_config)
+    if (
+        criterion != CRITERION_HOLDOUT
+        and len(set(candidate["order_d"] for candidate in candidates)) > 1
+    ):
+        # Differencing changes the data the model is fit on, so AIC and BIC can't be compared across order_d values.
+        raise Exception(
+            f"Criterion {criterion} can't compare candidates with different order_d values, use {CRITERION_HOLDOUT} instead."
+        )
+    num_workers = search_config.get("num_workers")
+    num_workers = int(num_workers) if num_workers else os.cpu_count() or 1
+
+    # Fit all candidates in parallel, each process only gets the aggregated values and the intervals.
+    print_and_log(
+        f"Searching time-series model order among {len(candidates)} candidates, with {num_workers} processes, by {criterion}"
+    )
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        scores = list(
+            executor.map(
+                _score_candidate,
+                itertools.repeat(time_series.get_time_intervals().asi8),
+                itertools.repeat(time_series.get_aggregated()),
+                itertools.repeat(interval_unit),
+                candidates,
+                itertools.repeat(criterion),
+                itertools.repeat(holdout_intervals),
+            )
+        )
+
+    results = _rank_candidates(candidates, scores, criterion)
+    best_params = typing.cast(Dict[str, int], results[0]["params"])
+    if not math.isfinite(results[0][criterion]):
+        raise Exception("Could not fit a time-series model for any candidate.")
+
+    # Fit the best candidate on all intervals, which is the model to keep.
+    print_and_log(f"Best time-series model order: {best_params}")
+    ts_model = TimeSeriesModel()
+    ts_model.create_model(
+        time_series.get_time_intervals(),
+        time_series.get_aggregated(),
+        interval_unit,
+        best_params,
+    )
+    return ts_model, best_params, results
+
+
+def _rank_candidates(
+    candidates: list[dict[str, int]], scores: list[float], criterion: str
+) -> list[dict[str, Any]]:
+    """Returns the params and score of each candidate, from best to worst. Scores that are not finite, such as NaN, rank last."""
+    results: list[dict[str, Any]] = []
+    finite_scores = [
+        score if math.isfinite(score) else math.inf for score in scores
+    ]
+    for params, score in sorted(
+        zip(candidates, finite_scores), key=lambda x: x[1]
+    ):
+        print_and_log(f"Candidate {params}: {criterion} = {score}")
+        results.append({"params": params, criterion: score})
+    return results
+
+
+def _score_candidate(
+    time_intervals: npt.NDArray[np.int64],
+    aggregated: npt.NDArray[Any],
+    interval_unit: str,
+    params: dict[str, int],
+    criterion: str,
+    holdout_intervals: int,
+) -> float:
+    """Fits a candidate and returns its score for the criterion, or infinite if it could not be fit."""
+    time_series = TimeSeries()
+    time_series.set_time_intervals(time_intervals)
+    time_series.aggregated = aggregated
+    try:
+        if criterion == CRITERION_HOLDOUT:
+            return _calculate_holdout_error(
+                time_series, interval_unit, params, holdout_intervals
+            )
+        ts_model = TimeSeriesModel()
+        ts_model.create_model(
+            time_series.get_time_intervals(),
+            time_series.get_aggregated(),
+            interval_unit,
+            params,
+        )
+        return float(getattr(ts_model.model, criterion))
+    except Exception as ex:
+        print_and_log(
+            f"WARNING: Could not fit time-series model for {params}: {type(ex).__name__}: {str(ex)}"
+        )
+        return math.inf
+
+
+def _calculate_holdout_error(
+    time_series: TimeSeries,
+    interval_unit: str,
+    params: dict[str, int],
+    holdout_intervals: int,
+) -> float:
+    """Fits a model without the last holdout intervals, and returns the RMSE of its forecast for them."""
+    num_train_intervals = time_series.get_num_intervals() - holdout_intervals
+    ts_model = TimeSeriesModel()
+    ts_model.create_model(
+        time_series.get_time_intervals()[:num_train_intervals],
+        time_series.get_aggregated()[:num_train_intervals],
+        interval_unit,
+        params,
+    )
+
+    holdout = TimeSeries()
+    holdout._set_time_intervals(
+        time_series.start_ns + time_series.step_ns * num_train_intervals,
+        time_series.step_ns,
+        holdout_intervals,
+    )
+    predictions, _ = ts_model.predict(holdout)
+    errors = (
+        time_series.get_aggregated()[num_train_intervals:]
+        - predictions.get_pdf_means()
+    )
+    return float(np.sqrt(np.mean(errors**2)))
@@ -17,17 +17,20 @@
 from __future__ import annotations
 
 import os
-import typing
 from typing import Any
 
+import numpy.typing as npt
 import pandas as pd
 
 
-def load_csv_data(output_files: list[str]) -> dict[str, dict[str, Any]]:
-    """Loads data from a list of CSV files into a dictionary, indexed by filename."""
-    csv_data_by_file: dict[str, dict[str, Any]] = {}
+def load_csv_data(
+    output_files: list[str],
+) -> dict[str, dict[str, npt.NDArray[Any]]]:
+    """Loads data from a list of CSV files into a dictionary, indexed by filename, with one typed array per column."""
+    csv_data_by_file: dict[str, dict[str, npt.NDArray[Any]]] = {}
     for file_path in output_files:
-        csv_data_by_file[os.path.basename(file_path)] = typing.cast(
-            dict[str, Any], pd.read_csv(file_path).to_dict()
-        )
+        csv_df = pd.read_csv(file_path)
+        csv_data_by_file[os.path.basename(file_path)] = {
+            str(column): csv_df[column].to_numpy() for column in csv_df.columns
+        }
     return csv_data_by_file
@@ -17,16 +17,18 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Iterator, Optional
 
 import pandas as pd
 
 from portend.utils import files as file_utils
+from portend.utils.dataframe_storage import DEFAULT_CHUNK_SIZE, get_storage
 
 # Dataframe handler helper functions.
 
 
 def merge_files(file1: str, file2: str, output_filename: str):
-    """Merges data from two JSON files into one."""
+    """Merges data from two dataset files into one."""
     dataframe1 = load_dataframe_from_file(file1)
     dataframe2 = load_dataframe_from_file(file2)
 
@@ -36,32 +38,51 @@ def merge_files(file1: str, file2: str, output_filename: str):
     save_dataframe_to_file(merged_df, output_filename)
 
 
-def load_dataframe_from_file(filename: str) -> pd.DataFrame:
-    """Loads a JSON file into a dataframe, with default params and log output."""
+def load_dataframe_from_file(
+    filename: str, excluded_columns: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """Loads a file into a dataframe, with the format given by its extension (JSON by default), and log output.
+    If excluded_columns are given, they are skipped, without keeping them all in memory at any point.
+    """
     print("Loading input file: " + filename, flush=True)
     if not Path(filename).exists():
         raise IOError(f"Dataframe on path {filename} does not exist.")
-    data_df = pd.read_json(filename)
+    storage = get_storage(filename)
+    data_df = (
+        storage.load_without_columns(filename, excluded_columns)
+        if excluded_columns
+        else storage.load(filename)
+    )
     print("Done loading data. Rows: " + str(data_df.shape[0]), flush=True)
     return data_df
 
 
-def save_dataframe_to_file(dataframe: pd.DataFrame, filename: str):
-    """Stores a pandas dataframe to a JSON file, with default params and log output."""
+def iter_dataframe_chunks(
+    filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Loads a file incrementally, as dataframes of up to chunk_size rows, with the format given by its extension."""
+    print("Loading input file in chunks: " + filename, flush=True)
+    if not Path(filename).exists():
+        raise IOError(f"Dataframe on path {filename} does not exist.")
+    return get_storage(filename).iter_chunks(filename, chunk_size)
+
+
+def save_dataframe_to_file(
+    dataframe: pd.DataFrame, filename: str, compact: bool = False
+):
+    """Stores a pandas dataframe to a file, with the format given by its extension (JSON by default), and log output.
+    If compact is true, text formats are written without indentation."""
     # Ensure output folder exists.
     file_utils.create_folder_for_file(filename)
 
+    storage = get_storage(filename)
     print(
-        "Saving DataFrame to JSON file "
+        f"Saving DataFrame to {storage.format_name} file "
         + filename
         + " (rows: "
         + str(dataframe.shape[0])
         + ")",
         flush=True,
     )
-    json_data = dataframe.to_json(
-        orient="records", indent=4, date_format="epoch", date_unit="ms"
-    ).replace("\\/", "/")
-    with open(filename, "w") as output_file:
-        output_file.write(json_data)
-    print(f"Finished saving JSON file: {filename}", flush=True)
+    storage.save(dataframe, filename, compact)
+    print(f"Finished saving {storage.format_name} file: {filename}", flush=True)
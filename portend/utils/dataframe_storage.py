@@ -0,0 +1,402 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from portend.utils.files import array_to_object_column, object_column_to_array
+
+# Dataframe storage formats, selected by file extension.
+
+DEFAULT_EXTENSION = ".json"
+DEFAULT_CHUNK_SIZE = 10000
+JSON_INDENT = 4
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+class DataFrameStorage:
+    """Base class for a file format that dataframes can be loaded from and saved to."""
+
+    format_name = "generic"
+
+    def load(self, filename: str) -> pd.DataFrame:
+        """Loads a dataframe from the given file."""
+        raise NotImplementedError("Load method not implemented")
+
+    def save(
+        self, dataframe: pd.DataFrame, filename: str, compact: bool = False
+    ):
+        """Saves the dataframe to the given file. Compact only applies to text formats."""
+        raise NotImplementedError("Save method not implemented")
+
+    # May be overriden by formats that can skip columns without reading them.
+    def load_without_columns(
+        self, filename: str, excluded_columns: list[str]
+    ) -> pd.DataFrame:
+        """Loads a dataframe without the given columns. By default it is read in chunks, dropping the columns from each one."""
+        chunks = [
+            chunk.drop(columns=excluded_columns, errors="ignore")
+            for chunk in self.iter_chunks(filename)
+        ]
+        if len(chunks) == 0:
+            return self.load(filename).drop(
+                columns=excluded_columns, errors="ignore"
+            )
+        return pd.concat(chunks, ignore_index=True)
+
+    # May be overriden by formats that can be read incrementally.
+    def iter_chunks(
+        self, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        """Returns dataframes of up to chunk_size rows each, in file order."""
+        dataframe = self.load(filename)
+        for start in range(0, len(dataframe.index), chunk_size):
+            yield dataframe.iloc[start : start + chunk_size].reset_index(
+                drop=True
+            )
+
+
+class JSONStorage(DataFrameStorage):
+    """JSON list of records, the default format. Written in chunks, to keep memory use bounded."""
+
+    format_name = "JSON"
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def load(self, filename: str) -> pd.DataFrame:
+        return pd.read_json(filename)
+
+    def save(
+        self, dataframe: pd.DataFrame, filename: str, compact: bool = False
+    ):
+        separator = "," if compact else ",\n"
+        wrote_records = False
+        with open(filename, "w") as output_file:
+            output_file.write("[" if compact else "[\n")
+            for start in range(0, len(dataframe.index), self.chunk_size):
+                records = _records_to_json(
+                    dataframe.iloc[start : start + self.chunk_size], compact
+                )
+                if wrote_records:
+                    output_file.write(separator)
+                output_file.write(records)
+                wrote_records = True
+            output_file.write("]" if compact else "\n]")
+
+    # Overriden.
+    def iter_chunks(
+        self, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        """Parses records incrementally, only holding chunk_size of them in memory at a time."""
+        with open(filename, "r") as input_file:
+            records: list[str] = []
+            for record in _iter_json_records(input_file):
+                records.append(record)
+                if len(records) == chunk_size:
+                    yield _json_records_to_dataframe(records)
+                    records = []
+            if len(records) > 0:
+                yield _json_records_to_dataframe(records)
+
+
+class JSONLinesStorage(DataFrameStorage):
+    """Compact JSON Lines format, with one record per line."""
+
+    format_name = "JSON Lines"
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def load(self, filename: str) -> pd.DataFrame:
+        return pd.read_json(filename, lines=True)
+
+    def save(
+        self, dataframe: pd.DataFrame, filename: str, compact: bool = False
+    ):
+        with open(filename, "w") as output_file:
+            for start in range(0, len(dataframe.index), self.chunk_size):
+                chunk = dataframe.iloc[start : start + self.chunk_size]
+                output_file.write(
+                    chunk.to_json(
+                        orient="records",
+                        lines=True,
+                        date_format="epoch",
+                        date_unit="ms",
+                    ).replace("\\/", "/")
+                )
+                output_file.write("\n")
+
+    # Overriden.
+    def iter_chunks(
+        self, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        with pd.read_json(filename, lines=True, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk.reset_index(drop=True)
+
+
+class ParquetStorage(DataFrameStorage):
+    """Apache Parquet columnar format. Requires pyarrow."""
+
+    format_name = "Parquet"
+
+    def load(self, filename: str) -> pd.DataFrame:
+        _check_pyarrow(self.format_name)
+        return pd.read_parquet(filename)
+
+    def save(
+        self, dataframe: pd.DataFrame, filename: str, compact: bool = False
+    ):
+        _check_pyarrow(self.format_name)
+        dataframe.reset_index(drop=True).to_parquet(filename, index=False)
+
+
+class FeatherStorage(DataFrameStorage):
+    """Apache Arrow IPC (Feather) format. Requires pyarrow."""
+
+    format_name = "Feather"
+
+    def load(self, filename: str) -> pd.DataFrame:
+        _check_pyarrow(self.format_name)
+        return pd.read_feather(filename)
+
+    def save(
+        self, dataframe: pd.DataFrame, filename: str, compact: bool = False
+    ):
+        _check_pyarrow(self.format_name)
+        dataframe.reset_index(drop=True).to_feather(filename)
+
+
+class NPZStorage(DataFrameStorage):
+    """
+    NumPy NPZ archive with one array per column. Columns where every cell is an array of the same shape
+    (e.g., image bands) are stored as a single stacked n-dimensional array. Other non-scalar columns are stored as JSON strings.
+    """
+
+    format_name = "NPZ"
+
+    COLUMNS_KEY = "__columns__"
+    KINDS_KEY = "__kinds__"
+    NULL_MASK_KEY_SUFFIX = "_nulls"
+    SCALAR_KIND = "scalar"
+    ARRAY_KIND = "array"
+    JSON_KIND = "json"
+
+    def load(self, filename: str) -> pd.DataFrame:
+        return self.load_without_columns(filename, [])
+
+    # Overriden.
+    def load_without_columns(
+        self, filename: str, excluded_columns: list[str]
+    ) -> pd.DataFrame:
+        """Only reads the arrays of the columns that are not excluded."""
+        columns: dict[str, Any] = {}
+        with np.load(filename, allow_pickle=False) as npz_file:
+            column_names = [str(name) for name in npz_file[self.COLUMNS_KEY]]
+            kinds = [str(kind) for kind in npz_file[self.KINDS_KEY]]
+            for position, (column_name, kind) in enumerate(
+                zip(column_names, kinds)
+            ):
+                if column_name in excluded_columns:
+                    continue
+                values = npz_file[str(position)]
+                if kind == self.ARRAY_KIND:
+                    # Each cell is a view into the stacked array, no per-row copies.
+                    columns[column_name] = list(values)
+                elif kind == self.JSON_KIND:
+                    columns[column_name] = [json.loads(v) for v in values]
+                elif f"{position}{self.NULL_MASK_KEY_SUFFIX}" in npz_file.files:
+                    columns[column_name] = array_to_object_column(
+                        values,
+                        npz_file[f"{position}{self.NULL_MASK_KEY_SUFFIX}"],
+                    )
+                else:
+                    columns[column_name] = values
+        return pd.DataFrame(
+            columns,
+            columns=[
+                name for name in column_names if name not in excluded_columns
+            ],
+        )
+
+    def save(
+        self, dataframe: pd.DataFrame, filename: str, compact: bool = False
+    ):
+        arrays: dict[str, npt.NDArray[Any]] = {}
+        kinds: list[str] = []
+        for position, column_name in enumerate(dataframe.columns):
+            kind, values, null_mask = self._column_to_array(
+                dataframe[column_name]
+            )
+            arrays[str(position)] = values
+            if null_mask is not None:
+                arrays[f"{position}{self.NULL_MASK_KEY_SUFFIX}"] = null_mask
+            kinds.append(kind)
+        arrays[self.COLUMNS_KEY] = np.array(
+            [str(name) for name in dataframe.columns], dtype=str
+        )
+        arrays[self.KINDS_KEY] = np.array(kinds, dtype=str)
+        with open(filename, "wb") as output_file:
+            np.savez(output_file, **arrays)
+
+    def _column_to_array(
+        self, column: pd.Series[Any]
+    ) -> tuple[str, npt.NDArray[Any], Optional[npt.NDArray[np.bool_]]]:
+        """
+        Converts a column into an array that can be stored without pickling, and returns it with its kind, and the mask
+        of its missing values if it is a scalar column that has any.
+        """
+        values = column.to_numpy()
+        if values.dtype != object:
+            return self.SCALAR_KIND, values, None
+        if len(values) > 0 and all(
+            isinstance(value, (list, tuple, np.ndarray)) for value in values
+        ):
+            try:
+                return (
+                    self.ARRAY_KIND,
+                    np.stack([np.asarray(value) for value in values]),
+                    None,
+                )
+            except ValueError:
+                # Ragged arrays can't be stacked, store them as JSON instead.
+                return (
+                    self.JSON_KIND,
+                    np.array(
+                        [
+                            json.dumps(np.asarray(value).tolist())
+                            for value in values
+                        ],
+                        dtype=str,
+                    ),
+                    None,
+                )
+        if all(isinstance(value, dict) for value in values):
+            return (
+                self.JSON_KIND,
+                np.array([json.dumps(value) for value in values], dtype=str),
+                None,
+            )
+        # Other generic object columns, such as strings, or values mixed with missing ones, typed if possible.
+        scalar_values, null_mask, as_json = object_column_to_array(values)
+        return (
+            self.JSON_KIND if as_json else self.SCALAR_KIND,
+            scalar_values,
+            null_mask,
+        )
+
+
+def _records_to_json(dataframe: pd.DataFrame, compact: bool) -> str:
+    """Returns the JSON records of the given dataframe, without the enclosing list brackets."""
+    json_data = dataframe.to_json(
+        orient="records",
+        indent=None if compact else JSON_INDENT,
+        date_format="epoch",
+        date_unit="ms",
+    ).replace("\\/", "/")
+    return json_data[1:-1].strip("\n")
+
+
+def _iter_json_records(input_file: TextIO) -> Iterator[str]:
+    """Yields the text of each record in a JSON list, reading the file in buffered blocks."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    finished = False
+    while not finished:
+        block = input_file.read(READ_BUFFER_SIZE)
+        at_end = len(block) == 0
+        buffer = buffer[position:] + block
+        position = 0
+        while True:
+            # Skip whitespace and separators between records.
+            while position < len(buffer) and (
+                buffer[position].isspace() or buffer[position] == ","
+            ):
+                position += 1
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("JSON file does not contain a list.")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                finished = True
+                break
+            try:
+                _, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if at_end:
+                    raise
+                # Record is incomplete, read more data.
+                break
+            yield buffer[position:end]
+            position = end
+        if at_end and not finished:
+            raise ValueError("JSON list was not properly terminated.")
+
+
+def _json_records_to_dataframe(records: list[str]) -> pd.DataFrame:
+    """Parses the text of a list of JSON records into a dataframe, with the same conversions as a full load."""
+    return pd.read_json(io.StringIO("[" + ",".join(records) + "]"))
+
+
+def _check_pyarrow(format_name: str):
+    """Raises a clear error if the optional pyarrow dependency is not available."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise RuntimeError(
+            f"The {format_name} dataset format requires the pyarrow package, which is not installed."
+        )
+
+
+storages_by_extension: dict[str, DataFrameStorage] = {
+    ".json": JSONStorage(),
+    ".jsonl": JSONLinesStorage(),
+    ".ndjson": JSONLinesStorage(),
+    ".parquet": ParquetStorage(),
+    ".feather": FeatherStorage(),
+    ".arrow": FeatherStorage(),
+    ".npz": NPZStorage(),
+}
+"""Storage formats currently available, by lowercase file extension."""
+
+
+def register_storage(extension: str, storage: DataFrameStorage):
+    """Adds or replaces the storage format used for files with the given extension."""
+    storages_by_extension[extension.lower()] = storage
+
+
+def get_storage(filename: str) -> DataFrameStorage:
+    """Returns the storage format for the given file, based on its extension. Defaults to JSON."""
+    extension = Path(filename).suffix.lower()
+    return storages_by_extension.get(
+        extension, storages_by_extension[DEFAULT_EXTENSION]
+    )
@@ -26,25 +26,29 @@ GPS_KEY_NAME = "GPSInfo"
 
 
 def get_exif(file_name: str) -> Exif:
-    image: Image.Image = Image.open(file_name)
-    return image.getexif()
+    """Returns the EXIF data of the file. Sub-IFDs of some formats, like TIFF, are read lazily and are not available once the file is closed."""
+    with Image.open(file_name) as image:
+        return image.getexif()
 
 
 def get_exif_with_gps(file_name: str) -> dict[Any, Any]:
-    exif_data: Exif = get_exif(file_name)
     exif_gps = {}
-    if exif_data is not None:
-        gps_ifd = 0
-        for key, value in TAGS.items():
-            if value == GPS_KEY_NAME:
-                gps_ifd = key
-                break
+    # The GPS IFD has to be read while the file is open, since some formats (like TIFF) read it lazily from the file.
+    with Image.open(file_name) as image:
+        exif_data: Exif = image.getexif()
+        if exif_data is not None:
+            gps_ifd = 0
+            for key, value in TAGS.items():
+                if value == GPS_KEY_NAME:
+                    gps_ifd = key
+                    break
 
-        if gps_ifd != 0:
-            gps_info = exif_data.get_ifd(gps_ifd)
-            exif_gps = {
-                GPSTAGS.get(key, key): value for key, value in gps_info.items()
-            }
+            if gps_ifd != 0:
+                gps_info = exif_data.get_ifd(gps_ifd)
+                exif_gps = {
+                    GPSTAGS.get(key, key): value
+                    for key, value in gps_info.items()
+                }
 
     return exif_gps
 
@@ -18,14 +18,32 @@ from __future__ import annotations
 
 import datetime
 import json
+import math
 import os
 import shutil
 import typing
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
 
 from portend.utils.logging import print_and_log
 
+COLUMNS_KEY_SEPARATOR = "::"
+NULL_MASK_KEY_SUFFIX = f"{COLUMNS_KEY_SEPARATOR}__nulls__"
+JSON_KEY_SUFFIX = f"{COLUMNS_KEY_SEPARATOR}__json__"
+
+# Types of the values of object columns, as inferred by pandas, that can be stored as arrays of a numeric type.
+TYPED_OBJECT_DTYPES: dict[str, Any] = {
+    "integer": np.int64,
+    "boolean": np.bool_,
+    "floating": np.float64,
+    "mixed-integer-float": np.float64,
+}
+STRING_OBJECT_TYPES = ["string", "empty"]
+
 
 def _get_timestamped_name(file_path: str, prefix: str) -> str:
     """Returns a time-stamped name based on the give filename and prefix, in the same path."""
@@ -82,3 +100,106 @@ def load_json_file_to_dict(
     with open(file_path, "r") as infile:
         data = typing.cast(Dict[str, Any], json.load(infile))
     return data
+
+
+def _is_null(value: Any) -> bool:
+    """Returns whether the given cell value is missing, that is, None or NaN."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def object_column_to_array(
+    values: npt.NDArray[Any],
+) -> tuple[npt.NDArray[Any], Optional[npt.NDArray[np.bool_]], bool]:
+    """
+    Converts a column into an array that can be stored without pickling, and returns it with the mask of its missing values,
+    if any, and whether it was stored as JSON. Object columns whose values are all numbers, booleans or strings are stored
+    with that type, only keeping their values that are not missing, so that array_to_object_column can restore these as None.
+    Object columns with mixed or other values are stored as the JSON string of each value, to be restored with json_array_to_object_column.
+    """
+    if values.dtype != object:
+        return values, None, False
+    null_mask = np.array([_is_null(value) for value in values], dtype=bool)
+    non_null_values = values[~null_mask]
+    inferred_type = pd.api.types.infer_dtype(non_null_values, skipna=False)
+    if inferred_type in TYPED_OBJECT_DTYPES:
+        column_array = np.array(
+            non_null_values.tolist(), dtype=TYPED_OBJECT_DTYPES[inferred_type]
+        )
+    elif inferred_type in STRING_OBJECT_TYPES:
+        column_array = non_null_values.astype(str)
+    else:
+        json_values = [
+            json.dumps(None if _is_null(value) else value, default=str)
+            for value in values
+        ]
+        return np.array(json_values, dtype=str), None, True
+    return column_array, null_mask if null_mask.any() else None, False
+
+
+def array_to_object_column(
+    values: npt.NDArray[Any], null_mask: npt.NDArray[np.bool_]
+) -> npt.NDArray[Any]:
+    """Restores a column stored with object_column_to_array, with None in its missing positions."""
+    column = np.full(len(null_mask), None, dtype=object)
+    column[~null_mask] = values.tolist()
+    return column
+
+
+def json_array_to_object_column(values: npt.NDArray[Any]) -> npt.NDArray[Any]:
+    """Restores a column stored as JSON with object_column_to_array."""
+    column = np.empty(len(values), dtype=object)
+    column[:] = [json.loads(value) for value in values]
+    return column
+
+
+def save_columns_to_npz_file(
+    data: dict[str, dict[str, npt.NDArray[Any]]],
+    output_path: str,
+    data_name: str = "data",
+):
+    """Stores groups of typed columns into a single NPZ file, one array per group and column."""
+    print_and_log(f"Saving {data_name} to NPZ file : {output_path}")
+    create_folder_for_file(output_path)
+    arrays: dict[str, npt.NDArray[Any]] = {}
+    for group_name, columns in data.items():
+        for column_name, values in columns.items():
+            column_key = f"{group_name}{COLUMNS_KEY_SEPARATOR}{column_name}"
+            column_array, null_mask, as_json = object_column_to_array(
+                np.asarray(values)
+            )
+            arrays[column_key] = column_array
+            if null_mask is not None:
+                arrays[column_key + NULL_MASK_KEY_SUFFIX] = null_mask
+            if as_json:
+                arrays[column_key + JSON_KEY_SUFFIX] = np.array(True)
+    with open(output_path, "wb") as outfile:
+        np.savez(outfile, **arrays)
+    print_and_log("Finished saving NPZ file")
+
+
+def load_npz_file_to_columns(
+    file_path: str, data_name: str = "data"
+) -> dict[str, dict[str, npt.NDArray[Any]]]:
+    """Loads groups of typed columns from an NPZ file created with save_columns_to_npz_file."""
+    print_and_log(f"Loading {data_name} from NPZ file {file_path}")
+    if not Path(file_path).exists():
+        raise IOError(f"NPZ file on path {file_path} does not exist.")
+    data: dict[str, dict[str, npt.NDArray[Any]]] = {}
+    with np.load(file_path, allow_pickle=False) as npz_file:
+        for key in npz_file.files:
+            if key.endswith(NULL_MASK_KEY_SUFFIX) or key.endswith(
+                JSON_KEY_SUFFIX
+            ):
+                continue
+            group_name, column_name = key.split(COLUMNS_KEY_SEPARATOR, 1)
+            null_mask_key = key + NULL_MASK_KEY_SUFFIX
+            if key + JSON_KEY_SUFFIX in npz_file.files:
+                column = json_array_to_object_column(npz_file[key])
+            elif null_mask_key in npz_file.files:
+                column = array_to_object_column(
+                    npz_file[key], npz_file[null_mask_key]
+                )
+            else:
+                column = npz_file[key]
+            data.setdefault(group_name, {})[column_name] = column
+    return data
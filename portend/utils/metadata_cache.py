@@ -0,0 +1,101 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Optional
+
+SIZE_KEY = "size"
+MTIME_KEY = "mtime_ns"
+METADATA_KEY = "metadata"
+
+
+class FileMetadataCache:
+    """Metadata extracted from files, stored in a JSON file and only valid while the size and modification time of each file are the same."""
+
+    def __init__(self, cache_file: str):
+        """Loads the cache from the given file, if it exists."""
+        self.cache_file = cache_file
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._changed = False
+        if os.path.isfile(cache_file):
+            try:
+                with open(cache_file, "r") as infile:
+                    self._entries = json.load(infile)
+            except (ValueError, OSError) as ex:
+                print(
+                    f"Ignoring invalid metadata cache {cache_file}: {type(ex).__name__}: {str(ex)}"
+                )
+
+    def get(
+        self, path: str, size: int, mtime_ns: int
+    ) -> Optional[dict[str, Any]]:
+        """Returns the cached metadata for a file, or None if it is not cached or the file changed since."""
+        entry = self._entries.get(path)
+        if (
+            entry is None
+            or entry.get(SIZE_KEY) != size
+            or entry.get(MTIME_KEY) != mtime_ns
+        ):
+            return None
+        metadata = entry.get(METADATA_KEY)
+        return metadata if isinstance(metadata, dict) else None
+
+    def set(
+        self, path: str, size: int, mtime_ns: int, metadata: dict[str, Any]
+    ):
+        """Stores the metadata for a file, for its current size and modification time."""
+        self._entries[path] = {
+            SIZE_KEY: size,
+            MTIME_KEY: mtime_ns,
+            METADATA_KEY: metadata,
+        }
+        self._changed = True
+
+    def keep_only(self, paths: list[str]):
+        """Removes the entries for files not in the given list, e.g., because they were deleted."""
+        kept_entries = {
+            path: self._entries[path] for path in paths if path in self._entries
+        }
+        if len(kept_entries) != len(self._entries):
+            self._entries = kept_entries
+            self._changed = True
+
+    def save(self):
+        """Writes the cache to its file, if anything changed. A cache that can't be written is only reported, since it is optional."""
+        if not self._changed:
+            return
+        temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            folder = os.path.dirname(self.cache_file)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(temp_file, "w") as outfile:
+                json.dump(self._entries, outfile)
+            os.replace(temp_file, self.cache_file)
+        except OSError as ex:
+            print(
+                f"WARNING: Could not save metadata cache {self.cache_file}: {type(ex).__name__}: {str(ex)}"
+            )
+            if os.path.isfile(temp_file):
+                os.remove(temp_file)
+            return
+        self._changed = False
+        print(
+            f"Saved metadata cache for {len(self._entries)} files to {self.cache_file}"
+        )
@@ -0,0 +1,70 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from portend.analysis import analyzer
+from portend.datasets.dataset import DataSet
+from portend.models.ml_model import MLModel
+
+
+class DoublingModel(MLModel):
+    """Model that doubles its input, returning it as additional data, and keeps the size of each input it got."""
+
+    def __init__(self):
+        self.input_sizes: list[int] = []
+
+    def predict(self, input: Any) -> tuple[Any, dict[str, dict[str, Any]]]:
+        self.input_sizes.append(len(input[0]))
+        return input[0] * 2, {"data.csv": {"input": input[0]}}
+
+
+def create_dataset(num_samples: int) -> DataSet:
+    dataset = DataSet()
+    dataset.set_samples(
+        [{"id": str(i), "x": i, "y": i % 2} for i in range(num_samples)]
+    )
+    dataset.set_model_input_key("x")
+    dataset.set_model_output_key("y")
+    return dataset
+
+
+def test_predict_in_batches_matches_predict() -> None:
+    dataset = create_dataset(5)
+    model = DoublingModel()
+
+    predictions = analyzer.predict_in_batches(model, dataset, 2, None)
+    expected = analyzer.predict(
+        DoublingModel(),
+        dataset.get_model_inputs(),
+        dataset.get_model_output(),
+        None,
+    )
+
+    assert model.input_sizes == [2, 2, 1]
+    assert np.array_equal(
+        predictions.get_predictions(), expected.get_predictions()
+    )
+    assert np.array_equal(
+        predictions.get_expected_results(), expected.get_expected_results()
+    )
+    assert np.array_equal(
+        predictions.get_additional_data("data.csv")["input"], np.arange(5)
+    )
@@ -0,0 +1,92 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import numpy as np
+from scipy.stats import gaussian_kde, norm
+
+from portend.analysis.time_series.density import DensityEstimator
+
+RANGE_CONFIG = {"range_start": 0, "range_end": 40, "range_step": 0.25}
+
+
+def test_normal_pdf_cache() -> None:
+    estimator = DensityEstimator(dict(RANGE_CONFIG, pdf_cache_size=1))
+    params = {"mean": 10.0, "std_dev": 2.0}
+
+    dist = estimator.calculate_probability_distribution("normal", None, params)
+    cached_dist = estimator.calculate_probability_distribution(
+        "normal", None, params
+    )
+    estimator.calculate_probability_distribution(
+        "normal", None, {"mean": 11.0, "std_dev": 2.0}
+    )
+
+    assert cached_dist is dist
+    assert np.array_equal(dist, norm.pdf(estimator.dist_range, 10.0, 2.0))
+    assert (
+        estimator.calculate_probability_distribution("normal", None, params)
+        is not dist
+    )
+
+
+def test_histogram() -> None:
+    estimator = DensityEstimator(RANGE_CONFIG)
+    data = np.array([0.0, 0.1, 10.0, 10.1, 50])
+
+    dist = estimator.calculate_probability_distribution("histogram", data, {})
+
+    assert dist[0] == 2 / (5 * 0.25)
+    assert dist[40] == 2 / (5 * 0.25)
+    assert dist[41] == 0
+    assert np.isclose(dist.sum() * 0.25, 0.8)
+
+
+def test_kernel_density_matches_gaussian_kde() -> None:
+    estimator = DensityEstimator(RANGE_CONFIG)
+    data = np.random.default_rng(0).normal(20, 4, 1000)
+
+    dist = estimator.calculate_probability_distribution(
+        "kernel_density", data, {}
+    )
+
+    assert np.allclose(
+        dist, gaussian_kde(data)(estimator.dist_range), atol=1e-4
+    )
+
+
+def test_non_parametric_distributions_for_all_intervals() -> None:
+    estimator = DensityEstimator(RANGE_CONFIG)
+    data = np.random.default_rng(0).normal(20, 4, 100)
+
+    dists = estimator.calculate_probability_distributions(
+        "kernel_density", data, [1.0, 2.0], [3.0, 4.0]
+    )
+    param_dists = estimator.calculate_probability_distributions(
+        "kernel_density", None, [1.0, 2.0], [3.0, 4.0]
+    )
+
+    assert dists.shape == (2, estimator.dist_range.size)
+    assert np.array_equal(
+        dists[1],
+        estimator.calculate_probability_distribution(
+            "kernel_density", data, {}
+        ),
+    )
+    assert np.array_equal(
+        param_dists[1], norm.pdf(estimator.dist_range, 2.0, 4.0)
+    )
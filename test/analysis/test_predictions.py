@@ -0,0 +1,176 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from portend.analysis import accuracy
+from portend.analysis.predictions import ClassPredictions, Predictions
+
+
+def test_additional_data_stored_as_columns() -> None:
+    predictions = Predictions()
+    predictions.store_additional_data(
+        {"data.csv": {"value": {0: 1.5, 1: 2.5}, "name": {0: "a", 1: "b"}}}
+    )
+
+    add_data = predictions.get_additional_data("data.csv")
+
+    assert np.array_equal(add_data["value"], np.array([1.5, 2.5]))
+    assert np.array_equal(add_data["name"], np.array(["a", "b"]))
+
+
+def test_additional_data_file_round_trip(tmp_path: Path) -> None:
+    predictions_file = str(tmp_path / "predictions.json")
+    predictions = Predictions()
+    predictions.store_predictions([1, 0, 1])
+    predictions.store_expected_results([1, 1, 0])
+    predictions.store_additional_data(
+        {
+            "data.csv": {
+                "Meters_Error": np.array([1.0, 20.5, 3.25]),
+                "Confidence": np.array(["[0.1]", "[0.2, 0.3]", "[]"], object),
+                "Matched": np.array([True, False, True]),
+            }
+        }
+    )
+
+    predictions.save_to_file(predictions_file)
+    loaded = Predictions.load_from_file(predictions_file)
+
+    assert os.path.exists(str(tmp_path / "predictions_add_data.npz"))
+    add_data = loaded.get_additional_data("data.csv")
+    assert add_data["Meters_Error"].dtype == np.float64
+    assert add_data["Matched"].dtype == np.bool_
+    assert list(add_data["Confidence"]) == ["[0.1]", "[0.2, 0.3]", "[]"]
+    assert np.array_equal(loaded.get_predictions(), np.array([1, 0, 1]))
+
+
+def test_calculate_outcomes() -> None:
+    outcomes = accuracy.calculate_outcomes(
+        [0, 0, 1, 1, 2], [0, 1, 0, 1, 1], labels=[0, 1], positive_class=1
+    )
+
+    assert list(outcomes) == [
+        accuracy.OUTCOME_TRUE_NEGATIVE,
+        accuracy.OUTCOME_FALSE_POSITIVE,
+        accuracy.OUTCOME_FALSE_NEGATIVE,
+        accuracy.OUTCOME_TRUE_POSITIVE,
+        accuracy.OUTCOME_IGNORED,
+    ]
+
+
+def test_accuracy_by_segment_matches_slices() -> None:
+    rng = np.random.default_rng(0)
+    predictions = ClassPredictions.from_predictions(
+        Predictions(), {"threshold": 0.5}
+    )
+    predictions.store_expected_results(rng.integers(0, 2, 100))
+    predictions.store_predictions(rng.random(100))
+    segment_sizes = [10, 0, 35, 1, 54]
+
+    accuracies = predictions.calculate_accuracy_by_segment(segment_sizes)
+
+    start = 0
+    for segment, size in enumerate(segment_sizes):
+        if size == 0:
+            assert np.isnan(accuracies[segment])
+        else:
+            expected = predictions.create_slice(
+                start, size
+            ).calculate_accuracy()
+            assert accuracies[segment] == expected
+        start += size
+
+
+def test_slice_shares_arrays() -> None:
+    predictions = ClassPredictions.from_predictions(
+        Predictions(), {"threshold": 0.5}
+    )
+    predictions.store_expected_results([1, 0, 1, 1])
+    predictions.store_predictions([0.9, 0.1, 0.2, 0.7])
+    predictions.store_additional_data({"data": {"value": [1, 2, 3, 4]}})
+
+    sliced = predictions.create_slice(1, 2)
+
+    assert list(sliced.get_predictions()) == [0, 0]
+    assert list(sliced.get_raw_predictions()) == [0.1, 0.2]
+    assert list(sliced.get_expected_results()) == [0, 1]
+    assert sliced.calculate_accuracy() == 0.5
+    assert np.shares_memory(
+        sliced.get_predictions(), predictions.get_predictions()
+    )
+    assert np.shares_memory(
+        sliced.get_raw_predictions(), predictions.get_raw_predictions()
+    )
+    assert not sliced.get_expected_results().flags.writeable
+    assert sliced.get_additional_data() is predictions.get_additional_data()
+
+
+def test_additional_data_file_round_trip_with_nulls(tmp_path: Path) -> None:
+    predictions_file = str(tmp_path / "predictions.json")
+    predictions = Predictions()
+    predictions.store_predictions([1, 0, 1])
+    predictions.store_expected_results([1, 1, 0])
+    predictions.store_additional_data(
+        {
+            "data.csv": {
+                "Name": np.array(["a", None, "c"], object),
+                "Count": np.array([None, 2, float("nan")], object),
+                "Missing": np.array([None, None, None], object),
+            }
+        }
+    )
+
+    predictions.save_to_file(predictions_file)
+    loaded = Predictions.load_from_file(predictions_file)
+
+    add_data = loaded.get_additional_data("data.csv")
+    assert list(add_data["Name"]) == ["a", None, "c"]
+    assert list(add_data["Count"]) == [None, 2, None]
+    assert list(add_data["Missing"]) == [None, None, None]
+
+
+def test_additional_data_file_round_trip_keeps_object_types(
+    tmp_path: Path,
+) -> None:
+    predictions_file = str(tmp_path / "predictions.json")
+    predictions = Predictions()
+    predictions.store_predictions([1, 0, 1])
+    predictions.store_expected_results([1, 1, 0])
+    predictions.store_additional_data(
+        {
+            "data.csv": {
+                "Count": np.array([1, 2, 3], object),
+                "Matched": np.array([True, False, True], object),
+                "Mixed": np.array([1, "a", [2.5]], object),
+            }
+        }
+    )
+
+    predictions.save_to_file(predictions_file)
+    loaded = Predictions.load_from_file(predictions_file)
+
+    add_data = loaded.get_additional_data("data.csv")
+    assert add_data["Count"].dtype == np.int64
+    assert list(add_data["Count"]) == [1, 2, 3]
+    assert add_data["Matched"].dtype == np.bool_
+    assert list(add_data["Mixed"]) == [1, "a", [2.5]]
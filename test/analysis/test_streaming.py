@@ -0,0 +1,89 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portend.analysis.time_series.streaming import StreamingTimeSeries
+from portend.analysis.time_series.timeseries import TimeSeries
+
+DAY_NS = pd.to_timedelta(1, "days").value
+
+
+def test_streaming_matches_offline_aggregation() -> None:
+    rng = np.random.default_rng(0)
+    timestamps = np.sort(rng.integers(0, 20 * DAY_NS, 500))
+    values = rng.integers(0, 3, 500)
+    offline = TimeSeries()
+    offline.aggregate_by_timestamp("2024-01-01", "days", values, timestamps)
+
+    stream = StreamingTimeSeries("2024-01-01", "days")
+    closed = [
+        stream.push(int(timestamp), int(value))
+        for timestamp, value in zip(timestamps, values)
+    ]
+    closed.append(stream.flush())
+
+    assert sum(len(intervals) for intervals in closed) == 20
+    assert list(stream.time_series.get_time_intervals()) == list(
+        offline.get_time_intervals()
+    )
+    assert np.array_equal(
+        stream.time_series.get_aggregated(), offline.aggregated
+    )
+    assert np.array_equal(stream.time_series.num_samples, offline.num_samples)
+
+
+def test_streaming_late_samples() -> None:
+    stream = StreamingTimeSeries(
+        "2024-01-01", "days", allowed_late_intervals=1, origin_timestamp=0
+    )
+
+    assert len(stream.push(0, 1)) == 0
+    assert len(stream.push(DAY_NS, 2)) == 0
+    assert len(stream.push(0, 3)) == 0
+    assert stream.push(2 * DAY_NS, 4) == range(0, 1)
+    assert len(stream.push(0, 5)) == 0
+    assert stream.push(DAY_NS, 6.5) == range(1, 1)
+    assert stream.push(4 * DAY_NS, 7) == range(1, 3)
+
+    assert stream.num_dropped_samples == 1
+    assert list(stream.time_series.get_aggregated()) == [4, 8.5, 4]
+    assert list(stream.time_series.num_samples) == [2, 2, 1]
+    assert list(stream.get_intervals(range(1, 3)).get_aggregated()) == [8.5, 4]
+
+
+def test_streaming_late_samples_require_origin() -> None:
+    with pytest.raises(Exception, match="origin"):
+        StreamingTimeSeries("2024-01-01", "days", allowed_late_intervals=1)
+
+
+def test_streaming_late_sample_before_first_received() -> None:
+    stream = StreamingTimeSeries(
+        "2024-01-01", "days", allowed_late_intervals=1, origin_timestamp=0
+    )
+
+    stream.push(DAY_NS, 1)
+    stream.push(DAY_NS - 1, 2)
+    stream.push(-1, 3)
+    stream.flush()
+
+    assert stream.num_dropped_samples == 0
+    assert stream.num_early_samples == 1
+    assert list(stream.time_series.get_aggregated()) == [2, 1]
@@ -0,0 +1,91 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portend.analysis.time_series.timeseries import (
+    TimeSeries,
+    create_test_time_series,
+)
+
+DAY_NS = pd.to_timedelta(1, "days").value
+
+
+def test_aggregate_by_number_of_samples() -> None:
+    time_series = create_test_time_series()
+
+    assert list(time_series.get_aggregated()) == [7, 16, 10, 12]
+    assert list(time_series.num_samples) == [4, 4, 4, 3]
+    assert time_series.get_time_intervals()[3] == pd.Timestamp("2021-11-04")
+
+
+def test_aggregate_by_timestamp() -> None:
+    timestamps = np.array([0, 1, DAY_NS - 1, DAY_NS, 3 * DAY_NS + 5]) + 7
+    values = np.array([1, 2, 3, 4, 5])
+
+    time_series = TimeSeries()
+    time_series.aggregate_by_timestamp("2024-01-01", "days", values, timestamps)
+
+    assert time_series.get_num_intervals() == 4
+    assert list(time_series.get_aggregated()) == [6, 4, 0, 5]
+    assert list(time_series.num_samples) == [3, 1, 0, 1]
+
+
+def test_aggregate_unsorted_timestamps_fails() -> None:
+    timestamps = np.array([DAY_NS, 0, 2 * DAY_NS])
+
+    with pytest.raises(Exception):
+        TimeSeries().aggregate_by_timestamp(
+            "2024-01-01", "days", np.array([1, 1, 1]), timestamps
+        )
+
+
+def test_get_interval_index() -> None:
+    time_series = create_test_time_series()
+
+    assert time_series.get_interval_index(pd.Timestamp("2021-11-03")) == 2
+    with pytest.raises(Exception):
+        time_series.get_interval_index(pd.Timestamp("2021-11-03 12:00"))
+    with pytest.raises(Exception):
+        time_series.get_interval_index(pd.Timestamp("2021-12-01"))
+
+
+def test_set_uneven_time_intervals_fails() -> None:
+    intervals = pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-04"])
+
+    with pytest.raises(Exception):
+        TimeSeries().set_time_intervals(intervals)
+
+
+def test_pdf_params_as_arrays() -> None:
+    time_series = create_test_time_series()
+    copied = TimeSeries()
+    copied.copy_time_intervals(time_series)
+    copied.set_pdf_params([time_series.get_pdf_params(idx) for idx in range(4)])
+
+    assert list(copied.get_time_intervals()) == list(
+        time_series.get_time_intervals()
+    )
+    assert np.array_equal(copied.get_pdf_means(), time_series.get_pdf_means())
+    assert np.array_equal(
+        copied.get_pdf_std_devs(), time_series.get_pdf_std_devs()
+    )
+    assert copied.to_dict()["pdf_params"][1] == time_series.get_pdf_params(1)
@@ -0,0 +1,108 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from portend.analysis.predictions import ClassPredictions, Predictions
+from portend.analysis.time_series.timeseries import TimeSeries
+from portend.analysis.time_series.ts_analyzer import analyze_ts
+from portend.datasets.dataset import DataSet
+from portend.models.ts_model import TimeSeriesModel
+
+DAY_NS = pd.to_timedelta(1, "D").value
+METRICS_CONFIG = [
+    {
+        "name": "Z-Test",
+        "metric_class": "portend.metrics.time_series.z_test.ZTestMetric",
+    }
+]
+
+
+def create_ts_config(tmp_path: Path) -> dict:
+    rng = np.random.default_rng(0)
+    history = TimeSeries()
+    history.setup_time_intervals("2024-01-01", "D", 30)
+    history.aggregated = rng.integers(2, 8, 30)
+    ts_model = TimeSeriesModel()
+    ts_model.create_model(
+        history.get_time_intervals(),
+        history.get_aggregated(),
+        "D",
+        {"order_p": 1, "order_q": 0, "order_d": 0},
+    )
+    ts_model_file = str(tmp_path / "ts_model")
+    ts_model.save_to_file(ts_model_file)
+    return {
+        "ts_model": ts_model_file,
+        "time_interval": {
+            "starting_interval": "2024-01-31",
+            "interval_unit": "D",
+        },
+        "num_workers": 2,
+    }
+
+
+def create_dataset_and_predictions(
+    seed: int,
+) -> tuple[DataSet, ClassPredictions]:
+    rng = np.random.default_rng(seed)
+    num_samples = 50
+    dataset = DataSet()
+    dataset.set_samples(
+        [{DataSet.DEFAULT_ID_KEY: str(idx)} for idx in range(num_samples)]
+    )
+    dataset.set_timestamps(np.sort(rng.integers(0, 5 * DAY_NS, num_samples)))
+    predictions = ClassPredictions.from_predictions(
+        Predictions(), {"threshold": 0.5}
+    )
+    predictions.store_expected_results(rng.integers(0, 2, num_samples))
+    predictions.store_predictions(rng.random(num_samples))
+    return dataset, predictions
+
+
+def test_analyze_ts_multiple_datasets(tmp_path: Path) -> None:
+    ts_config = create_ts_config(tmp_path)
+    datasets, prediction_list = zip(
+        *[create_dataset_and_predictions(seed) for seed in range(3)]
+    )
+
+    results = analyze_ts(
+        list(datasets), list(prediction_list), ts_config, METRICS_CONFIG
+    )
+
+    assert list(results.keys()) == [0, 1, 2]
+    for dataset, predictions, dataset_results in zip(
+        datasets, prediction_list, results.values()
+    ):
+        single_results = analyze_ts(
+            [dataset], [predictions], ts_config, METRICS_CONFIG
+        )
+        assert list(single_results.keys()) == [0]
+        expected = single_results[0]
+        assert dataset_results.keys() == expected.keys()
+        for interval_results, expected_results in zip(
+            dataset_results.values(), expected.values()
+        ):
+            assert interval_results["accuracy"] == expected_results["accuracy"]
+            assert (
+                interval_results["metrics"][0]["results"]
+                == expected_results["metrics"][0]["results"]
+            )
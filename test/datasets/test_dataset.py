@@ -0,0 +1,137 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portend.datasets.dataset import DataSet
+
+
+def create_dataset(ids: list[str]) -> DataSet:
+    dataset = DataSet()
+    dataset.set_samples(
+        [{"id": sample_id, "value": pos} for pos, sample_id in enumerate(ids)]
+    )
+    return dataset
+
+
+def test_get_id_position() -> None:
+    dataset = create_dataset(["a", "b", "c"])
+
+    assert dataset.get_id_position("c") == 2
+    assert dataset.get_sample_by_id("b") == {"id": "b", "value": 1}
+    with pytest.raises(Exception):
+        dataset.get_id_position("d")
+
+
+def test_id_index_rebuilt_when_dataframe_changes() -> None:
+    dataset = create_dataset(["a", "b", "c"])
+    assert dataset.get_id_position("a") == 0
+
+    dataset.from_dataframe(pd.DataFrame({"id": ["c", "a"], "value": [0, 1]}))
+
+    assert dataset.get_id_position("a") == 1
+
+
+def test_repeated_ids_use_first_position() -> None:
+    dataset = create_dataset(["a", "b", "a", "c"])
+
+    assert dataset.get_id_position("a") == 0
+    assert np.array_equal(dataset.get_positions_by_ids(["c", "a"]), [3, 0])
+
+
+def test_get_samples_by_ids() -> None:
+    dataset = create_dataset(["a", "b", "c"])
+
+    samples = dataset.get_samples_by_ids(["c", "a", "c"])
+
+    assert list(samples["id"]) == ["c", "a", "c"]
+    assert list(samples["value"]) == [2, 0, 2]
+    assert list(samples.index) == [0, 1, 2]
+    with pytest.raises(Exception):
+        dataset.get_samples_by_ids(["a", "x"])
+
+
+def test_iter_batches_aligned() -> None:
+    dataset = create_dataset(["a", "b", "c", "d", "e"])
+    dataset.set_model_input_key("value")
+
+    batches = list(dataset.iter_batches(2, columns=["value"]))
+
+    assert [batch.start for batch in batches] == [0, 2, 4]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert list(batches[1].ids) == ["c", "d"]
+    assert list(batches[1].inputs[0]) == [2, 3]
+    assert list(batches[1].columns["value"]) == [2, 3]
+    assert batches[1].output is None
+    with pytest.raises(RuntimeError):
+        next(dataset.iter_batches(0))
+
+
+def test_iter_file_batches(tmp_path: Path) -> None:
+    dataset_file = str(tmp_path / "dataset.json")
+    create_dataset([str(i) for i in range(7)]).save_to_file(dataset_file)
+
+    batches = list(
+        DataSet.iter_file_batches(
+            dataset_file,
+            {"dataset_output_key": "value"},
+            batch_size=2,
+            chunk_size=3,
+        )
+    )
+
+    assert [batch.start for batch in batches] == [0, 2, 3, 5, 6]
+    assert np.concatenate([batch.output for batch in batches]).tolist() == list(
+        range(7)
+    )
+    assert batches[0].inputs is None
+
+
+def test_column_views_and_copies() -> None:
+    dataset = create_dataset(["a", "b", "c"])
+    dataset.set_model_output_key("value")
+
+    view = dataset.get_column("value")
+    copy = dataset.get_column("value", copy=True)
+    copy[0] = 10
+
+    assert not view.flags.writeable
+    assert np.shares_memory(view, dataset.get_model_output(copy=False))
+    assert list(dataset.get_ids(copy=False)) == ["a", "b", "c"]
+    assert list(dataset.get_model_output()) == [0, 1, 2]
+    assert list(dataset.get_columns(["id"])) == ["id"]
+
+
+def test_shallow_clone_shares_data_until_columns_set() -> None:
+    dataset = create_dataset(["a", "b"])
+    dataset.set_model_output_key("value")
+
+    cloned_dataset = dataset.clone(DataSet(), deep=False)
+    shared = np.shares_memory(
+        cloned_dataset.get_column("value"), dataset.get_column("value")
+    )
+    cloned_dataset.set_model_output([5, 6])
+
+    assert shared
+    assert list(dataset.get_model_output()) == [0, 1]
+    assert list(cloned_dataset.get_model_output()) == [5, 6]
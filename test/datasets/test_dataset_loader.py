@@ -0,0 +1,70 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from portend.datasets import dataset_loader
+from portend.datasets.dataset import DataSet
+from portend.datasets.ref_dataset import RefDataSet
+
+
+class CountingDataSet(DataSet):
+    """Dataset that tracks how many samples were post-processed."""
+
+    post_processed_samples: list[int] = []
+
+    def post_process(self, dataset_config):
+        CountingDataSet.post_processed_samples.append(
+            self.get_number_of_samples()
+        )
+
+
+@pytest.mark.parametrize("positional", [False, True])
+def test_load_only_referenced_samples(tmp_path: Path, positional: bool):
+    base_file = str(tmp_path / "base.json")
+    ref_file = str(tmp_path / ("refs.npz" if positional else "refs.json"))
+    base_dataset = DataSet()
+    base_dataset.set_samples([{"id": f"s{i}", "value": i} for i in range(10)])
+    base_dataset.save_to_file(base_file)
+    ref_dataset = RefDataSet()
+    if positional:
+        ref_dataset.create_from_positions(base_dataset, [7, 2, 7], [0, 0, 1])
+    else:
+        ref_dataset.create_from_lists(
+            [["r1", 0], ["r2", 0], ["r3", 0]], ["s7", "s2", "s7"], [0, 0, 1]
+        )
+    ref_dataset.set_timestamps(np.array([10, 20, 30]))
+    ref_dataset.save_to_file(ref_file)
+    CountingDataSet.post_processed_samples = []
+
+    dataset = dataset_loader.load_dataset(
+        {
+            "dataset_class": "test.datasets.test_dataset_loader.CountingDataSet",
+            "dataset_file": ref_file,
+            "dataset_file_base": base_file,
+        }
+    )
+
+    assert list(dataset.get_ids()) == ["s7", "s2", "s7"]
+    assert list(dataset.dataframe["value"]) == [7, 2, 7]
+    assert list(dataset.get_timestamps()) == [10, 20, 30]
+    assert CountingDataSet.post_processed_samples == [3]
@@ -0,0 +1,112 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from portend.datasets.image_dataset import ImageDataSet
+
+
+class SizeImageDataSet(ImageDataSet):
+    """Image dataset that adds the size of each file, tracking which files it was extracted from."""
+
+    HAS_FILE_METADATA = True
+    extracted_files: list[str] = []
+
+    @classmethod
+    def get_file_metadata(cls, image_file_path):
+        cls.extracted_files.append(Path(image_file_path).name)
+        return {"size": os.path.getsize(image_file_path)}
+
+
+def create_files(folder: Path, names: list[str]) -> None:
+    for name in names:
+        (folder / name).write_bytes(b"x")
+
+
+def test_folder_indexed_and_merged(tmp_path: Path) -> None:
+    create_files(tmp_path, ["img10.png", "img2.png", "notes.txt"])
+    (tmp_path / "subfolder.png").mkdir()
+    existing_data = tmp_path / "existing.json"
+    existing_data.write_text(
+        json.dumps([{"id": "img2.png", "label": 1}, {"id": "other.png"}])
+    )
+
+    dataset = ImageDataSet.create_dataset_from_folder(
+        str(tmp_path), fields={"label": 0}, existing_data=str(existing_data)
+    )
+
+    assert dataset.get_samples() == [
+        {
+            "id": "img2.png",
+            "image_path": str(tmp_path / "img2.png"),
+            "label": 1,
+        },
+        {
+            "id": "img10.png",
+            "image_path": str(tmp_path / "img10.png"),
+            "label": 0,
+        },
+    ]
+
+
+def test_metadata_only_extracted_from_changed_files(tmp_path: Path) -> None:
+    create_files(tmp_path, ["a.png", "b.png", "c.png"])
+    SizeImageDataSet.extracted_files = []
+
+    cache_file = str(tmp_path / "metadata_cache.json")
+
+    SizeImageDataSet.create_dataset_from_folder(
+        str(tmp_path), metadata_cache_file=cache_file, num_workers=2
+    )
+    (tmp_path / "b.png").write_bytes(b"xyz")
+    os.remove(tmp_path / "c.png")
+    dataset = SizeImageDataSet.create_dataset_from_folder(
+        str(tmp_path), metadata_cache_file=cache_file, num_workers=2
+    )
+
+    assert sorted(SizeImageDataSet.extracted_files) == [
+        "a.png",
+        "b.png",
+        "b.png",
+        "c.png",
+    ]
+    assert [sample["size"] for sample in dataset.get_samples()] == [1, 3]
+    assert os.path.exists(cache_file)
+
+
+def test_metadata_cache_not_written_by_default(tmp_path: Path) -> None:
+    create_files(tmp_path, ["a.png", "b.png"])
+
+    dataset = SizeImageDataSet.create_dataset_from_folder(str(tmp_path))
+
+    assert len(dataset.get_samples()) == 2
+    assert sorted(os.listdir(tmp_path)) == ["a.png", "b.png"]
+
+
+def test_unwritable_metadata_cache_ignored(tmp_path: Path) -> None:
+    create_files(tmp_path, ["a.png", "not_a_folder"])
+
+    dataset = SizeImageDataSet.create_dataset_from_folder(
+        str(tmp_path),
+        metadata_cache_file=str(tmp_path / "not_a_folder" / "cache.json"),
+    )
+
+    assert [sample["size"] for sample in dataset.get_samples()] == [1]
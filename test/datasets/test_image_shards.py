@@ -0,0 +1,162 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from portend.datasets.image_dataset import ImageDataSet
+from portend.datasets.image_shards import (
+    ImageShards,
+    has_image_shards,
+    write_image_shards,
+)
+
+
+def create_images(num_images: int) -> list[np.ndarray]:
+    return [np.full((4, 5, 3), i, dtype=np.uint8) for i in range(num_images)]
+
+
+def test_shards_random_access(tmp_path: Path) -> None:
+    images = create_images(5) + [np.arange(6, dtype=np.uint16).reshape(2, 3)]
+    names = [f"img{i}.png" for i in range(len(images))]
+
+    write_image_shards(
+        str(tmp_path), "dataset", names, images, max_shard_bytes=2 * 60
+    )
+    shards = ImageShards(str(tmp_path), "dataset")
+
+    assert has_image_shards(str(tmp_path), "dataset")
+    assert not has_image_shards(str(tmp_path), "other")
+    assert len(list(tmp_path.glob("dataset_image_shard_*.bin"))) == 3
+    assert len(shards) == 6
+    assert shards.get_image("img3.png")[0, 0, 0] == 3
+    assert shards.get_image(1)[3, 4, 2] == 1
+    assert np.array_equal(shards.get_image("img5.png"), images[5])
+    assert not shards.get_image(0).flags.writeable
+
+
+def test_shards_exported_to_files(tmp_path: Path) -> None:
+    names = [f"img{i}.png" for i in range(3)]
+    write_image_shards(
+        str(tmp_path / "shards"), "dataset", names, create_images(3)
+    )
+
+    ImageShards(str(tmp_path / "shards"), "dataset").export_to_files(
+        str(tmp_path / "files")
+    )
+
+    assert [
+        cv2.imread(str(tmp_path / "files" / name))[0, 0, 0] for name in names
+    ] == [0, 1, 2]
+
+
+def test_image_dataset_saved_and_loaded_from_shards(tmp_path: Path) -> None:
+    image_folder = str(tmp_path / "images")
+    dataset = ImageDataSet(image_folder)
+    dataset.set_samples([{"id": str(i), "image_path": ""} for i in range(3)])
+    dataset.set_images_from_list(
+        create_images(3), [f"img{i}.png" for i in range(3)]
+    )
+    dataset.set_image_storage(ImageDataSet.IMAGE_STORAGE_SHARDS)
+    dataset_file = str(tmp_path / "dataset.json")
+
+    dataset.save_to_file(dataset_file)
+    loaded_dataset = ImageDataSet()
+    loaded_dataset.load_from_file(dataset_file, {})
+
+    assert not os.path.exists(os.path.join(image_folder, "img0.png"))
+    assert loaded_dataset.image_storage == ImageDataSet.IMAGE_STORAGE_SHARDS
+    assert [image[0, 0, 0] for image in loaded_dataset.image_list] == [0, 1, 2]
+
+
+def test_empty_shard_loaded(tmp_path: Path) -> None:
+    write_image_shards(
+        str(tmp_path),
+        "dataset",
+        ["empty.png"],
+        [np.zeros((0, 3), dtype=np.uint8)],
+    )
+
+    image = ImageShards(str(tmp_path), "dataset").get_image("empty.png")
+
+    assert image.shape == (0, 3)
+
+
+def test_image_dataset_saved_as_files_over_shards(tmp_path: Path) -> None:
+    image_folder = str(tmp_path / "images")
+    dataset = ImageDataSet(image_folder)
+    dataset.set_samples([{"id": str(i), "image_path": ""} for i in range(3)])
+    names = [f"img{i}.png" for i in range(3)]
+    dataset.set_images_from_list(create_images(3), names)
+    dataset.set_image_storage(ImageDataSet.IMAGE_STORAGE_SHARDS)
+    dataset_file = str(tmp_path / "dataset.json")
+    dataset.save_to_file(dataset_file)
+
+    dataset.set_images_from_list(
+        [image + 5 for image in create_images(3)], names
+    )
+    dataset.set_image_storage(ImageDataSet.IMAGE_STORAGE_FILES)
+    dataset.save_to_file(dataset_file)
+    loaded_dataset = ImageDataSet()
+    loaded_dataset.load_from_file(dataset_file, {})
+
+    assert not has_image_shards(image_folder, "dataset")
+    assert not list((tmp_path / "images").glob("*.bin"))
+    assert loaded_dataset.image_storage == ImageDataSet.IMAGE_STORAGE_FILES
+    assert [image[0, 0, 0] for image in loaded_dataset.image_list] == [5, 6, 7]
+
+
+def create_image_dataset(
+    image_folder: str, prefix: str, first_value: int
+) -> ImageDataSet:
+    dataset = ImageDataSet(image_folder)
+    dataset.set_samples([{"id": str(i), "image_path": ""} for i in range(3)])
+    dataset.set_images_from_list(
+        [image + first_value for image in create_images(3)],
+        [f"{prefix}{i}.png" for i in range(3)],
+    )
+    return dataset
+
+
+def load_first_pixels(dataset_file: str) -> list[int]:
+    loaded_dataset = ImageDataSet()
+    loaded_dataset.load_from_file(dataset_file, {})
+    return [image[0, 0, 0] for image in loaded_dataset.image_list]
+
+
+def test_image_datasets_sharing_folder(tmp_path: Path) -> None:
+    image_folder = str(tmp_path / "images")
+    sharded_a = create_image_dataset(image_folder, "a", 0)
+    sharded_a.set_image_storage(ImageDataSet.IMAGE_STORAGE_SHARDS)
+    sharded_b = create_image_dataset(image_folder, "b", 10)
+    sharded_b.set_image_storage(ImageDataSet.IMAGE_STORAGE_SHARDS)
+    files_c = create_image_dataset(image_folder, "c", 20)
+
+    sharded_a.save_to_file(str(tmp_path / "a.json"))
+    sharded_b.save_to_file(str(tmp_path / "b.json"))
+    files_c.save_to_file(str(tmp_path / "c.json"))
+
+    assert load_first_pixels(str(tmp_path / "a.json")) == [0, 1, 2]
+    assert load_first_pixels(str(tmp_path / "b.json")) == [10, 11, 12]
+    assert load_first_pixels(str(tmp_path / "c.json")) == [20, 21, 22]
+    assert has_image_shards(image_folder, "a")
+    assert has_image_shards(image_folder, "b")
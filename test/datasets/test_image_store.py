@@ -0,0 +1,121 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from portend.datasets.image_store import ImageStore, write_images
+
+
+def create_images(folder: Path, num_images: int) -> list[str]:
+    paths = []
+    for i in range(num_images):
+        path = str(folder / f"img{i}.png")
+        cv2.imwrite(path, np.full((4, 4, 3), i, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_images_decoded_lazily_and_deduplicated(tmp_path: Path) -> None:
+    paths = create_images(tmp_path, 2)
+    store = ImageStore.from_paths([paths[0], paths[1], paths[0]])
+
+    assert len(store) == 3
+    assert store.get_resident_bytes() == 0
+    assert store[2][0, 0, 0] == 0
+    assert store[0] is store[2]
+    assert store.get_resident_bytes() == 4 * 4 * 3
+    assert [image[0, 0, 0] for image in store] == [0, 1, 0]
+
+
+def test_images_evicted_over_max_bytes(tmp_path: Path) -> None:
+    paths = create_images(tmp_path, 3)
+    store = ImageStore.from_paths(paths, max_bytes=2 * 4 * 4 * 3)
+
+    batch = store[0:3]
+
+    assert [image[0, 0, 0] for image in batch] == [0, 1, 2]
+    assert store.get_resident_bytes() == 2 * 4 * 4 * 3
+    assert store[0][0, 0, 0] == 0
+
+
+def test_in_memory_images() -> None:
+    images = [np.zeros((2, 2)), np.ones((2, 2))]
+    store = ImageStore.from_images(images)
+
+    assert store[1] is images[1]
+    assert store.get_path(1) is None
+    assert [len(batch) for batch in store.iter_batches(1)] == [1, 1]
+
+
+def test_missing_image_file(tmp_path: Path) -> None:
+    store = ImageStore.from_paths([str(tmp_path / "missing.png")])
+
+    with pytest.raises(IOError):
+        store[0]
+
+
+def test_batch_decoded_in_parallel(tmp_path: Path) -> None:
+    paths = create_images(tmp_path, 6)
+    store = ImageStore.from_paths(paths + paths[:2], num_workers=4)
+
+    batch = store.get_images(range(8))
+
+    assert [image[0, 0, 0] for image in batch] == [0, 1, 2, 3, 4, 5, 0, 1]
+    assert batch[6] is batch[0]
+    assert store.get_resident_bytes() == 6 * 4 * 4 * 3
+
+
+def test_write_images(tmp_path: Path) -> None:
+    images = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(3)]
+    paths = [str(tmp_path / f"out{i}.png") for i in range(3)]
+
+    write_images(paths, images, num_workers=2)
+
+    assert [cv2.imread(path)[0, 0, 0] for path in paths] == [0, 1, 2]
+    with pytest.raises(RuntimeError):
+        write_images(paths[:2], images)
+
+
+def test_clone_shares_images_until_written(tmp_path: Path) -> None:
+    paths = create_images(tmp_path, 2)
+    store = ImageStore.from_paths(paths)
+    cloned_store = store.clone()
+
+    assert cloned_store[0] is store[0]
+
+    writable_image = cloned_store.get_writable_image(0)
+    writable_image[:] = 9
+
+    assert cloned_store.get_writable_image(0) is writable_image
+    assert cloned_store[0][0, 0, 0] == 9
+    assert store[0][0, 0, 0] == 0
+    assert cloned_store[1] is store[1]
+
+
+def test_writable_image_copied_again_after_clone() -> None:
+    store = ImageStore.from_images([np.zeros((2, 2), dtype=np.uint8)])
+    writable_image = store.get_writable_image(0)
+    cloned_store = store.clone()
+
+    assert store.get_writable_image(0) is not writable_image
+    assert cloned_store[0] is writable_image
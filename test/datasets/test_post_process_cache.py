@@ -0,0 +1,143 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from portend.datasets import post_process_cache
+from portend.datasets.dataset import DataSet
+
+
+class SquaresDataSet(DataSet):
+    """Dataset that derives an array in post-processing, counting how many times it was built."""
+
+    num_builds = 0
+
+    def post_process(self, dataset_config):
+        self.squares = self.get_post_processed_array(
+            "squares", self._build_squares
+        )
+
+    def _build_squares(self):
+        SquaresDataSet.num_builds += 1
+        return np.array(self.dataframe["value"], dtype=np.float32) ** 2
+
+
+class SourceSquaresDataSet(SquaresDataSet):
+    """Same dataset, declaring that the values column is only used to build the squares."""
+
+    POST_PROCESSED_ARRAYS = ["squares"]
+    POST_PROCESS_SOURCE_COLUMNS = ["value"]
+
+
+def save_values(dataset_file: Path, values: list[int]) -> None:
+    dataset = DataSet()
+    dataset.set_samples(
+        [{"id": str(i), "value": value} for i, value in enumerate(values)]
+    )
+    dataset.save_to_file(str(dataset_file))
+
+
+def load_squares(dataset_file: Path, config: dict) -> SquaresDataSet:
+    dataset = SquaresDataSet()
+    dataset.load_from_file(str(dataset_file), config)
+    return dataset
+
+
+def test_post_processed_array_cached_and_memory_mapped(tmp_path: Path) -> None:
+    dataset_file = tmp_path / "dataset.json"
+    save_values(dataset_file, [1, 2, 3])
+    config = {"dataset_cache_dir": str(tmp_path / "cache")}
+    SquaresDataSet.num_builds = 0
+
+    first_dataset = load_squares(dataset_file, config)
+    second_dataset = load_squares(dataset_file, config)
+
+    assert SquaresDataSet.num_builds == 1
+    assert isinstance(second_dataset.squares, np.memmap)
+    assert np.array_equal(first_dataset.squares, [1, 4, 9])
+    assert np.array_equal(second_dataset.squares, [1, 4, 9])
+
+
+def test_cache_invalidated_when_file_changes(tmp_path: Path) -> None:
+    dataset_file = tmp_path / "dataset.json"
+    config = {"dataset_cache_dir": str(tmp_path / "cache")}
+    SquaresDataSet.num_builds = 0
+
+    save_values(dataset_file, [1, 2, 3])
+    load_squares(dataset_file, config)
+    save_values(dataset_file, [4, 5])
+    dataset = load_squares(dataset_file, config)
+
+    assert SquaresDataSet.num_builds == 2
+    assert np.array_equal(dataset.squares, [16, 25])
+
+
+def test_not_cached_without_cache_dir(tmp_path: Path) -> None:
+    dataset_file = tmp_path / "dataset.json"
+    save_values(dataset_file, [1, 2])
+    SquaresDataSet.num_builds = 0
+
+    load_squares(dataset_file, {})
+    dataset = load_squares(dataset_file, {})
+
+    assert SquaresDataSet.num_builds == 2
+    assert not isinstance(dataset.squares, np.memmap)
+
+
+def test_source_columns_not_loaded_when_cached(tmp_path: Path) -> None:
+    dataset_file = tmp_path / "dataset.json"
+    save_values(dataset_file, [1, 2, 3])
+    config = {"dataset_cache_dir": str(tmp_path / "cache")}
+
+    first_dataset = SourceSquaresDataSet()
+    first_dataset.load_from_file(str(dataset_file), config)
+    second_dataset = SourceSquaresDataSet()
+    second_dataset.load_from_file(str(dataset_file), config)
+
+    assert list(first_dataset.dataframe.columns) == ["id"]
+    assert list(second_dataset.dataframe.columns) == ["id"]
+    assert list(second_dataset.get_ids()) == list(first_dataset.get_ids())
+    assert np.array_equal(second_dataset.squares, [1, 4, 9])
+
+
+def test_file_only_hashed_when_changed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dataset_file = tmp_path / "dataset.json"
+    config = {"dataset_cache_dir": str(tmp_path / "cache")}
+    hashed_files = []
+    hash_file = post_process_cache.hash_file
+
+    def counting_hash_file(file_path: str) -> str:
+        hashed_files.append(file_path)
+        return hash_file(file_path)
+
+    monkeypatch.setattr(post_process_cache, "hash_file", counting_hash_file)
+
+    save_values(dataset_file, [1, 2, 3])
+    load_squares(dataset_file, config)
+    load_squares(dataset_file, config)
+    save_values(dataset_file, [4, 5])
+    dataset = load_squares(dataset_file, config)
+
+    assert len(hashed_files) == 2
+    assert np.array_equal(dataset.squares, [16, 25])
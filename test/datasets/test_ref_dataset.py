@@ -0,0 +1,88 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from portend.datasets.dataset import DataSet
+from portend.datasets.ref_dataset import RefDataSet
+
+
+def create_base_dataset() -> DataSet:
+    base_dataset = DataSet()
+    base_dataset.set_samples(
+        [
+            {"id": "a", "timestamp": 0, "value": 1.5},
+            {"id": "b", "timestamp": 0, "value": 2.5},
+            {"id": "c", "timestamp": 0, "value": 3.5},
+        ]
+    )
+    return base_dataset
+
+
+def test_create_from_reference() -> None:
+    base_dataset = create_base_dataset()
+    ref_dataset = RefDataSet()
+    ref_dataset.create_from_lists(
+        samples=[["r1", 100], ["r2", 200], ["r3", 300], ["r4", 400]],
+        original_ids=["c", "a", "c", "b"],
+        sample_group_ids=[0, 0, 1, 1],
+    )
+
+    full_dataset = ref_dataset.create_from_reference(base_dataset, DataSet, {})
+
+    assert list(full_dataset.get_ids()) == ["c", "a", "c", "b"]
+    assert list(full_dataset.get_timestamps()) == [100, 200, 300, 400]
+    assert list(full_dataset.dataframe["value"]) == [3.5, 1.5, 3.5, 2.5]
+    assert full_dataset.get_sample(1) == {
+        "id": "a",
+        "timestamp": 200,
+        "value": 1.5,
+    }
+
+
+def test_positional_references_round_trip(tmp_path: Path) -> None:
+    ref_filename = str(tmp_path / "refs.npz")
+    base_dataset = create_base_dataset()
+    ref_dataset = RefDataSet()
+    ref_dataset.create_from_positions(base_dataset, [2, 0, 2, 1], [0, 0, 1, 1])
+    ref_dataset.set_timestamps(np.array([100, 200, 300, 400]))
+
+    ref_dataset.save_to_file(ref_filename)
+    loaded_refs = RefDataSet()
+    loaded_refs.load_from_file(ref_filename, {})
+    full_dataset = loaded_refs.create_from_reference(base_dataset, DataSet, {})
+
+    assert RefDataSet.is_positional_file(ref_filename)
+    assert list(loaded_refs.get_ids()) == list(ref_dataset.get_ids())
+    assert loaded_refs.get_num_sample_groups() == 2
+    assert list(full_dataset.get_ids()) == ["c", "a", "c", "b"]
+    assert list(full_dataset.get_timestamps()) == [100, 200, 300, 400]
+
+
+def test_positional_references_check_base(tmp_path: Path) -> None:
+    base_dataset = create_base_dataset()
+    ref_dataset = RefDataSet()
+    ref_dataset.create_from_positions(base_dataset, [0, 1], [0, 0])
+    base_dataset.set_samples([{"id": "x"}, {"id": "y"}])
+
+    with pytest.raises(Exception):
+        ref_dataset.create_from_reference(base_dataset, DataSet, {})
@@ -0,0 +1,109 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from portend.analysis.time_series.timeseries import TimeSeries
+from portend.metrics.time_series.energy import EnergyMetric
+from portend.metrics.time_series.hellinger import HellingerMetric
+from portend.metrics.time_series.kl_divergence import KLDivergenceMetric
+from portend.metrics.time_series.kolmogorov_smirnov import (
+    KolmogorovSmirnovMetric,
+)
+from portend.metrics.time_series.tvd import TVD
+from portend.metrics.time_series.wasserstein import Wasserstein
+from portend.metrics.time_series.z_test import ZTestMetric
+
+DIST_CONFIG = {
+    "params": {
+        "distribution": "normal",
+        "range_start": 0,
+        "range_end": 40,
+        "range_step": 0.5,
+    }
+}
+
+
+def create_time_series() -> tuple[TimeSeries, TimeSeries]:
+    rng = np.random.default_rng(3)
+    time_series = TimeSeries()
+    time_series.aggregate_by_number_of_samples(
+        "2024-01-01", "D", rng.integers(0, 4, 300), 10
+    )
+    ts_predictions = TimeSeries()
+    ts_predictions.copy_time_intervals(time_series)
+    ts_predictions.set_pdf_param_arrays(
+        rng.uniform(10, 20, 30), np.repeat([2.0, 3.5, 5.0], 10)
+    )
+    return time_series, ts_predictions
+
+
+@pytest.mark.parametrize(
+    "metric_type",
+    [
+        ZTestMetric,
+        KolmogorovSmirnovMetric,
+        HellingerMetric,
+        KLDivergenceMetric,
+        TVD,
+        Wasserstein,
+        EnergyMetric,
+    ],
+)
+def test_metric_for_all_intervals_matches_each_interval(metric_type) -> None:
+    time_series, ts_predictions = create_time_series()
+    metric = metric_type(ts_predictions, time_series, DIST_CONFIG)
+
+    all_results = metric.calculate_metric_for_all_intervals()
+    expected = []
+    for interval_idx in range(time_series.get_num_intervals()):
+        metric.step_setup(interval_idx)
+        expected.append(metric.calculate_metric().value)
+
+    assert all_results is not None
+    assert np.allclose(
+        [result.value for result in all_results], expected, rtol=1e-12, atol=0
+    )
+
+
+@pytest.mark.parametrize("metric_type", [HellingerMetric, Wasserstein])
+def test_distance_for_all_intervals_skips_missing_params(metric_type) -> None:
+    time_series, ts_predictions = create_time_series()
+    means = ts_predictions.get_pdf_means().copy()
+    std_devs = ts_predictions.get_pdf_std_devs().copy()
+    means[3] = np.nan
+    std_devs[5] = 0
+    ts_predictions.set_pdf_param_arrays(means, std_devs)
+    metric = metric_type(ts_predictions, time_series, DIST_CONFIG)
+
+    all_results = metric.calculate_metric_for_all_intervals()
+
+    assert all_results is not None
+    assert all_results[3] is None
+    assert all_results[5] is None
+    metric.step_setup(4)
+    assert all_results[4] is not None
+    assert all_results[4].value == pytest.approx(
+        metric.calculate_metric().value
+    )
+    assert all(
+        np.isfinite(result.value)
+        for result in all_results
+        if result is not None
+    )
@@ -0,0 +1,103 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from portend.analysis.time_series.timeseries import TimeSeries
+from portend.models.ts_model import TimeSeriesModel
+
+
+def create_time_series(start: str, values: np.ndarray) -> TimeSeries:
+    time_series = TimeSeries()
+    time_series.setup_time_intervals(start, "D", values.size)
+    time_series.aggregated = values
+    return time_series
+
+
+def create_model() -> TimeSeriesModel:
+    history = create_time_series(
+        "2024-01-01", np.random.default_rng(0).normal(10, 2, 100)
+    )
+    ts_model = TimeSeriesModel()
+    ts_model.create_model(
+        history.get_time_intervals(),
+        history.get_aggregated(),
+        "D",
+        {"order_p": 1, "order_q": 0, "order_d": 0},
+    )
+    return ts_model
+
+
+def test_add_observations() -> None:
+    extended_model = create_model()
+    appended_model = create_model()
+    observations = create_time_series("2024-04-10", np.array([20.0, 21.0]))
+    next_interval = create_time_series("2024-04-12", np.array([0.0]))
+    forecast, _ = extended_model.predict(next_interval)
+
+    extended_model.add_observations(observations)
+    appended_model.add_observations(observations, keep_history=True)
+    extended_forecast, _ = extended_model.predict(next_interval)
+    appended_forecast, _ = appended_model.predict(next_interval)
+
+    assert extended_forecast.get_pdf_means()[0] > forecast.get_pdf_means()[0]
+    assert np.allclose(
+        extended_forecast.get_pdf_means(), appended_forecast.get_pdf_means()
+    )
+    assert np.allclose(
+        extended_forecast.get_pdf_std_devs(),
+        appended_forecast.get_pdf_std_devs(),
+    )
+
+
+def test_predict_uses_cached_forecasts() -> None:
+    ts_model = create_model()
+    intervals = create_time_series("2024-04-10", np.zeros(3))
+    predictions, _ = ts_model.predict(intervals)
+
+    # Predicting an already predicted interval does not need the model.
+    model = ts_model.model
+    del ts_model.model
+    cached_predictions, _ = ts_model.predict(
+        create_time_series("2024-04-11", np.zeros(1))
+    )
+    ts_model.model = model
+
+    assert cached_predictions.get_pdf_params(0) == predictions.get_pdf_params(1)
+
+
+def test_add_observations_with_calendar_frequency() -> None:
+    values = np.random.default_rng(1).normal(10, 2, 60)
+    weeks = pd.date_range("2024-01-03", periods=values.size, freq="W-WED")
+    ts_model = TimeSeriesModel()
+    ts_model.create_model(
+        weeks[:50],
+        values[:50],
+        "W-WED",
+        {"order_p": 1, "order_q": 0, "order_d": 0},
+    )
+    observations = TimeSeries()
+    observations.setup_time_intervals(weeks[50], "W", 10)
+    observations.aggregated = values[50:]
+
+    ts_model.add_observations(observations, keep_history=True)
+
+    assert ts_model.model.nobs == 60
+    assert ts_model.model.model._index.freq == weeks.freq
+    assert ts_model.model.model._index[-1] == weeks[-1]
@@ -19,9 +19,16 @@ from __future__ import annotations
 import copy
 from typing import Any, Optional
 
+import numpy as np
+import pandas as pd
 import pytest
 
-from portend.monitor.alerts import calculate_alert_level, clear_metrics_cache
+from portend.analysis.time_series.timeseries import TimeSeries
+from portend.monitor.alerts import (
+    TimeSeriesMonitor,
+    calculate_alert_level,
+    clear_metrics_cache,
+)
 
 # Base config data for tests.
 BASE_CONFIG = {
@@ -121,3 +128,48 @@ def test_no_sliding_window():
 
     # No sliding window, alert level should be NOT none
     assert alert_level != "none"
+
+
+class ConstantTimeSeriesModel:
+    """Time-series model predicting the same pdf params for all intervals."""
+
+    def predict(self, input: TimeSeries):
+        predictions = TimeSeries()
+        predictions.copy_time_intervals(input)
+        num_intervals = input.get_num_intervals()
+        predictions.set_pdf_param_arrays(
+            np.full(num_intervals, 10.0), np.full(num_intervals, 2.0)
+        )
+        return predictions, {}
+
+
+def test_time_series_monitor():
+    config = {
+        "time_series": {
+            "time_interval": {
+                "starting_interval": "2024-01-01",
+                "interval_unit": "D",
+            },
+            "allowed_late_intervals": 0,
+        },
+        "metrics": [
+            {
+                "name": "Z-Test",
+                "metric_class": "portend.metrics.time_series.z_test.ZTestMetric",
+            }
+        ],
+        "alerts": {"Z-Test": [{"less_than": -1, "alert_level": "critical"}]},
+    }
+    monitor = TimeSeriesMonitor(config, ConstantTimeSeriesModel())  # type: ignore
+    day_ns = pd.to_timedelta(1, "D").value
+
+    start_ns = pd.Timestamp("2024-01-01").value
+
+    assert monitor.add_sample(start_ns, 6) == []
+    assert monitor.add_sample(start_ns + 1, 4) == []
+    results = monitor.add_sample(start_ns + day_ns, 2)
+    results += monitor.flush()
+
+    assert [result["alert_level"] for result in results] == ["none", "critical"]
+    assert results[1]["interval"] == pd.Timestamp("2024-01-02").timestamp()
+    assert results[1]["metrics"][0]["results"] == -4
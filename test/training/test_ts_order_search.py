@@ -0,0 +1,79 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from portend.analysis.time_series.timeseries import TimeSeries
+from portend.training import ts_order_search
+
+
+def create_ar_time_series() -> TimeSeries:
+    rng = np.random.default_rng(1)
+    values = np.zeros(150)
+    for idx in range(1, values.size):
+        values[idx] = 0.8 * values[idx - 1] + rng.normal()
+    time_series = TimeSeries()
+    time_series.setup_time_intervals("2024-01-01", "D", values.size)
+    time_series.aggregated = values + 10
+    return time_series
+
+
+def test_get_candidate_params() -> None:
+    candidates = ts_order_search.get_candidate_params(
+        {"order_p": [0, 1], "order_q": 1}
+    )
+
+    assert candidates == [
+        {"order_p": 0, "order_q": 1, "order_d": 0},
+        {"order_p": 1, "order_q": 1, "order_d": 0},
+    ]
+
+
+@pytest.mark.parametrize("criterion", ["aic", "bic", "holdout"])
+def test_search_model_order(criterion: str) -> None:
+    ts_model, best_params, results = ts_order_search.search_model_order(
+        create_ar_time_series(),
+        "D",
+        {"order_p": [0, 1], "criterion": criterion, "num_workers": 2},
+    )
+
+    assert best_params == {"order_p": 1, "order_q": 0, "order_d": 0}
+    assert [result["params"] for result in results][0] == best_params
+    assert results[0][criterion] < results[1][criterion]
+    assert ts_model.model.nobs == 150
+
+
+def test_search_model_order_rejects_aic_across_order_d() -> None:
+    with pytest.raises(Exception, match="order_d"):
+        ts_order_search.search_model_order(
+            create_ar_time_series(), "D", {"order_p": 1, "order_d": [0, 1]}
+        )
+
+
+def test_non_finite_scores_ranked_last() -> None:
+    candidates = ts_order_search.get_candidate_params({"order_p": [0, 1, 2]})
+
+    results = ts_order_search._rank_candidates(
+        candidates, [float("nan"), 5.0, -float("inf")], "aic"
+    )
+
+    assert results[0] == {"params": candidates[1], "aic": 5.0}
+    assert [result["aic"] for result in results[1:]] == [math.inf, math.inf]
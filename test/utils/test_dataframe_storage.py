@@ -0,0 +1,151 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portend.utils import dataframe_helper
+from portend.utils.dataframe_storage import (
+    JSONLinesStorage,
+    JSONStorage,
+    NPZStorage,
+    get_storage,
+)
+
+
+def create_test_dataframe() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": ["a", "b", "c"],
+            "timestamp": [1000, 2000, 3000],
+            "band_1": [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]],
+            "coordinates": [[1.5], [2.5, 3.5], []],
+        }
+    )
+
+
+def test_storage_selected_by_extension() -> None:
+    assert isinstance(get_storage("dataset.json"), JSONStorage)
+    assert isinstance(get_storage("dataset.NPZ"), NPZStorage)
+    assert isinstance(get_storage("dataset.jsonl"), JSONLinesStorage)
+    assert isinstance(get_storage("dataset"), JSONStorage)
+
+
+@pytest.mark.parametrize("extension", [".json", ".jsonl", ".npz"])
+def test_dataframe_round_trip(tmp_path: Path, extension: str) -> None:
+    filename = str(tmp_path / f"dataset{extension}")
+    dataframe = create_test_dataframe()
+
+    dataframe_helper.save_dataframe_to_file(dataframe, filename)
+    loaded = dataframe_helper.load_dataframe_from_file(filename)
+
+    assert list(loaded.columns) == list(dataframe.columns)
+    assert list(loaded["id"]) == ["a", "b", "c"]
+    assert list(loaded["timestamp"]) == [1000, 2000, 3000]
+    assert np.array_equal(np.stack(loaded["band_1"]), [[1, 2], [3, 4], [5, 6]])
+    assert list(loaded["coordinates"][1]) == [2.5, 3.5]
+
+
+def test_npz_round_trip_with_nulls(tmp_path: Path) -> None:
+    filename = str(tmp_path / "dataset.npz")
+    dataframe = pd.DataFrame(
+        {
+            "id": ["a", None, "c"],
+            "count": pd.Series([1, None, 3], dtype=object),
+            "label": [None, None, None],
+        }
+    )
+
+    dataframe_helper.save_dataframe_to_file(dataframe, filename)
+    loaded = dataframe_helper.load_dataframe_from_file(filename)
+
+    assert list(loaded["id"]) == ["a", None, "c"]
+    assert list(loaded["count"]) == [1, None, 3]
+    assert list(loaded["label"]) == [None, None, None]
+
+
+@pytest.mark.parametrize("extension", [".json", ".jsonl", ".npz"])
+def test_load_without_columns(tmp_path: Path, extension: str) -> None:
+    filename = str(tmp_path / f"dataset{extension}")
+    dataframe_helper.save_dataframe_to_file(create_test_dataframe(), filename)
+
+    loaded = dataframe_helper.load_dataframe_from_file(
+        filename, ["band_1", "coordinates"]
+    )
+
+    assert list(loaded.columns) == ["id", "timestamp"]
+    assert list(loaded["id"]) == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_arrow_round_trip(tmp_path: Path, extension: str) -> None:
+    pytest.importorskip("pyarrow")
+    filename = str(tmp_path / f"dataset{extension}")
+    dataframe = create_test_dataframe()
+
+    dataframe_helper.save_dataframe_to_file(dataframe, filename)
+    loaded = dataframe_helper.load_dataframe_from_file(filename)
+
+    assert list(loaded["id"]) == ["a", "b", "c"]
+    assert np.array_equal(np.stack(loaded["band_1"]), [[1, 2], [3, 4], [5, 6]])
+
+
+def test_chunked_json_matches_full_json(tmp_path: Path) -> None:
+    filename = str(tmp_path / "dataset.json")
+    dataframe = create_test_dataframe()
+    expected = dataframe.to_json(
+        orient="records", indent=4, date_format="epoch", date_unit="ms"
+    )
+
+    JSONStorage(chunk_size=2).save(dataframe, filename)
+
+    with open(filename) as dataset_file:
+        assert dataset_file.read() == expected
+
+
+def test_compact_json_round_trip(tmp_path: Path) -> None:
+    filename = str(tmp_path / "dataset.json")
+    dataframe = create_test_dataframe()
+
+    dataframe_helper.save_dataframe_to_file(dataframe, filename, compact=True)
+    loaded = dataframe_helper.load_dataframe_from_file(filename)
+
+    with open(filename) as dataset_file:
+        assert "\n" not in dataset_file.read()
+    assert list(loaded["id"]) == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("extension", [".json", ".jsonl", ".npz"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_iter_dataframe_chunks(
+    tmp_path: Path, extension: str, compact: bool
+) -> None:
+    filename = str(tmp_path / f"dataset{extension}")
+    dataframe_helper.save_dataframe_to_file(
+        create_test_dataframe(), filename, compact
+    )
+
+    chunks = list(dataframe_helper.iter_dataframe_chunks(filename, 2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert list(chunks[1]["id"]) == ["c"]
+    assert list(chunks[0]["band_1"][1]) == [3.0, 4.0]
@@ -0,0 +1,45 @@
+#
+# Portend Toolset
+#
+# Copyright 2024 Carnegie Mellon University.
+#
+# NO WARRANTY. THIS CARNEGIE MELLON UNIVERSITY AND SOFTWARE ENGINEERING INSTITUTE MATERIAL IS FURNISHED ON AN "AS-IS" BASIS. CARNEGIE MELLON UNIVERSITY MAKES NO WARRANTIES OF ANY KIND, EITHER EXPRESSED OR IMPLIED, AS TO ANY MATTER INCLUDING, BUT NOT LIMITED TO, WARRANTY OF FITNESS FOR PURPOSE OR MERCHANTABILITY, EXCLUSIVITY, OR RESULTS OBTAINED FROM USE OF THE MATERIAL. CARNEGIE MELLON UNIVERSITY DOES NOT MAKE ANY WARRANTY OF ANY KIND WITH RESPECT TO FREEDOM FROM PATENT, TRADEMARK, OR COPYRIGHT INFRINGEMENT.
+#
+# Licensed under a MIT (SEI)-style license, please see license.txt or contact permission@sei.cmu.edu for full terms.
+#
+# [DISTRIBUTION STATEMENT A] This material has been approved for public release and unlimited distribution.  Please see Copyright notice for non-US Government use and distribution.
+#
+# This Software includes and/or makes use of Third-Party Software each subject to its own license.
+#
+# DM24-1299
+#
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from portend.utils.exif_gps import get_exif_gps_decimal_coordinates
+
+
+@pytest.mark.parametrize("extension", ["jpg", "tif"])
+def test_gps_coordinates(tmp_path: Path, extension: str) -> None:
+    # TIFF files can't be saved with a new GPS IFD, so it is copied from a JPEG.
+    exif = Image.Exif()
+    exif[0x8825] = {
+        1: "N",
+        2: (40.0, 26.0, 46.0),
+        3: "W",
+        4: (79.0, 58.0, 56.0),
+    }
+    jpeg_file = str(tmp_path / "gps.jpg")
+    Image.new("RGB", (4, 4)).save(jpeg_file, exif=exif.tobytes())
+    image_file = str(tmp_path / f"image.{extension}")
+    with Image.open(jpeg_file) as jpeg_image:
+        jpeg_image.save(image_file, exif=jpeg_image.getexif())
+
+    coordinates = get_exif_gps_decimal_coordinates(image_file)
+
+    assert coordinates == pytest.approx([40.446111, -79.982222])